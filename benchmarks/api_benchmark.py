@@ -15,6 +15,7 @@
 
 import functools
 import operator
+import threading
 
 import google_benchmark
 import jax
@@ -73,6 +74,49 @@ def eager_binary(state):
     lax.add(a, b).block_until_ready()
 
 
+@google_benchmark.register
+def eager_unary_array_dispatch(state):
+  a = jax.device_put(np.ones((10, 10), np.float32))
+  lax.exp(a)
+  while state:
+    lax.exp(a)
+
+
+@google_benchmark.register
+def eager_binary_array_dispatch(state):
+  a = jax.device_put(np.ones((10, 10), np.float32))
+  b = jax.device_put(np.ones((10, 10), np.float32))
+  lax.mul(a, b)
+  while state:
+    lax.mul(a, b)
+
+
+@google_benchmark.register
+def eager_binary_scalar_dispatch(state):
+  """Mixes a DeviceArray and a NumPy scalar, which isn't on the fast path."""
+  a = jax.device_put(np.ones((10, 10), np.float32))
+  b = np.float32(1)
+  lax.add(a, b)
+  while state:
+    lax.add(a, b)
+
+
+@google_benchmark.register
+def eager_convert_element_type_dispatch(state):
+  a = jax.device_put(np.ones((10, 10), np.float32))
+  lax.convert_element_type(a, np.int32)
+  while state:
+    lax.convert_element_type(a, np.int32)
+
+
+@google_benchmark.register
+def eager_reduce_dispatch(state):
+  a = jax.device_put(np.ones((10, 10), np.float32))
+  lax.reduce_sum_p.bind(a, axes=(0,))
+  while state:
+    lax.reduce_sum_p.bind(a, axes=(0,))
+
+
 @google_benchmark.register
 def jit_trivial_dispatch(state):
   """Benchmarks only the duration for jitted_f to return the future."""
@@ -220,6 +264,64 @@ def jit_dispatch_with_transfer(state):
   x.block_until_ready()
 
 
+def _concurrent_dispatch(f, args, num_threads, state, calls_per_thread=100):
+  """Calls `f(*args)` from `num_threads` threads at once in each iteration."""
+  f(*args).block_until_ready()
+  start = threading.Barrier(num_threads + 1)
+  done = threading.Barrier(num_threads + 1)
+  running = True
+
+  def worker():
+    while True:
+      start.wait()
+      if not running:
+        return
+      for _ in range(calls_per_thread):
+        x = f(*args)
+      x.block_until_ready()
+      done.wait()
+
+  threads = [threading.Thread(target=worker, daemon=True)
+             for _ in range(num_threads)]
+  for t in threads:
+    t.start()
+  while state:
+    start.wait()
+    done.wait()
+  running = False
+  start.wait()
+  for t in threads:
+    t.join()
+  state.counters["calls"] = google_benchmark.Counter(
+      num_threads * calls_per_thread,
+      google_benchmark.Counter.kIsIterationInvariantRate)
+
+
+def jit_concurrent_dispatch(num_threads, state):
+  f = jax.jit(lambda x: x + 1)
+  _concurrent_dispatch(f, (jax.device_put(1.),), num_threads, state)
+
+
+def jit_concurrent_small_matmul(num_threads, state):
+  x = np.random.uniform(size=(20, 20)).astype(np.float32)
+  x = jax.device_put(x)
+  f = jax.jit(lambda x: jnp.dot(x, x))
+  _concurrent_dispatch(f, (x,), num_threads, state)
+
+
+def eager_concurrent_dispatch(num_threads, state):
+  _concurrent_dispatch(lax.neg, (jax.device_put(1.),), num_threads, state)
+
+
+# The main thread only waits for the workers, so these are timed in real time.
+for n in [1, 2, 4, 8]:
+  for bench in [jit_concurrent_dispatch, jit_concurrent_small_matmul,
+                eager_concurrent_dispatch]:
+    benchmarks.append(google_benchmark.register(
+        google_benchmark.option.use_real_time()(partial(bench, n)),
+        name=f"{bench.__name__}_{n}_threads"))
+
+
 @google_benchmark.register
 @required_devices(2)
 def pmap_trivial_2_devices(state):
@@ -461,6 +563,90 @@ def sparse_bcoo_matvec_compile(state):
   return _sparse_bcoo_matvec(state, compile=True)
 
 
+def _sparse_bcoo_matvec_sorted(state, shape, nse, indices_sorted: bool):
+  rng = np.random.RandomState(1701)
+  # np.unique returns the flattened indices in row-major order.
+  flat = np.unique(rng.randint(shape[0] * shape[1], size=nse, dtype=np.int64))
+  row, col = np.divmod(flat, shape[1])
+  data = jnp.asarray(rng.uniform(size=len(flat)).astype(np.float32))
+  indices = jnp.asarray(np.column_stack([row, col]).astype(np.int32))
+  mat = sparse.BCOO((data, indices), shape=shape, indices_sorted=indices_sorted,
+                    unique_indices=True)
+  vec = jnp.asarray(rng.uniform(size=shape[1]).astype(np.float32))
+
+  f = jax.jit(lambda mat, vec: mat @ vec)
+  f(mat, vec).block_until_ready()
+  while state:
+    f(mat, vec).block_until_ready()
+
+
+for _shape, _nse in [((100000, 100000), 100000), ((100000, 100000), 1000000),
+                     ((1000000, 1000000), 10000000)]:
+  for _indices_sorted in [True, False]:
+    google_benchmark.register(
+        partial(_sparse_bcoo_matvec_sorted, shape=_shape, nse=_nse,
+                indices_sorted=_indices_sorted),
+        name=(f"sparse_bcoo_matvec{'_sorted' if _indices_sorted else ''}"
+              f"_{_shape[0]}x{_shape[1]}_nse{_nse}"))
+
+
+def _sparse_block_matmat(state, sparse_format: str):
+  shape, blocksize, density = (1024, 1024), (16, 16), 0.1
+  rng = np.random.RandomState(1701)
+  mask = rng.uniform(size=(shape[0] // blocksize[0], shape[1] // blocksize[1])) < density
+  mat = rng.uniform(size=shape).astype(np.float32) * np.kron(mask, np.ones(blocksize))
+  mat = jnp.asarray(mat, dtype=jnp.float32)
+  if sparse_format == 'bsr':
+    mat = sparse.BSR.fromdense(mat, blocksize=blocksize)
+  elif sparse_format == 'bcoo':
+    mat = sparse.BCOO.fromdense(mat)
+  B = jnp.asarray(rng.uniform(size=(shape[1], 128)).astype(np.float32))
+
+  f = jax.jit(lambda mat, B: mat @ B)
+  f(mat, B).block_until_ready()
+  while state:
+    f(mat, B).block_until_ready()
+
+
+for _sparse_format in ['bsr', 'bcoo', 'dense']:
+  google_benchmark.register(
+      partial(_sparse_block_matmat, sparse_format=_sparse_format),
+      name=f"sparse_block_matmat_{_sparse_format}")
+
+
+def _sparse_csr_matvec(state, shape, nse, coo_path: bool = False):
+  rng = np.random.RandomState(1701)
+  flat = np.unique(rng.randint(shape[0] * shape[1], size=nse, dtype=np.int64))
+  row, col = np.divmod(flat, shape[1])
+  data = jnp.asarray(rng.uniform(size=len(flat)).astype(np.float32))
+  indices = jnp.asarray(col.astype(np.int32))
+  indptr = jnp.asarray(np.concatenate(
+      [[0], np.cumsum(np.bincount(row, minlength=shape[0]))]).astype(np.int32))
+  vec = jnp.asarray(rng.uniform(size=shape[1]).astype(np.float32))
+
+  if coo_path:
+    # The implementation used where the CSR primitives have no dedicated
+    # lowering, which goes through COO indices and a scatter.
+    f = partial(sparse.csr._csr_matvec_impl, shape=shape, transpose=False)
+  else:
+    f = partial(sparse.csr.csr_matvec, shape=shape, transpose=False)
+  f = jax.jit(f)
+
+  f(data, indices, indptr, vec).block_until_ready()
+  while state:
+    f(data, indices, indptr, vec).block_until_ready()
+
+
+for _shape, _nse in [((2000, 2000), 10000), ((100000, 100000), 1000000),
+                     ((1000000, 1000000), 10000000)]:
+  for _coo_path in [False, True]:
+    google_benchmark.register(
+        partial(_sparse_csr_matvec, shape=_shape, nse=_nse,
+                coo_path=_coo_path),
+        name=(f"sparse_csr_matvec{'_coo_path' if _coo_path else ''}"
+              f"_{_shape[0]}x{_shape[1]}_nse{_nse}"))
+
+
 def swap(a, b):
   return b, a
 
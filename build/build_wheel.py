@@ -172,6 +172,8 @@ def prepare_wheel(sources_path):
   copy_to_jaxlib("__main__/jaxlib/mhlo_helpers.py")
   copy_to_jaxlib(f"__main__/jaxlib/_pocketfft.{pyext}")
   copy_to_jaxlib("__main__/jaxlib/pocketfft.py")
+  copy_to_jaxlib(f"__main__/jaxlib/_cpu_sparse.{pyext}")
+  copy_to_jaxlib("__main__/jaxlib/cpu_sparse.py")
   copy_to_jaxlib("__main__/jaxlib/gpu_prng.py")
   copy_to_jaxlib("__main__/jaxlib/gpu_linalg.py")
   copy_to_jaxlib("__main__/jaxlib/gpu_solver.py")
@@ -71,11 +71,13 @@ from jax._src.api import (
   default_backend as default_backend,
   device_count as device_count,
   device_get as device_get,
+  device_get_async as device_get_async,
   device_put as device_put,
   device_put_sharded as device_put_sharded,
   device_put_replicated as device_put_replicated,
   devices as devices,
   disable_jit as disable_jit,
+  donate_eagerly as donate_eagerly,
   eval_shape as eval_shape,
   flatten_fun_nokwargs,  # TODO(phawkins): update users to avoid this.
   float0 as float0,
@@ -103,6 +105,7 @@ from jax._src.api import (
   pxla,  # TODO(phawkins): update users to avoid this.
   remat as remat,
   shapecheck as shapecheck,
+  ShapeBuckets as ShapeBuckets,
   ShapedArray as ShapedArray,
   ShapeDtypeStruct as ShapeDtypeStruct,
   # TODO(phawkins): hide tree* functions from jax, update callers to use
@@ -21,6 +21,7 @@ arrays.
 """
 
 import collections
+import concurrent.futures
 import functools
 from functools import partial
 import inspect
@@ -29,8 +30,11 @@ from typing import (Any, Callable, Generator, Iterable, NamedTuple, Mapping,
                     Optional, Sequence, Tuple, TypeVar, Union, overload, Dict,
                     Hashable, List)
 from typing_extensions import Literal
+import threading
 from warnings import warn
+import weakref
 
+from absl import logging
 import numpy as np
 from contextlib import contextmanager, ExitStack
 
@@ -47,6 +51,7 @@ from jax.tree_util import (tree_map, tree_flatten, tree_unflatten,
 from jax._src import device_array
 from jax._src import dispatch
 from jax._src import dtypes
+from jax._src import profiler
 from jax._src import source_info_util
 from jax._src import traceback_util
 from jax._src.api_util import (
@@ -229,6 +234,7 @@ def jit(
     inline: bool = False,
     keep_unused: bool = False,
     abstracted_axes: Optional[Any] = None,
+    shape_buckets: Optional['ShapeBuckets'] = None,
   ) -> stages.Wrapped:
   """Sets up ``fun`` for just-in-time compilation with XLA.
 
@@ -301,6 +307,19 @@ def jit(
       unused by `fun` *may* be dropped from resulting compiled XLA executables.
       Such arguments will not be transferred to the device nor provided to the
       underlying executable. If `True`, unused arguments will not be pruned.
+    shape_buckets: An optional :class:`ShapeBuckets` padding policy. If given,
+      the sizes of the polymorphic dimensions of the arguments, named in
+      ``shape_buckets.in_shapes`` as for :func:`jax.mask`, are rounded up to a
+      bucket size and the arguments are padded accordingly, so that calls
+      whose sizes fall in the same buckets share a compiled computation. The
+      true sizes are passed to the computation as runtime values, and the
+      outputs are sliced to the sizes given by ``shape_buckets.out_shape``.
+      Padding and slicing happen in host memory, so that nothing is compiled
+      per size, at the cost of copying arguments that are on a device and
+      need padding, and outputs that need slicing, through the host.
+      ``fun`` must only use operations supported by :func:`jax.mask`, and can't
+      take static, donated or keyword arguments. ``.lower(*args).compile()``
+      returns a function of arguments in the same buckets as ``args``.
 
   Returns:
     A wrapped version of ``fun``, set up for just-in-time compilation.
@@ -335,6 +354,12 @@ def jit(
     >>> g(jnp.arange(4), 3)
     DeviceArray([   0,    1,  256, 6561], dtype=int32)
   """
+  if shape_buckets is not None:
+    if static_argnums is not None or static_argnames is not None or donate_argnums:
+      raise ValueError("shape_buckets can't be combined with static_argnums, "
+                       "static_argnames or donate_argnums.")
+    return _bucketed_jit(fun, shape_buckets, device=device, backend=backend,
+                         inline=inline, keep_unused=keep_unused)
   if FLAGS.experimental_cpp_jit and not config.jax_dynamic_shapes:
     return _jit(True, fun, static_argnums, static_argnames, device, backend,
                     donate_argnums, inline, keep_unused)
@@ -410,6 +435,167 @@ def _prepare_jit(fun, static_argnums, static_argnames, donate_argnums,
   return f, in_tree, args_flat, donated_invars
 
 
+# Types of static arguments that the `jax_demote_static_scalars` option may
+# pass to the compiled computation as runtime arguments instead.
+_demotable_scalar_types = {int, float, complex}
+
+# Primitives that a demoted argument, and values computed only from demoted
+# arguments and literals, may flow into. `pow` is missing on purpose: with a
+# static integer exponent `x ** n` traces to `integer_pow`, whose numerics
+# differ.
+_demotable_scalar_uses = {
+    getattr(lax_internal, f"{name}_p") for name in
+    ["add", "sub", "mul", "div", "rem", "neg", "max", "min", "abs", "sign",
+     "exp", "log", "sin", "cos", "tan", "tanh", "sqrt", "rsqrt", "expm1",
+     "log1p", "atan2", "floor", "ceil", "round", "nextafter", "is_finite",
+     "eq", "ne", "lt", "le", "gt", "ge", "select_n", "and", "or", "not", "xor",
+     "real", "imag", "complex", "conj", "convert_element_type",
+     "broadcast_in_dim", "reshape", "squeeze"]}
+
+# Maps functions to the static arguments that `_demote_static_scalars` found
+# to be demotable, for each abstract signature of their calls.
+_demotable_static_args: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+def _demote_static_scalars(fun, static_argnums, static_argnames, args, kwargs):
+  """Demotes static scalar arguments that only flow into elementwise operations.
+
+  A static Python scalar argument that `fun` only uses in elementwise
+  operations on arrays, rather than e.g. in Python control flow or shapes, can
+  be passed as a runtime argument instead, so that a single compiled
+  computation serves all of its values. This is decided by tracing `fun` with
+  the argument abstract, and checking that the jaxpr computes the same
+  operations on arrays as with the argument static, with the argument only
+  feeding elementwise operations. The decision is made once per function,
+  abstract signature of the call and values of the static arguments that are
+  kept static.
+
+  Returns the `static_argnums` and `static_argnames` to use for the call, which
+  are the given objects if no argument is demoted.
+  """
+  nargs = len(args)
+  nums = tuple(sorted({i % nargs for i in static_argnums if -nargs <= i < nargs
+                       and type(args[i]) in _demotable_scalar_types}))
+  names = tuple(sorted(k for k in static_argnames
+                       if type(kwargs.get(k)) in _demotable_scalar_types))
+  if not nums and not names:
+    return static_argnums, static_argnames
+  try:
+    decisions_by_signature = _demotable_static_args.setdefault(fun, {})
+  except TypeError:  # `fun` can't be weakly referenced.
+    return static_argnums, static_argnames
+
+  def demote(demoted_nums, demoted_names):
+    return (tuple(i for i in static_argnums
+                  if not -nargs <= i < nargs or i % nargs not in demoted_nums),
+            tuple(k for k in static_argnames if k not in demoted_names))
+
+  def values(kept_nums, kept_names):
+    # Types are part of the key since e.g. `1 == 1.0`.
+    return (tuple((type(args[i]), args[i]) for i in kept_nums) +
+            tuple((type(kwargs[k]), kwargs[k]) for k in kept_names))
+
+  static_argnums_, static_argnames_ = demote(nums, names)
+  _, in_tree, args_flat, _ = _prepare_jit(
+      fun, static_argnums_, static_argnames_, (), args, kwargs)
+  static_args = ([(i, type(args[i]), args[i]) for i in static_argnums_
+                  if -nargs <= i < nargs] +
+                 [(k, type(kwargs[k]), kwargs[k]) for k in static_argnames_
+                  if k in kwargs])
+  key = (nums, names, tuple(type(args[i]) for i in nums),
+         tuple(type(kwargs[k]) for k in names), tuple(static_args), in_tree,
+         tuple(map(shaped_abstractify, args_flat)))
+  # Whether a candidate can be demoted may depend on the values of the
+  # candidates that are kept static, so decisions are keyed on those values:
+  # {(kept nums, kept names): {values of the kept candidates: demoted}}.
+  decisions = decisions_by_signature.setdefault(key, {})
+  for (kept_nums, kept_names), by_values in list(decisions.items()):
+    demoted = by_values.get(values(kept_nums, kept_names))
+    if demoted is not None:
+      break
+  else:
+    demoted = _find_demotable_static_args(
+        fun, nums, names, demote, args, kwargs)
+    kept = (tuple(i for i in nums if i not in demoted[0]),
+            tuple(k for k in names if k not in demoted[1]))
+    decisions.setdefault(kept, {})[values(*kept)] = demoted
+  if not demoted[0] and not demoted[1]:
+    return static_argnums, static_argnames
+  return demote(*demoted)
+
+def _find_demotable_static_args(fun, nums, names, demote, args, kwargs):
+  nargs = len(args)
+
+  def trace(demoted_nums, demoted_names):
+    static_argnums, static_argnames = demote(demoted_nums, demoted_names)
+    closed_fun, in_tree, args_flat, _ = _prepare_jit(
+        fun, static_argnums, static_argnames, (), args, kwargs)
+    flat_fun, _ = flatten_fun(closed_fun, in_tree)
+    try:
+      jaxpr, _, _ = pe.trace_to_jaxpr_dynamic(
+          flat_fun, map(shaped_abstractify, args_flat))
+    except Exception:
+      return None
+    # Find the jaxpr inputs of the demoted arguments, which are leaves of the
+    # flattened (dynamic args, dynamic kwargs).
+    leaves = tree_unflatten(in_tree, range(in_tree.num_leaves))
+    static = {i % nargs for i in static_argnums if -nargs <= i < nargs}
+    demoted_vars = (
+        [jaxpr.invars[leaves[0][i - sum(j < i for j in static)]]
+         for i in demoted_nums] +
+        [jaxpr.invars[leaves[1][k]] for k in demoted_names])
+    return _array_computation(jaxpr, demoted_vars)
+
+  reference = trace((), ())
+  if reference is None:
+    # Let the call itself report the error.
+    return (), ()
+
+  def demotable(demoted_nums, demoted_names):
+    return trace(demoted_nums, demoted_names) == reference
+
+  demoted_nums, demoted_names = nums, names
+  if not demotable(nums, names):
+    demoted_nums = tuple(i for i in nums if demotable((i,), ()))
+    demoted_names = tuple(k for k in names if demotable((), (k,)))
+    if (len(demoted_nums) + len(demoted_names) > 1 and
+        not demotable(demoted_nums, demoted_names)):
+      demoted_nums, demoted_names = (), ()
+  log_priority = logging.WARNING if config.jax_log_compiles else logging.DEBUG
+  logging.log(
+      log_priority, "Static scalar arguments of %s that only flow into "
+      "elementwise operations, demoted to runtime arguments: positions %s, "
+      "names %s. Kept static: positions %s, names %s.",
+      getattr(fun, "__name__", fun), list(demoted_nums), list(demoted_names),
+      [i for i in nums if i not in demoted_nums],
+      [k for k in names if k not in demoted_names])
+  return demoted_nums, demoted_names
+
+def _array_computation(jaxpr, demoted_vars):
+  """Summarizes the operations of `jaxpr` that don't only involve scalars.
+
+  Equations whose inputs are all literals, `demoted_vars`, or computed only
+  from those are left out: they correspond to Python arithmetic on static
+  arguments. Returns the primitives and output types of the other equations,
+  or None if a value computed from `demoted_vars` flows into anything but an
+  elementwise operation.
+  """
+  demoted = set(demoted_vars)
+  constant = set()
+  computation = []
+  for eqn in jaxpr.eqns:
+    invars = [v for v in eqn.invars if not isinstance(v, core.Literal)]
+    if any(v in demoted for v in invars):
+      if eqn.primitive not in _demotable_scalar_uses:
+        return None
+      if all(v in demoted or v in constant for v in invars):
+        demoted.update(eqn.outvars)
+        continue
+    elif all(v in constant for v in invars):
+      constant.update(eqn.outvars)
+      continue
+    computation.append((eqn.primitive, tuple(v.aval for v in eqn.outvars)))
+  return computation
+
 PytreeOfAbstractedAxesSpec = Any
 
 def _python_jit(
@@ -429,8 +615,13 @@ def _python_jit(
   def f_jitted(*args, **kwargs):
     if config.jax_disable_jit:
       return fun(*args, **kwargs)
+    call_static_argnums, call_static_argnames = static_argnums, static_argnames
+    if config.jax_demote_static_scalars and not donate_argnums:
+      call_static_argnums, call_static_argnames = _demote_static_scalars(
+          fun, static_argnums, static_argnames, args, kwargs)
     closed_fun, in_tree, args_flat, donated_invars = _prepare_jit(
-        fun, static_argnums, static_argnames, donate_argnums, args, kwargs)
+        fun, call_static_argnums, call_static_argnames, donate_argnums, args,
+        kwargs)
     flat_fun, out_tree = flatten_fun(closed_fun, in_tree)
     for arg in args_flat:
       _check_arg(arg)
@@ -444,10 +635,16 @@ def _python_jit(
         device=device, backend=backend, name=flat_fun.__name__,
         donated_invars=donated_invars, inline=inline,
         keep_unused=keep_unused)
+    if dispatch.compile_recorder is not None:
+      dispatch.compile_recorder("jit", fun, args, kwargs, static_argnums,
+                                static_argnames)
     return tree_unflatten(out_tree(), out_flat)
 
   f_jitted.lower = _jit_lower(fun, static_argnums, static_argnames, device,
                               backend, donate_argnums, inline, keep_unused)
+  f_jitted._precompile = _jit_precompile(
+      fun, static_argnums, static_argnames, device, backend, donate_argnums,
+      inline, keep_unused)
 
   def clear_cache():
     dispatch.xla_callable.evict_function(fun)
@@ -476,12 +673,46 @@ class _FastpathData(NamedTuple):
   lazy_exprs: Iterable[Any]
   kept_var_bitvec: Iterable[bool]
 
-_cpp_jit_cache = jax_jit.CompiledFunctionCache()
+_cpp_jit_cache: Optional[jax_jit.CompiledFunctionCache] = None
+_cpp_jit_cache_capacity: Optional[int] = None
+
+def _get_cpp_jit_cache() -> jax_jit.CompiledFunctionCache:
+  # The capacity of the C++ cache can't be changed once it is created, so a new
+  # cache is used by functions jitted after jax_executable_cache_max_entries
+  # changes.
+  global _cpp_jit_cache, _cpp_jit_cache_capacity
+  capacity = FLAGS.jax_executable_cache_max_entries
+  if _cpp_jit_cache is None or capacity != _cpp_jit_cache_capacity:
+    if capacity > 0:
+      _cpp_jit_cache = jax_jit.CompiledFunctionCache(capacity)
+    else:
+      _cpp_jit_cache = jax_jit.CompiledFunctionCache()
+    _cpp_jit_cache_capacity = capacity
+  return _cpp_jit_cache
 
 
 def _cpp_jit_clear_cache(self):
   self._clear_cache()
   dispatch.xla_callable.evict_function(self._fun)
+  if jax.config.jax_persistent_jaxpr_cache:
+    # Avoid import cycle between jax and jax.experimental
+    from jax.experimental.compilation_cache import jaxpr_cache
+    jaxpr_cache.evict_function(self._fun)
+
+def _use_persistent_jaxpr_cache(args_flat) -> bool:
+  """Whether a jitted call can go through the persistent jaxpr cache.
+
+  Only calls that would execute right away, rather than be traced, qualify.
+  """
+  if not (jax.config.jax_persistent_jaxpr_cache and
+          not jax.config.jax_dynamic_shapes and
+          not jax.config.jax_disable_jit and
+          not (jax.config.jax_debug_nans or jax.config.jax_debug_infs)):
+    return False
+  # Avoid import cycle between jax and jax.experimental
+  from jax.experimental.compilation_cache import compilation_cache as cc
+  return (cc.is_initialized() and
+          isinstance(core.find_top_trace(args_flat), core.EvalTrace))
 
 def _cpp_jit(
     fun: Callable,
@@ -511,19 +742,50 @@ def _cpp_jit(
     # An alternative would be for cache_miss to accept from C++ the arguments
     # (dyn_args, donated_invars, args_flat, in_tree), since otherwise we have
     # work/code that is redundant between C++ and Python. We can try that later.
+    call_static_argnums, call_static_argnames = static_argnums, static_argnames
+    if jax.config.jax_demote_static_scalars and not donate_argnums:
+      call_static_argnums, call_static_argnames = _demote_static_scalars(
+          fun, static_argnums, static_argnames, args, kwargs)
+    # Calls with demoted arguments can't use the C++ fast path, which only
+    # passes the arguments that are not static to the executable.
+    demoted = (call_static_argnums is not static_argnums or
+               call_static_argnames is not static_argnames)
     closed_fun, in_tree, args_flat, donated_invars = _prepare_jit(
-        fun, static_argnums, static_argnames, donate_argnums, args, kwargs)
+        fun, call_static_argnums, call_static_argnames, donate_argnums, args,
+        kwargs)
     for arg in args_flat:
       _check_arg(arg)
     flat_fun, out_tree = flatten_fun(closed_fun, in_tree)
     if jax.config.jax_dynamic_shapes:
       in_type = pe.infer_lambda_input_type(None, args_flat)
       flat_fun = lu.annotate(flat_fun, in_type)
-    out_flat = xla.xla_call(
-        flat_fun, *args_flat,
-        device=device, backend=backend, name=flat_fun.__name__,
-        donated_invars=donated_invars, inline=inline, keep_unused=keep_unused)
-    out_pytree_def = out_tree()
+
+    cached = None
+    with profiler.compile_event("jit_cache_miss", flat_fun.__name__):
+      if _use_persistent_jaxpr_cache(args_flat):
+        # Avoid import cycle between jax and jax.experimental
+        from jax.experimental.compilation_cache import jaxpr_cache
+        static_args = ([args[i] for i in call_static_argnums
+                        if -len(args) <= i < len(args)] +
+                       [(k, kwargs[k]) for k in call_static_argnames
+                        if k in kwargs])
+        cached = jaxpr_cache.call(
+            fun, flat_fun, out_tree, static_args, in_tree, args_flat,
+            donated_invars, device=device, backend=backend,
+            keep_unused=keep_unused)
+      if cached is not None:
+        out_flat, out_pytree_def, execute = cached
+      else:
+        out_flat = xla.xla_call(
+            flat_fun, *args_flat,
+            device=device, backend=backend, name=flat_fun.__name__,
+            donated_invars=donated_invars, inline=inline,
+            keep_unused=keep_unused)
+        out_pytree_def = out_tree()
+        execute = None
+    if dispatch.compile_recorder is not None:
+      dispatch.compile_recorder("jit", fun, args, kwargs, static_argnums,
+                                static_argnames)
     out = tree_unflatten(out_pytree_def, out_flat)
 
     ### Decide whether we can support the C++ fast path
@@ -531,14 +793,15 @@ def _cpp_jit(
     # to know whether `jax.jit(f)(x)` will execute or trace, it's not enough to
     # inspect the argument x, we actually do need to execute it and look at the
     # outputs that could be tracers (if f is capturing `Tracer` by closure).
-    execute: Optional[functools.partial] = (
-        dispatch.xla_callable.most_recent_entry())
+    if execute is None:
+      execute = dispatch.xla_callable.most_recent_entry()
     # TODO(sharadmv): Enable fast path for effectful jaxprs
     # TODO(sharadmv): Clean up usage of `execute.args`
     use_fastpath = (
         # This is if we have already executed this code-path (most-recent entry
         # has been reset to None). Thus, we do not support the fast-path.
         execute is not None and
+        not demoted and
         execute.func is dispatch._execute_compiled and  # not trivial, not pmap
         # No effects in computation
         not execute.args[5] and
@@ -592,12 +855,15 @@ def _cpp_jit(
       static_argnums=static_argnums,
       static_argnames=static_argnames,
       donate_argnums=donate_argnums,
-      cache=_cpp_jit_cache,
+      cache=_get_cpp_jit_cache(),
       **jitted_f_kwargs)  # type: ignore
   f_jitted = wraps(fun)(cpp_jitted_f)
 
   f_jitted.lower = _jit_lower(fun, static_argnums, static_argnames, device,
                               backend, donate_argnums, inline, keep_unused)
+  f_jitted._precompile = _jit_precompile(
+      fun, static_argnums, static_argnames, device, backend, donate_argnums,
+      inline, keep_unused)
   f_jitted._fun = fun
   type(f_jitted).clear_cache = _cpp_jit_clear_cache
 
@@ -650,6 +916,43 @@ def _jit_lower(fun, static_argnums, static_argnames, device, backend,
   return lower
 
 
+def _jit_precompile(fun, static_argnums, static_argnames, device, backend,
+                    donate_argnums, inline, keep_unused: bool):
+  """Make a ``_precompile`` method for jitted functions.
+
+  ``_precompile`` takes the same arguments as the jitted function, except that
+  dynamic arguments may be abstract values such as ``core.ShapedArray``. It
+  traces and compiles the function into the same in-memory cache that a call
+  with arguments of those types would use, without executing it, so that such
+  a call doesn't compile.
+  """
+
+  def precompile(*args, **kwargs) -> None:
+    closed_fun, in_tree, args_flat, donated_invars = _prepare_jit(
+        fun, static_argnums, static_argnames, donate_argnums, args, kwargs)
+    flat_fun, _ = flatten_fun(closed_fun, in_tree)
+    top_trace = core.find_top_trace(())
+    if not isinstance(top_trace, core.EvalTrace):
+      raise RuntimeError("jitted functions can only be precompiled outside of "
+                         "transformations.")
+    # Wrap `flat_fun` the way `xla.xla_call` does, so that its cache key in
+    # `dispatch.xla_callable` matches that of a call.
+    name = flat_fun.__name__
+    params = dict(device=device, backend=backend, name=name,
+                  donated_invars=donated_invars, inline=inline,
+                  keep_unused=keep_unused)
+    call_fun, _ = core.process_env_traces_call(
+        flat_fun, xla.xla_call_p, top_trace and top_trace.level,
+        tuple(params.items()))
+    call_fun = lu.annotate(call_fun, flat_fun.in_type)
+    arg_specs = [(shaped_abstractify(x), getattr(x, "_device", None))
+                 for x in args_flat]
+    dispatch.xla_callable(call_fun, device, backend, name, donated_invars,
+                          keep_unused, *arg_specs)
+
+  return precompile
+
+
 @contextmanager
 def disable_jit():
   """Context manager that disables :py:func:`jit` behavior under its dynamic context.
@@ -2089,6 +2392,9 @@ def _python_pmap(
         donate_tuple=donate_tuple)
 
     out_tree, out_flat = f_pmapped_(*args, **kwargs)
+    if dispatch.compile_recorder is not None:
+      dispatch.compile_recorder("pmap", fun, args, kwargs,
+                                static_broadcasted_tuple, ())
     return tree_unflatten(out_tree(), out_flat)
 
   pmap_f.lower = _pmap_lower(
@@ -2147,6 +2453,9 @@ def _cpp_pmap(
         donate_tuple=donate_tuple)
 
     out_tree, out_flat = f_pmapped_(*args, **kwargs)
+    if dispatch.compile_recorder is not None:
+      dispatch.compile_recorder("pmap", fun, args, kwargs,
+                                static_broadcasted_tuple, ())
     out_pytree_def = out_tree()
     out = tree_unflatten(out_pytree_def, out_flat)
 
@@ -2279,6 +2588,170 @@ def mask(fun: Callable, in_shapes, out_shape=None) -> Callable:
       return tree_unflatten(out_tree, outs)
   return wrapped_fun
 
+def _next_power_of_two(size: int) -> int:
+  return 1 if size <= 1 else 1 << (size - 1).bit_length()
+
+
+class ShapeBuckets(NamedTuple):
+  """A padding policy for the ``shape_buckets`` argument of :func:`jax.jit`.
+
+  For example, a function of a batch of sequences of varying length can be
+  compiled once per power of two of the length rather than once per length:
+
+  >>> buckets = jax.ShapeBuckets(in_shapes=['(b, _)'], out_shape='b')
+  >>> f = jax.jit(lambda x: jnp.sum(x, axis=1), shape_buckets=buckets)
+  >>> f(jnp.ones((3, 4)))  # Compiled for a batch of 4.
+  DeviceArray([4., 4., 4.], dtype=float32)
+
+  Attributes:
+    in_shapes: the shape specifications of the arguments, as for
+      :func:`jax.mask`, e.g. ``['(n, _)', 'n']``.
+    out_shape: the shape specification of the outputs, as for
+      :func:`jax.mask`.
+    bucket_size: a function mapping the size of a polymorphic dimension to its
+      bucket size, which is at least that size, or a sequence of bucket sizes
+      from which the smallest that fits is used. Sizes larger than all buckets
+      aren't padded. Defaults to rounding up to a power of two.
+  """
+  in_shapes: Any
+  out_shape: Any
+  bucket_size: Union[Callable[[int], int], Sequence[int]] = _next_power_of_two
+
+
+def _bucket_size(bucket_size, size: int) -> int:
+  if callable(bucket_size):
+    padded_size = bucket_size(size)
+    if padded_size < size:
+      raise ValueError("The bucket_size of ShapeBuckets must return a size at "
+                       f"least as large as its argument, got {padded_size} "
+                       f"for {size}.")
+    return padded_size
+  return min((b for b in bucket_size if b >= size), default=size)
+
+def _pad_on_host(x, shape):
+  padding = [(0, d - s) for s, d in zip(np.shape(x), shape)]
+  if not any(hi for _, hi in padding):
+    return x
+  # Padding on the host, including for arrays on a device, doesn't compile a
+  # computation for each size, unlike padding on the device.
+  return np.pad(np.asarray(x), padding)
+
+def _slice_on_host(x, shape):
+  if np.shape(x) == tuple(shape):
+    return x
+  # As in `_pad_on_host`, slicing on the host doesn't compile anything.
+  sliced = np.asarray(x)[tuple(slice(0, d) for d in shape)]
+  return device_put(sliced, x.device() if hasattr(x, "device") else None)
+
+class _BucketedCompiled(stages.Compiled):
+  """A ``Compiled`` bucket that pads and slices like the function it's from.
+
+  Its ``args_info`` describes the padded arguments and the dimension sizes
+  passed to the masked computation.
+  """
+  __slots__ = ["_pad_args", "_slice_outs"]
+
+  def __init__(self, compiled: stages.Compiled, pad_args, slice_outs):
+    super().__init__(compiled._executable, compiled.args_info,
+                     compiled.out_tree, no_kwargs=compiled._no_kwargs)
+    self._pad_args = pad_args
+    self._slice_outs = slice_outs
+
+  def __call__(self, *args, **kwargs):
+    padded_args, logical_env = self._pad_args(args, kwargs)
+    (padded_info, _), _ = self.args_info
+    shapes = [np.shape(x) for x in tree_leaves(padded_args)]
+    bucket_shapes = [info.aval.shape for info in tree_leaves(padded_info)]
+    if shapes != bucket_shapes:
+      raise TypeError(f"function compiled for the bucket of shapes "
+                      f"{bucket_shapes}, called with arguments padded to "
+                      f"{shapes}")
+    outs = super().__call__(padded_args, logical_env)
+    return self._slice_outs(outs, logical_env)
+
+
+class _BucketedLowered(stages.Lowered):
+  """A ``Lowered`` bucket whose ``compile`` returns a ``_BucketedCompiled``."""
+  __slots__ = ["_pad_args", "_slice_outs"]
+
+  def __init__(self, lowered: stages.Lowered, pad_args, slice_outs):
+    super().__init__(lowered._lowering, lowered.args_info, lowered.out_tree,
+                     no_kwargs=lowered._no_kwargs)
+    self._pad_args = pad_args
+    self._slice_outs = slice_outs
+
+  def compile(self) -> _BucketedCompiled:
+    return _BucketedCompiled(super().compile(), self._pad_args,
+                             self._slice_outs)
+
+
+def _bucketed_jit(fun: Callable, shape_buckets: ShapeBuckets,
+                  **jit_kwargs) -> stages.Wrapped:
+  _check_callable(fun)
+  in_specs, in_tree = tree_flatten(shape_buckets.in_shapes)
+  in_specs = map(masking.parse_spec, in_specs)
+  out_specs, out_spec_tree = tree_flatten(shape_buckets.out_shape)
+  out_specs = map(masking.parse_spec, out_specs)
+  masked_fun = jit(mask(fun, shape_buckets.in_shapes, shape_buckets.out_shape),
+                   **jit_kwargs)
+
+  def pad_args(args, kwargs):
+    if kwargs:
+      raise TypeError("Functions jitted with shape_buckets don't take keyword "
+                      f"arguments, got {list(kwargs)}.")
+    args_flat, tree = tree_flatten(args)
+    if tree != in_tree:
+      raise TypeError(f"Tree mismatch: Input {tree} and shape spec {in_tree}.")
+    shapes = map(np.shape, args_flat)
+    in_shapes = map(masking.finalize_spec, in_specs, shapes)
+    logical_env = masking.bind_shapes(in_shapes, shapes)
+    padded_env = {name: _bucket_size(shape_buckets.bucket_size, size)
+                  for name, size in logical_env.items()}
+    padded_args = [_pad_on_host(x, masking.eval_poly_shape(s, padded_env))
+                   for x, s in zip(args_flat, in_shapes)]
+    return tree_unflatten(in_tree, padded_args), logical_env
+
+  def logical_out_shapes(outs, logical_env):
+    outs_flat, out_tree = tree_flatten(outs)
+    if out_tree != out_spec_tree:
+      raise TypeError(f"Tree mismatch: Output {out_tree} and shape spec "
+                      f"{out_spec_tree}.")
+    out_shapes = map(masking.finalize_spec, out_specs, map(np.shape, outs_flat))
+    return outs_flat, out_tree, [masking.eval_poly_shape(s, logical_env)
+                                 for s in out_shapes]
+
+  def slice_outs(outs, logical_env):
+    outs_flat, out_tree, out_shapes = logical_out_shapes(outs, logical_env)
+    return tree_unflatten(out_tree, map(_slice_on_host, outs_flat, out_shapes))
+
+  @wraps(fun)
+  @api_boundary
+  def f_bucketed(*args, **kwargs):
+    padded_args, logical_env = pad_args(args, kwargs)
+    return slice_outs(masked_fun(padded_args, logical_env), logical_env)
+
+  def lower(*args, **kwargs) -> stages.Lowered:
+    """Lowers the computation of the buckets of the given arguments' sizes.
+
+    The compiled computation takes arguments in the same buckets as ``args``
+    and pads and slices them as the bucketed function does.
+    """
+    return _BucketedLowered(masked_fun.lower(*pad_args(args, kwargs)),
+                            pad_args, slice_outs)
+
+  def eval_shape(*args, **kwargs):
+    """Returns the shapes and dtypes of the outputs for the given arguments."""
+    padded_args, logical_env = pad_args(args, kwargs)
+    outs = jax.eval_shape(masked_fun, padded_args, logical_env)
+    outs_flat, out_tree, out_shapes = logical_out_shapes(outs, logical_env)
+    return tree_unflatten(out_tree, [ShapeDtypeStruct(shape, x.dtype)
+                                     for x, shape in zip(outs_flat, out_shapes)])
+
+  f_bucketed.lower = lower
+  f_bucketed.eval_shape = eval_shape
+  return f_bucketed
+
+
 @curry
 def shapecheck(in_shapes, out_shape, fun: Callable):
   _check_callable(fun)
@@ -2974,6 +3447,114 @@ def device_get(x: Any):
         pass
     return tree_map(_device_get, x)
 
+# Transfers of `device_get_async` complete on this thread, which is created on
+# first use.
+_device_get_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_device_get_executor_lock = threading.Lock()
+
+def _get_device_get_executor() -> concurrent.futures.ThreadPoolExecutor:
+  global _device_get_executor
+  with _device_get_executor_lock:
+    if _device_get_executor is None:
+      _device_get_executor = concurrent.futures.ThreadPoolExecutor(
+          max_workers=1, thread_name_prefix="jax_device_get")
+    return _device_get_executor
+
+@jit
+def _concatenate_flat(*xs):
+  return lax_internal.concatenate(
+      [lax_internal.reshape(x, (x.size,)) for x in xs], 0)
+
+def _coalesce_leaves(leaves: List[Any], coalesce_bytes: int
+                     ) -> Tuple[List[Any], List[Tuple[List[int], Any]]]:
+  """Concatenates small DeviceArray leaves on the same device and of the same
+  dtype into one array each, so that each group is transferred at once.
+
+  Returns the leaves left alone, with None in place of coalesced leaves, and a
+  list of the indices of the coalesced leaves and their concatenation.
+  """
+  groups: Dict[Any, List[int]] = collections.defaultdict(list)
+  for i, x in enumerate(leaves):
+    if (type(x) in device_array.device_array_types and
+        x.aval.size * x.aval.dtype.itemsize <= coalesce_bytes and
+        not x.device_buffer.is_deleted()):
+      groups[(x.device_buffer.device(), x.aval.dtype)].append(i)
+  leaves = list(leaves)
+  coalesced = []
+  for indices in groups.values():
+    if len(indices) < 2:
+      continue
+    xs = [leaves[i] for i in indices]
+    coalesced.append((indices, _concatenate_flat(*xs)))
+    for i in indices:
+      leaves[i] = None
+  return leaves, coalesced
+
+def _device_get_flat(leaves, coalesced, shapes):
+  with config_explicit_device_get_scope():
+    out = [_device_get(x) for x in leaves]
+    for indices, y in coalesced:
+      flat = _device_get(y)
+      offsets = np.cumsum([0] + [prod(shapes[i]) for i in indices])
+      for i, start, stop in zip(indices, offsets[:-1], offsets[1:]):
+        out[i] = flat[start:stop].reshape(shapes[i])
+    return out
+
+def device_get_async(x: Any, *, coalesce_bytes: int = 0
+                     ) -> concurrent.futures.Future:
+  """Transfers ``x`` to host without blocking.
+
+  The transfers of all the buffers in ``x`` are started before this function
+  returns, and run concurrently with later computations. Waiting for them and
+  converting the buffers to NumPy arrays happens on a background thread.
+
+  Args:
+    x: An array, scalar, DeviceArray or (nested) standard Python container
+      thereof representing the array to be transferred to host.
+    coalesce_bytes: DeviceArrays of at most this many bytes that are on the same
+      device and have the same dtype are concatenated on the device and
+      transferred together, which is faster than many small transfers. By
+      default no arrays are coalesced.
+
+  Returns:
+    A :class:`concurrent.futures.Future` whose result is what
+    :func:`device_get` returns for ``x``.
+
+  Examples:
+    >>> import jax
+    >>> future = jax.device_get_async({'loss': jax.numpy.float32(1.)})
+    >>> future.result()
+    {'loss': array(1., dtype=float32)}
+
+  See Also:
+    - device_get
+  """
+  leaves, treedef = tree_flatten(x)
+  shapes = [np.shape(y) for y in leaves]
+  if coalesce_bytes > 0:
+    leaves, coalesced = _coalesce_leaves(leaves, coalesce_bytes)
+  else:
+    coalesced = []
+  for y in it.chain(leaves, (y for _, y in coalesced)):
+    try:
+      y.copy_to_host_async()
+    except AttributeError:
+      pass
+  future = _get_device_get_executor().submit(
+      _device_get_flat, leaves, coalesced, shapes)
+  result: concurrent.futures.Future = concurrent.futures.Future()
+  def done(f):
+    # Exceptions raised by done callbacks are only logged, so anything that
+    # fails here, including a cancelled transfer, must complete `result`.
+    try:
+      out = tree_unflatten(treedef, f.result())
+    except BaseException as e:
+      result.set_exception(e)
+    else:
+      result.set_result(out)
+  future.add_done_callback(done)
+  return result
+
 def _check_arg(arg):
   if not (isinstance(arg, core.Tracer) or _valid_jaxtype(arg)):
     raise TypeError(f"Argument '{arg}' of type {type(arg)} is not a valid JAX type.")
@@ -3311,6 +3892,38 @@ def named_scope(
   with source_info_util.extend_name_stack(name):
     yield
 
+@contextmanager
+def donate_eagerly(*args):
+  """A context manager that donates arrays to the eager operations using them.
+
+  Outside of :func:`jit`, each operation runs as its own computation, so an
+  operation such as ``x - lr * g`` allocates a new buffer for its result even
+  when ``x`` is never used again. Within ``donate_eagerly(x)``, the buffer of
+  ``x`` is instead donated to the first eagerly applied primitive that takes
+  ``x`` as an argument and has an output of the same shape and dtype, so that
+  XLA may reuse it for that output. The donated array is deleted and must not
+  be used afterwards, just like the donated arguments of ``jit(f,
+  donate_argnums=...)``.
+
+  Only the arrays passed to ``donate_eagerly`` are donated, and nothing is
+  donated on CPU, where donation isn't implemented, nor while
+  ``jax_debug_nans`` or ``jax_debug_infs`` is enabled. Note that a
+  :mod:`jax.numpy` function may apply several primitives to an argument, in
+  which case the argument is donated to the first of them that has a matching
+  output, and later ones fail with a deleted buffer error.
+
+  Args:
+    *args: pytrees whose array leaves the caller won't use again.
+
+  For example:
+
+  >>> def sgd_step(params, grads, lr=0.1):
+  ...   with jax.donate_eagerly(params):
+  ...     return jax.tree_util.tree_map(lambda p, g: p - lr * g, params, grads)
+  """
+  with dispatch.eager_donation(tree_leaves(args)):
+    yield
+
 def effects_barrier():
   """Waits until existing functions have completed any side-effects."""
   dispatch.runtime_tokens.block_until_ready()
@@ -383,6 +383,17 @@ class Config:
             self.jax_default_matmul_precision, self.jax_dynamic_shapes,
             self.jax_numpy_dtype_promotion, self.jax_default_device)
 
+  def _jit_state(self):
+    """Returns a tuple that changes whenever ``_trace_context()`` changes.
+
+    Reads the copies of the configuration values that the C++ JIT keeps in its
+    global and thread-local state, which is much cheaper than reading each
+    value, at the cost of distinguishing some equivalent configurations."""
+    gs = jax_jit.global_state()
+    tls = jax_jit.thread_local_state()
+    return (gs.extra_jit_context, gs.enable_x64, gs.default_device,
+            tls.extra_jit_context, tls.enable_x64, tls.default_device)
+
 class NoDefault: pass
 no_default = NoDefault()
 
@@ -527,6 +538,31 @@ flags.DEFINE_integer(
     help='Set the number of stack frames in JAX tracer error messages.'
 )
 
+flags.DEFINE_integer(
+    'jax_executable_cache_max_entries',
+    int_env('JAX_EXECUTABLE_CACHE_MAX_ENTRIES', 0),
+    help=('The maximum number of entries in each in-memory cache of compiled '
+          'executables, such as the caches of jit, pmap, xmap and pjit and '
+          'of eager primitive dispatch. Zero or a negative value, the '
+          'default, means the caches are unbounded.')
+)
+flags.DEFINE_integer(
+    'jax_executable_cache_max_bytes',
+    int_env('JAX_EXECUTABLE_CACHE_MAX_BYTES', 0),
+    help=('The maximum total size in bytes of the generated code of the '
+          'executables in each in-memory cache of compiled executables. Zero '
+          'or a negative value means no limit.')
+)
+flags.DEFINE_enum(
+    'jax_executable_cache_eviction_policy',
+    os.getenv('JAX_EXECUTABLE_CACHE_EVICTION_POLICY', 'lru'),
+    enum_values=['lru', 'cost'],
+    help=('Which entries in-memory caches of compiled executables evict once '
+          'they are full: "lru" evicts the least recently used entries, and '
+          '"cost" evicts the entries that took the least time to compile per '
+          'byte of executable.')
+)
+
 flags.DEFINE_bool(
     'jax_pprint_use_color',
     bool_env('JAX_PPRINT_USE_COLOR', True),
@@ -637,6 +673,95 @@ log_compiles = config.define_bool_state(
           'option is set, the log level is WARNING; otherwise the level is '
           'DEBUG.'))
 
+lazy_eager = config.define_bool_state(
+    name='jax_lazy_eager',
+    default=False,
+    help=('Enables lazy eager execution. Primitives and `jit`-decorated '
+          'functions called outside of transformations are recorded instead '
+          'of being executed, and the recorded operations that a value '
+          'depends on are compiled and executed as a single XLA computation '
+          'when the value is observed, e.g. when it is converted to a NumPy '
+          'array, printed, used in Python control flow or waited on with '
+          '`block_until_ready`.'))
+
+cache_traced_jaxprs = config.define_bool_state(
+    name='jax_cache_traced_jaxprs',
+    default=False,
+    help=('Caches the jaxprs of functions transformed by JAX that are called '
+          'with abstract values, keyed on the function and the abstract values '
+          'and structure of its arguments. For example `jit(f)`, '
+          '`jit(grad(f))` and `jit(vmap(f))` then trace `f` from Python only '
+          'once and apply `grad` and `vmap` to its jaxpr. Like `jit`, this '
+          'assumes that the function has no Python side effects and that it '
+          'computes the same thing each time it is called.'))
+
+demote_static_scalars = config.define_bool_state(
+    name='jax_demote_static_scalars',
+    default=False,
+    help=('Passes static Python int, float and complex arguments of jit-compiled '
+          'functions as runtime arguments when the function only uses them in '
+          'elementwise operations on arrays, rather than e.g. in Python control '
+          'flow or array shapes, so that a single compiled computation serves '
+          'all of their values. This is checked by tracing the function with '
+          'the argument abstract and comparing its jaxpr with the one traced '
+          'with the argument static, once per function, abstract signature and '
+          'values of the arguments kept static, and the result is logged. '
+          'Functions with donated arguments are not affected. Calls with '
+          'demoted arguments are always dispatched from Python rather than by '
+          'the C++ jit dispatch path, which adds Python overhead to every call, '
+          'so the option pays off when arguments take many values.'))
+
+jaxpr_simplification_passes = config.define_string_state(
+    name='jax_jaxpr_simplification_passes',
+    default=None,
+    help=('Comma-separated list of simplification passes applied, in order, '
+          'to the jaxprs of jit-compiled functions before they are lowered. '
+          'The passes are "inline" (inlines nested jit calls without donation '
+          'or device placement), "forward" (replaces outputs that merely '
+          'forward an input of their equation by that input), "fold" '
+          '(evaluates elementwise operations on scalar literals), "cse" '
+          '(eliminates common subexpressions) and "dce" (eliminates equations '
+          'whose outputs are unused), e.g. "inline,forward,fold,cse,dce". The '
+          'passes don\'t change the results of computations, but can make '
+          'them faster to lower and compile.'))
+
+persistent_cache_fingerprint = config.define_enum_state(
+    name='jax_persistent_cache_fingerprint',
+    enum_values=['hlo', 'jaxpr'],
+    default='hlo',
+    help=('What the persistent compilation cache key of a `jit`-compiled '
+          'computation is computed from. "hlo" hashes the serialized HLO '
+          'module. "jaxpr" hashes the jaxpr, its constants and the relevant '
+          'configuration instead, which is cheaper for large programs and lets '
+          'cache hits skip lowering to HLO entirely. Computations with '
+          'side effects or host callbacks always use "hlo".'))
+
+persistent_jaxpr_cache = config.define_bool_state(
+    name='jax_persistent_jaxpr_cache',
+    default=False,
+    help=('If True, and the persistent compilation cache is initialized, '
+          'top-level calls of `jit`-decorated functions also store the lowered '
+          'computation in the persistent cache, keyed on the function\'s code, '
+          'the values it closes over, its static arguments and the abstract '
+          'values of its arguments. Later processes can then run the function '
+          'without tracing or lowering it again. Functions whose code or '
+          'closed-over values cannot be hashed deterministically are traced '
+          'as usual. Entries are unpickled when read, so the cache directory '
+          'must only be writable by trusted users.'))
+
+pmap_executable_pool = config.define_bool_state(
+    name='jax_pmap_executable_pool',
+    default=False,
+    help=('If True, executables compiled by `pmap` for an explicit set of '
+          '`devices` are reused for other device sets of the same size and '
+          'relative topology, by loading them with the other device '
+          'assignment instead of compiling the computation again. Only '
+          'supported on backends that can serialize executables (TPU), and '
+          'only for single-process computations. The pool of serialized '
+          'executables is bounded by `jax_executable_cache_max_entries` and '
+          '`jax_executable_cache_max_bytes`, which leave it unbounded by '
+          'default.'))
+
 parallel_functions_output_gda = config.define_bool_state(
     name='jax_parallel_functions_output_gda',
     default=False,
@@ -16,6 +16,7 @@
 from __future__ import annotations
 
 import atexit
+import collections
 import contextlib
 from functools import partial
 import itertools
@@ -96,6 +97,22 @@ def arg_spec(x: Any) -> ArgSpec:
 
 def apply_primitive(prim, *args, **params):
   """Impl rule that compiles and runs a single primitive 'prim' using XLA."""
+  if config.jax_lazy_eager:
+    # Avoid import cycle between dispatch and lazy_dispatch
+    from jax._src import lazy_dispatch
+    out = lazy_dispatch.apply_primitive(prim, args, params)
+    if out is not None:
+      return out
+  if _eager_donations.arrays:
+    donated_invars = _eager_donated_invars(prim, args, params)
+    if donated_invars is not None:
+      compiled_fun = _donating_primitive_callable(
+          prim, donated_invars, *unsafe_map(arg_spec, args), **params)
+      return compiled_fun(*args)
+  if prim in fast_path_primitives:
+    compiled_fun = _fast_path_callable(prim, args, params)
+    if compiled_fun is not None:
+      return compiled_fun(*args)
   compiled_fun = xla_primitive_callable(prim, *unsafe_map(arg_spec, args),
                                         **params)
   return compiled_fun(*args)
@@ -103,6 +120,63 @@ def apply_primitive(prim, *args, **params):
 # TODO(phawkins): update code referring to xla.apply_primitive to point here.
 xla.apply_primitive = apply_primitive
 
+### explicit donation of arguments of eager primitives
+
+class _EagerDonationState(threading.local):
+  # Maps the ids of the arrays that the caller has declared dead to the arrays,
+  # which also keeps the ids from being reused while they are registered.
+  # Donation is opt-in on purpose: inferring that an argument is dead from
+  # sys.getrefcount and the caller's frame is not sound (references held by
+  # cells, frame locals snapshots or the interpreter's stack are not
+  # distinguishable from live ones), and a false positive deletes a buffer
+  # that is still in use.
+  arrays: Dict[int, Any]
+
+  def __init__(self):
+    self.arrays = {}
+
+_eager_donations = _EagerDonationState()
+
+@contextlib.contextmanager
+def eager_donation(arrays: Sequence[Any]):
+  """Donates each of `arrays` to the first eagerly applied primitive that
+  takes it as an argument and has an output of the same shape and dtype."""
+  added = [x for x in arrays if type(x) in device_array.device_array_types
+           and id(x) not in _eager_donations.arrays]
+  _eager_donations.arrays.update((id(x), x) for x in added)
+  try:
+    yield
+  finally:
+    for x in added:
+      _eager_donations.arrays.pop(id(x), None)
+
+def _eager_donated_invars(prim, args, params) -> Optional[Tuple[bool, ...]]:
+  """Returns which arguments of an eager primitive to donate, or None."""
+  if config.jax_debug_nans or config.jax_debug_infs:
+    return None
+  donations = _eager_donations.arrays
+  candidates = [
+      i for i, x in enumerate(args)
+      if donations.get(id(x)) is x and not x.device_buffer.is_deleted() and
+      x.device_buffer.device().platform in ("gpu", "tpu") and
+      sum(a is x for a in args) == 1]
+  if not candidates:
+    return None
+  out, effects = prim.abstract_eval(*unsafe_map(xla.abstractify, args), **params)
+  if effects:
+    return None
+  out_avals = out if prim.multiple_results else [out]
+  out_types = collections.Counter((a.shape, a.dtype) for a in out_avals)
+  donated_invars = [False] * len(args)
+  for i in candidates:
+    aval = args[i].aval
+    if out_types[(aval.shape, aval.dtype)] > 0:
+      out_types[(aval.shape, aval.dtype)] -= 1
+      donated_invars[i] = True
+      # The buffer is gone once the primitive runs.
+      del donations[id(args[i])]
+  return tuple(donated_invars) if any(donated_invars) else None
+
 RuntimeToken = Any
 
 class RuntimeTokenSet(threading.local):
@@ -146,14 +220,28 @@ class RuntimeTokenSet(threading.local):
 
 runtime_tokens: RuntimeTokenSet = RuntimeTokenSet()
 
+# While compiles are recorded to a manifest, called by jit, pmap and pjit after
+# each call that may have compiled, i.e. that missed the C++ dispatch cache if
+# there is one, with the kind of call, the function, its arguments, and its
+# static argument numbers and names. See
+# jax.experimental.compilation_cache.warmup.
+compile_recorder: Optional[Callable[..., None]] = None
+
 @atexit.register
 def wait_for_tokens():
   runtime_tokens.block_until_ready()
 
-@util.cache()
+@util.cache(executable_cache=True)
 def xla_primitive_callable(prim, *arg_specs: ArgSpec, **params):
+  return _primitive_callable(prim, (False,) * len(arg_specs), arg_specs, params)
+
+@util.cache(executable_cache=True)
+def _donating_primitive_callable(prim, donated_invars: Tuple[bool, ...],
+                                 *arg_specs: ArgSpec, **params):
+  return _primitive_callable(prim, donated_invars, arg_specs, params)
+
+def _primitive_callable(prim, donated_invars, arg_specs, params):
   avals, arg_devices = util.unzip2(arg_specs)
-  donated_invars = (False,) * len(arg_specs)
   device = _device_from_arg_devices(arg_devices)
   def prim_fun(*args):
     out = prim.bind(*args, **params)
@@ -164,11 +252,49 @@ def xla_primitive_callable(prim, *arg_specs: ArgSpec, **params):
   compiled = _xla_callable_uncached(lu.wrap_init(prim_fun), device, None,
                                     prim.name, donated_invars, False, *arg_specs)
   if not prim.multiple_results:
-    return lambda *args, **kw: compiled(*args, **kw)[0]
+    call = lambda *args, **kw: compiled(*args, **kw)[0]
+    call.xla_executable = compiled.xla_executable  # type: ignore
+    return call
   else:
     return compiled
 
 
+# Primitives, e.g. elementwise ops, that are dispatched through a flat dict
+# keyed on the primitive, its parameters and the avals and devices of its
+# DeviceArray arguments. A hit skips computing the trace context and the
+# argument specs. Other calls fall back to xla_primitive_callable.
+fast_path_primitives: Set[core.Primitive] = set()
+_fast_path_cache: Dict[Any, Callable] = {}
+_fast_path_arg_types = frozenset(device_array.device_array_types)
+
+def _fast_path_callable(prim, args, params) -> Optional[Callable]:
+  if not all(type(x) in _fast_path_arg_types for x in args):
+    return None
+  key = (prim, config._jit_state(), tuple(params.items()),
+         *[(x.aval, x._device) for x in args])
+  try:
+    compiled_fun = _fast_path_cache.get(key)
+  except TypeError:  # unhashable parameters
+    return None
+  if compiled_fun is None:
+    compiled_fun = xla_primitive_callable(prim, *unsafe_map(arg_spec, args),
+                                          **params)
+    if config.jax_check_tracer_leaks:
+      return compiled_fun
+    max_entries = util.ExecutableCache.max_entries()
+    if max_entries is not None and len(_fast_path_cache) >= max_entries:
+      _fast_path_cache.clear()
+    _fast_path_cache[key] = compiled_fun
+  return compiled_fun
+
+def _clear_primitive_caches():
+  _clear_xla_primitive_callable()
+  _fast_path_cache.clear()
+
+_clear_xla_primitive_callable = xla_primitive_callable.cache_clear
+xla_primitive_callable.cache_clear = _clear_primitive_caches  # type: ignore
+
+
 def _device_from_arg_devices(devices: Sequence[Optional[Device]]) -> Optional[Device]:
   """Given devices of inputs, determine where to perform a computation.
 
@@ -192,6 +318,14 @@ def _device_from_arg_devices(devices: Sequence[Optional[Device]]) -> Optional[De
 def _xla_call_impl(fun: lu.WrappedFun, *args, device, backend, name,
                    donated_invars, inline, keep_unused: bool):
   del inline  # Only used at tracing time
+  if config.jax_lazy_eager:
+    # Avoid import cycle between dispatch and lazy_dispatch
+    from jax._src import lazy_dispatch
+    out = lazy_dispatch.xla_call(fun, args, device=device, backend=backend,
+                                 donated_invars=donated_invars,
+                                 keep_unused=keep_unused)
+    if out is not None:
+      return out
   arg_specs = unsafe_map(arg_spec, args)
   compiled_fun = xla_callable(fun, device, backend, name, donated_invars,
                               keep_unused, *arg_specs)
@@ -245,7 +379,7 @@ def _xla_callable_uncached(fun: lu.WrappedFun, device, backend, name,
   return lower_xla_callable(fun, device, backend, name, donated_invars, False,
                             keep_unused, *arg_specs).compile().unsafe_call
 
-xla_callable = lu.cache(_xla_callable_uncached)
+xla_callable = lu.cache(_xla_callable_uncached, executable_cache=True)
 
 
 @contextlib.contextmanager
@@ -303,30 +437,37 @@ def lower_xla_callable(fun: lu.WrappedFun, device, backend, name,
               weak_type=expected_type.weak_type)
           assert core.typematch(expected_aval, aval)
   with log_elapsed_time(f"Finished tracing + transforming {fun.__name__} "
-                        "for jit in {elapsed_time} sec"):
+                        "for jit in {elapsed_time} sec"), \
+       profiler.compile_event("trace", fun.__name__) as trace_event:
     jaxpr, out_type, consts = pe.trace_to_jaxpr_final2(
         fun, pe.debug_info_final(fun, "jit"))
+  if trace_event is not None:
+    trace_event["eqns_by_source"] = profiler.eqn_source_counts(jaxpr)
   out_avals, kept_outputs = util.unzip2(out_type)
   if any(isinstance(c, core.Tracer) for c in consts):
     raise UnexpectedTracerError("Encountered an unexpected tracer.")
 
-  if config.jax_dynamic_shapes:
-    keep_unused = True
-    has_outfeed = False
-  else:
-    has_outfeed = core.jaxpr_uses_outfeed(jaxpr)
-    jaxpr = apply_outfeed_rewriter(jaxpr)
-
-  if not keep_unused:
-    jaxpr, kept_const_idx, kept_var_idx = _prune_unused_inputs(jaxpr)
-    consts = [c for i, c in enumerate(consts) if i in kept_const_idx]
-    abstract_args, arg_devices = util.unzip2(
-        [a for i, a in enumerate(arg_specs) if i in kept_var_idx])
-    donated_invars = [x for i, x in enumerate(donated_invars)
-                      if i in kept_var_idx]
-    del kept_const_idx
-  else:
-    kept_var_idx = set(range(len(abstract_args)))
+  with profiler.compile_event("simplify", fun.__name__) as simplify_event:
+    if config.jax_dynamic_shapes:
+      keep_unused = True
+      has_outfeed = False
+    else:
+      if config.jax_jaxpr_simplification_passes:
+        jaxpr, consts = _simplify_jaxpr(jaxpr, consts, fun.__name__,
+                                        simplify_event)
+      has_outfeed = core.jaxpr_uses_outfeed(jaxpr)
+      jaxpr = apply_outfeed_rewriter(jaxpr)
+
+    if not keep_unused:
+      jaxpr, kept_const_idx, kept_var_idx = _prune_unused_inputs(jaxpr)
+      consts = [c for i, c in enumerate(consts) if i in kept_const_idx]
+      abstract_args, arg_devices = util.unzip2(
+          [a for i, a in enumerate(arg_specs) if i in kept_var_idx])
+      donated_invars = [x for i, x in enumerate(donated_invars)
+                        if i in kept_var_idx]
+      del kept_const_idx
+    else:
+      kept_var_idx = set(range(len(abstract_args)))
 
   nreps = jaxpr_replicas(jaxpr)
   device = _xla_callable_device(nreps, backend, device, arg_devices)
@@ -386,10 +527,30 @@ def lower_xla_callable(fun: lu.WrappedFun, device, backend, name,
                        if eff not in core.ordered_effects]
   ordered_effects = [eff for eff in closed_jaxpr.effects
                      if eff in core.ordered_effects]
-  module, keepalive = mlir.lower_jaxpr_to_module(
-      module_name, closed_jaxpr, unordered_effects, ordered_effects,
-      backend.platform, mlir.ReplicaAxisContext(axis_env), name_stack,
-      donated_invars)
+  lower = partial(
+      mlir.lower_jaxpr_to_module, module_name, closed_jaxpr,
+      unordered_effects, ordered_effects, backend.platform,
+      mlir.ReplicaAxisContext(axis_env), name_stack, donated_invars)
+
+  # Avoid import cycle between jax and jax.experimental
+  from jax.experimental.compilation_cache import compilation_cache as cc
+  # Without side effects there are no host callbacks whose keepalives would
+  # need to outlive lowering, so the jaxpr can stand in for the lowered module
+  # in the persistent cache key and lowering can wait until a cache miss.
+  if (config.jax_persistent_cache_fingerprint == 'jaxpr' and
+      _use_persistent_cache(backend) and
+      not (closed_jaxpr.effects or has_outfeed or config.jax_dynamic_shapes)):
+    fingerprint = cc.get_jaxpr_fingerprint(
+        module_name, closed_jaxpr, donated_invars, backend.platform)
+    return XlaComputation(
+        name, None, False, donated_invars, fun.in_type, out_type,
+        lower_fn=lower, nreps=nreps, device=device, backend=backend,
+        tuple_args=tuple_args, in_avals=abstract_args, out_avals=out_avals,
+        has_unordered_effects=False, ordered_effects=[],
+        kept_var_idx=kept_var_idx, keepalive=None,
+        cache_fingerprint=fingerprint)
+
+  module, keepalive = lower()
   return XlaComputation(
       name, module, False, donated_invars, fun.in_type, out_type, nreps=nreps,
       device=device, backend=backend, tuple_args=tuple_args,
@@ -437,6 +598,23 @@ def jaxpr_has_bints(jaxpr: core.Jaxpr) -> bool:
               for e in j.eqns for v in itertools.chain(e.invars, e.outvars)
               if type(v.aval) is core.DShapedArray for d in v.aval.shape))
 
+def _simplify_jaxpr(jaxpr: core.Jaxpr, consts: Sequence[Any], name: str,
+                    event: Optional[Dict[str, Any]]
+                    ) -> Tuple[core.Jaxpr, List[Any]]:
+  passes = [p.strip() for p in config.jax_jaxpr_simplification_passes.split(',')
+            if p.strip()]
+  closed_jaxpr, eqns_removed = pe.simplify_jaxpr(
+      core.ClosedJaxpr(jaxpr, consts), passes)
+  if not _on_exit:
+    log_priority = logging.WARNING if config.jax_log_compiles else logging.DEBUG
+    logging.log(log_priority, "Simplifying the jaxpr of %s removed %d "
+                "equations: %s", name, sum(eqns_removed.values()),
+                eqns_removed)
+  if event is not None:
+    event["eqns_removed"] = eqns_removed
+  return closed_jaxpr.jaxpr, list(closed_jaxpr.consts)
+
+
 def _prune_unused_inputs(
     jaxpr: core.Jaxpr) -> Tuple[core.Jaxpr, Set[int], Set[int]]:
   used = {v for v in jaxpr.outvars if isinstance(v, core.Var)}
@@ -788,9 +966,11 @@ class XlaComputation(stages.XlaLowering):
                donated_invars: Optional[Sequence[bool]],
                in_type: Optional[pe.InputType],
                out_type: Optional[pe.OutputType],
+               lower_fn: Optional[Callable[[], Tuple[ir.Module, Any]]] = None,
                **compile_args):
     self.name = name
     self._hlo = hlo
+    self._lower_fn = lower_fn
     self._is_trivial = is_trivial
     self._donated_invars = donated_invars
     self._in_type = in_type
@@ -801,25 +981,34 @@ class XlaComputation(stages.XlaLowering):
   def is_trivial(self):
     return self._is_trivial
 
+  def _lowered_hlo(self):
+    if self._lower_fn is not None:
+      self._hlo, keepalive = self._lower_fn()
+      self._lower_fn = None
+      assert not keepalive, "lazily lowered computations can't have keepalives"
+    return self._hlo
+
   # -- stages.XlaLowering overrides
 
   def hlo(self) -> xc.XlaComputation:
     if self.is_trivial():
       raise ValueError("A trivial computation has no HLO")
-    if isinstance(self._hlo, xc.XlaComputation):
-      return self._hlo
+    hlo = self._lowered_hlo()
+    if isinstance(hlo, xc.XlaComputation):
+      return hlo
     return xe.mlir.mlir_module_to_xla_computation(
-        mlir.module_to_string(self._hlo),
+        mlir.module_to_string(hlo),
         use_tuple_args=self.compile_args["tuple_args"])
 
   def mhlo(self) -> ir.Module:
     if self.is_trivial():
       raise ValueError("A trivial computation has no MHLO")
-    if isinstance(self._hlo, xc.XlaComputation):
-      module_str = xe.mlir.xla_computation_to_mlir_module(self._hlo)
+    hlo = self._lowered_hlo()
+    if isinstance(hlo, xc.XlaComputation):
+      module_str = xe.mlir.xla_computation_to_mlir_module(hlo)
       with mlir.make_ir_context():
         return ir.Module.parse(module_str)
-    return self._hlo
+    return hlo
 
   def compile(self) -> XlaCompiledComputation:
     if self._executable is None:
@@ -827,8 +1016,10 @@ class XlaComputation(stages.XlaLowering):
         self._executable = XlaCompiledComputation.from_trivial_jaxpr(
             **self.compile_args)
       else:
+        # If lowering was deferred, only lower on a persistent cache miss.
+        hlo = self._hlo if self._lower_fn is None else self._lowered_hlo
         self._executable = XlaCompiledComputation.from_xla_computation(
-            self.name, self._hlo, self._in_type, self._out_type,
+            self.name, hlo, self._in_type, self._out_type,
             **self.compile_args)
 
     return self._executable
@@ -837,7 +1028,14 @@ class XlaComputation(stages.XlaLowering):
 def backend_compile(backend, built_c, options):
   # we use a separate function call to ensure that XLA compilation appears
   # separately in Python profiling results
-  return backend.compile(built_c, compile_options=options)
+  if isinstance(built_c, ir.Module):
+    name = ir.StringAttr(built_c.operation.attributes['sym_name']).value
+  elif isinstance(built_c, xc.XlaComputation):
+    name = built_c.name()
+  else:
+    name = "computation"
+  with profiler.compile_event("compile", name):
+    return backend.compile(built_c, compile_options=options)
 
 # TODO(phawkins): update users.
 xla.backend_compile = backend_compile
@@ -854,9 +1052,41 @@ def _dump_ir_to_file(name: str, ir: str):
   name.write_text(ir)
 
 
-def compile_or_get_cached(backend, computation, compile_options):
+def _use_persistent_cache(backend) -> bool:
+  """Whether compilations for `backend` go through the persistent cache."""
   # Avoid import cycle between jax and jax.experimental
   from jax.experimental.compilation_cache import compilation_cache as cc
+  # Persistent compilation cache only implemented on TPU.
+  # TODO(skye): add warning when initializing cache on unsupported default platform
+  return cc.is_initialized() and backend.platform == 'tpu'
+
+def compile_or_get_cached(backend, computation, compile_options,
+                          cache_fingerprint: Optional[bytes] = None,
+                          name: Optional[str] = None):
+  """Compiles `computation`, or loads it from the persistent cache.
+
+  If `cache_fingerprint` is given (see `compilation_cache.get_jaxpr_fingerprint`)
+  it is used for the persistent cache key instead of `computation`, and
+  `computation` may be a callable that returns the computation to compile,
+  which is only called on a cache miss. `name` is used for logging until the
+  computation is available.
+  """
+  # Avoid import cycle between jax and jax.experimental
+  from jax.experimental.compilation_cache import compilation_cache as cc
+
+  use_persistent_cache = _use_persistent_cache(backend)
+  cache_key = None
+  if use_persistent_cache and cache_fingerprint is not None:
+    cache_key = cc.get_cache_key(None, compile_options, backend,
+                                 fingerprint=cache_fingerprint)
+    with profiler.compile_event("cache_lookup", str(name)):
+      cached_executable = cc.get_executable(None, compile_options, backend,
+                                            cache_key=cache_key)
+    if cached_executable is not None:
+      logging.info('Persistent compilation cache hit for %s.', name)
+      return cached_executable
+  if callable(computation):
+    computation = computation()
 
   if isinstance(computation, ir.Module):
     sym_name = computation.operation.attributes['sym_name']
@@ -869,18 +1099,23 @@ def compile_or_get_cached(backend, computation, compile_options):
   else:
     module_name = computation.name()
 
-  # Persistent compilation cache only implemented on TPU.
-  # TODO(skye): add warning when initializing cache on unsupported default platform
-  if cc.is_initialized() and backend.platform == 'tpu':
-    cached_executable = cc.get_executable(computation, compile_options, backend)
-    if cached_executable is not None:
-      logging.info('Persistent compilation cache hit for %s.', module_name)
-      return cached_executable
-    else:
-      compiled = backend_compile(backend, computation, compile_options)
-      cc.put_executable(module_name, computation, compile_options, compiled,
-                        backend)
-      return compiled
+  if use_persistent_cache:
+    if cache_key is None:
+      # Computed once, and shared by the lookup and the write below.
+      cache_key = cc.get_cache_key(computation, compile_options, backend)
+      with profiler.compile_event("cache_lookup", module_name):
+        cached_executable = cc.get_executable(computation, compile_options,
+                                              backend, cache_key=cache_key)
+      if cached_executable is not None:
+        logging.info('Persistent compilation cache hit for %s.', module_name)
+        return cached_executable
+    start_time = time.time()
+    compiled = backend_compile(backend, computation, compile_options)
+    compile_time = time.time() - start_time
+    cc.put_executable(module_name, computation, compile_options, compiled,
+                      backend, compile_time_secs=compile_time,
+                      cache_key=cache_key)
+    return compiled
 
   if FLAGS.jax_dump_ir_to:
     if isinstance(computation, xc.XlaComputation):
@@ -902,13 +1137,15 @@ class XlaCompiledComputation(stages.XlaExecutable):
     self._kept_var_idx = kept_var_idx
     self.unsafe_call = unsafe_call
     # Only the `unsafe_call` function is cached, so to avoid the `keepalive`
-    # being garbage collected we attach it to `unsafe_call`.
+    # being garbage collected we attach it to `unsafe_call`. The executable is
+    # attached too, so that caches can account for its size.
     self.unsafe_call.keepalive = keepalive
+    self.unsafe_call.xla_executable = xla_executable
 
   @staticmethod
   def from_xla_computation(
       name: str,
-      xla_computation: Optional[ir.Module],
+      xla_computation: Union[ir.Module, Callable[[], ir.Module], None],
       in_type: Optional[pe.InputType],
       out_type: Optional[pe.OutputType],
       nreps: int,
@@ -920,7 +1157,8 @@ class XlaCompiledComputation(stages.XlaExecutable):
       has_unordered_effects: bool,
       ordered_effects: List[core.Effect],
       kept_var_idx: Set[int],
-      keepalive: Optional[Any]) -> XlaCompiledComputation:
+      keepalive: Optional[Any],
+      cache_fingerprint: Optional[bytes] = None) -> XlaCompiledComputation:
     sticky_device = device
     input_handler = _input_handler(backend, in_type, out_type)
     result_handler = _result_handler(backend, sticky_device, out_type)
@@ -930,7 +1168,9 @@ class XlaCompiledComputation(stages.XlaExecutable):
     options.parameter_is_tupled_arguments = tuple_args
     with log_elapsed_time(f"Finished XLA compilation of {name} "
                           "in {elapsed_time} sec"):
-      compiled = compile_or_get_cached(backend, xla_computation, options)
+      compiled = compile_or_get_cached(backend, xla_computation, options,
+                                       cache_fingerprint=cache_fingerprint,
+                                       name=name)
     buffer_counts = [aval_to_num_buffers(aval) for aval in out_avals]
     if ordered_effects or has_unordered_effects:
       num_output_tokens = len(ordered_effects) + has_unordered_effects
@@ -30,6 +30,7 @@ from jax._src import ad_util
 from jax._src import api
 from jax._src import api_util
 from jax._src import device_array
+from jax._src import dispatch
 from jax import linear_util as lu
 from jax._src import dtypes
 from jax import tree_util
@@ -1399,6 +1400,7 @@ def unop(result_dtype, accepted_dtypes, name):
                             weak_type_rule=weak_type_rule)
   batching.defvectorized(prim)
   masking.defvectorized(prim)
+  dispatch.fast_path_primitives.add(prim)
   return prim
 standard_unop = partial(unop, _identity)
 _attrgetter = lambda name: lambda x, **kwargs: getattr(x, name)
@@ -1469,6 +1471,7 @@ def naryop(result_dtype, accepted_dtypes, name):
                             weak_type_rule=weak_type_rule)
   batching.defbroadcasting(prim)
   masking.defnaryop(prim)
+  dispatch.fast_path_primitives.add(prim)
   return prim
 standard_naryop = partial(naryop, _input_dtype)
 
@@ -2172,6 +2175,15 @@ lt_p = naryop(_fixed_dtype(np.bool_), [_ordered, _ordered], 'lt')
 ad.defjvp_zero(lt_p)
 mlir.register_lowering(lt_p, partial(_compare_lower_mhlo, "LT"))
 
+for _prim, _fold_rule in [
+    (neg_p, np.negative), (add_p, np.add), (sub_p, np.subtract),
+    (mul_p, np.multiply), (not_p, np.invert), (and_p, np.bitwise_and),
+    (or_p, np.bitwise_or), (xor_p, np.bitwise_xor), (eq_p, np.equal),
+    (ne_p, np.not_equal), (ge_p, np.greater_equal), (gt_p, np.greater),
+    (le_p, np.less_equal), (lt_p, np.less)]:
+  pe.literal_fold_rules[_prim] = _fold_rule
+del _prim, _fold_rule
+
 
 def _convert_element_type_shape_rule(operand, *, new_dtype, weak_type):
   return operand.shape
@@ -2251,6 +2263,7 @@ ad.defjvp(convert_element_type_p, _convert_element_type_jvp_rule)
 ad.primitive_transposes[convert_element_type_p] = _convert_element_type_transpose_rule
 batching.defvectorized(convert_element_type_p)
 masking.defvectorized(convert_element_type_p)
+dispatch.fast_path_primitives.add(convert_element_type_p)
 pe.const_fold_rules[convert_element_type_p] = _convert_elt_type_folding_rule
 pe.forwarding_rules[convert_element_type_p] = _convert_elt_type_fwd_rule
 # TODO(mattjj): un-comment the next line (see #9456)
@@ -4080,6 +4093,7 @@ infeed_p = Primitive("infeed")
 infeed_p.multiple_results = True
 infeed_p.def_impl(partial(xla.apply_primitive, infeed_p))
 infeed_p.def_abstract_eval(_infeed_abstract_eval)
+pe.cse_exempt_primitives.add(infeed_p)
 
 
 def _infeed_lowering(ctx, token, *, shapes, partitions):
@@ -4173,6 +4187,7 @@ def _rng_uniform_abstract_eval(a, b, *, shape):
 rng_uniform_p = Primitive("rng_uniform")
 rng_uniform_p.def_impl(partial(xla.apply_primitive, rng_uniform_p))
 rng_uniform_p.def_abstract_eval(_rng_uniform_abstract_eval)
+pe.cse_exempt_primitives.add(rng_uniform_p)
 
 def _rng_uniform_lowering(ctx, a, b, *, shape):
   aval_out, = ctx.avals_out
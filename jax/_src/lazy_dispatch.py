@@ -0,0 +1,363 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lazy eager execution, enabled by the `jax_lazy_eager` option.
+#
+# Outside of transformations, primitives and jit-decorated functions return
+# `_LazyDeviceArray`s that record the operation producing them instead of
+# executing it. When a lazy array is observed, every pending operation it
+# depends on is replayed into a single function, which is compiled, cached by
+# the structure of the recorded graph, and executed. Every pending array that
+# is still alive is materialized by that execution, so that it isn't
+# recomputed later.
+#
+# Pending operations refer to the operations producing their inputs rather
+# than to the lazy arrays, so intermediate arrays that are no longer
+# referenced aren't materialized.
+
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+import weakref
+
+from jax import core
+from jax import linear_util as lu
+from jax.interpreters import mlir
+from jax.interpreters import partial_eval as pe
+from jax.interpreters import pxla
+from jax.interpreters import xla
+from jax._src import abstract_arrays
+from jax._src import ad_util
+from jax._src import device_array
+from jax._src import dispatch
+from jax._src.config import config, lazy_eager
+from jax._src.lax import lax as lax_internal
+from jax._src.numpy import lax_numpy
+from jax._src import util
+
+# Recording an operation that would make a graph of more pending operations
+# than this first executes the graphs of its inputs, which bounds the size of
+# the computations compiled when a value is observed.
+_MAX_PENDING_EQNS = 1000
+
+
+class _PendingEqn:
+  __slots__ = ["prim", "params", "args", "outs", "results", "num_eqns"]
+
+  def __init__(self, prim, params, args, num_outs, num_eqns):
+    # For `xla.xla_call_p`, `params` is `(jaxpr, num_consts)`; otherwise it is
+    # the tuple of items of the primitive's parameters.
+    self.prim = prim
+    self.params = params
+    # `_Ref`s to outputs of pending operations, or concrete values.
+    self.args = args
+    # Weak references to the lazy arrays holding the outputs.
+    self.outs: List[Any] = [None] * num_outs
+    # The outputs that have been materialized.
+    self.results: List[Any] = [None] * num_outs
+    # An upper bound on the number of pending operations in the graph.
+    self.num_eqns = num_eqns
+
+
+class _Ref(NamedTuple):
+  eqn: _PendingEqn
+  out_index: int
+
+
+class _LazyDeviceArray(device_array.DeviceArray):  # type: ignore
+  """A DeviceArray whose value is computed when it is first observed."""
+  __slots__ = ["aval", "_device", "_eqn", "_index", "_array", "__weakref__"]
+  __array_priority__ = 100
+
+  # Methods are populated dynamically, as for DeviceArray.
+  _HAS_DYNAMIC_ATTRIBUTES = True
+
+  def __init__(self, aval: core.ShapedArray, device, eqn: _PendingEqn,
+               index: int):
+    device_array.DeviceArray.__init__(self)
+    self.aval = aval
+    self._device = device
+    self._eqn: Optional[_PendingEqn] = eqn
+    self._index = index
+    self._array = None
+
+  def _force(self):
+    """Returns the DeviceArray holding the value, computing it if necessary."""
+    if self._array is None:
+      with _lock:
+        if self._array is None:
+          _execute(self._eqn)
+    return self._array
+
+  @property
+  def device_buffer(self):
+    return self._force().device_buffer
+
+  @property
+  def _value(self):
+    return self._force()._value
+
+  @property
+  def shape(self):
+    return self.aval.shape
+
+  @property
+  def dtype(self):
+    return self.aval.dtype
+
+  @property
+  def size(self):
+    return util.prod(self.aval.shape)
+
+  @property
+  def ndim(self):
+    return len(self.aval.shape)
+
+  def block_until_ready(self):
+    self._force().block_until_ready()
+    return self
+
+  def device(self):
+    return self._force().device()
+
+  def copy_to_host_async(self):
+    self._force().copy_to_host_async()
+
+  def delete(self):
+    self._force().delete()
+
+  @property
+  def __cuda_array_interface__(self):
+    return self._force().__cuda_array_interface__
+
+
+_lock = threading.RLock()
+_fused_cache = util.ExecutableCache()
+
+
+def _arg_device(x):
+  try:
+    return x._device
+  except AttributeError:
+    return None
+
+
+def _record(prim, params, args, out_avals) -> List[_LazyDeviceArray]:
+  device = dispatch._device_from_arg_devices([_arg_device(x) for x in args])
+  refs = []
+  num_eqns = 1
+  for x in args:
+    if type(x) is _LazyDeviceArray:
+      if x._array is None:
+        assert x._eqn is not None
+        num_eqns += x._eqn.num_eqns
+        refs.append(_Ref(x._eqn, x._index))
+      else:
+        refs.append(x._array)
+    else:
+      refs.append(x)
+  if num_eqns > _MAX_PENDING_EQNS:
+    refs = [_materialize(r) for r in refs]
+    num_eqns = 1
+  eqn = _PendingEqn(prim, params, refs, len(out_avals), num_eqns)
+  outs = []
+  for i, aval in enumerate(out_avals):
+    out = _LazyDeviceArray(core.raise_to_shaped(aval), device, eqn, i)
+    eqn.outs[i] = weakref.ref(out)
+    outs.append(out)
+  return outs
+
+
+def _materialize(ref):
+  if type(ref) is not _Ref:
+    return ref
+  if ref.eqn.results[ref.out_index] is None:
+    with _lock:
+      if ref.eqn.results[ref.out_index] is None:
+        _execute(ref.eqn, ref.out_index)
+  return ref.eqn.results[ref.out_index]
+
+
+def _abstractify_args(args) -> Optional[List[core.ShapedArray]]:
+  avals = []
+  for x in args:
+    try:
+      aval = xla.abstractify(x)
+    except TypeError:
+      return None
+    if type(aval) is not core.ShapedArray:
+      return None
+    avals.append(aval)
+  return avals
+
+
+def apply_primitive(prim, args, params) -> Optional[Any]:
+  """Records a primitive application, or returns None if it must run now."""
+  try:
+    params_key = tuple(params.items())
+    hash(params_key)
+  except TypeError:
+    return None
+  in_avals = _abstractify_args(args)
+  if in_avals is None:
+    return None
+  out, effects = prim.abstract_eval(*in_avals, **params)
+  if effects:
+    return None
+  outs = _record(prim, params_key, args,
+                 out if prim.multiple_results else [out])
+  return outs if prim.multiple_results else outs[0]
+
+
+def _trace_call_uncached(fun: lu.WrappedFun, *in_avals):
+  jaxpr, out_avals, consts = pe.trace_to_jaxpr_final(fun, in_avals)
+  return jaxpr, out_avals, consts
+
+_trace_call = lu.cache(_trace_call_uncached)
+
+
+def xla_call(fun: lu.WrappedFun, args, *, device, backend, donated_invars,
+             keep_unused) -> Optional[List[Any]]:
+  """Records a call of a jit-decorated function, or returns None if it must
+  run now."""
+  del keep_unused  # Unused inputs are pruned when the graph is compiled.
+  if (device is not None or backend is not None or any(donated_invars) or
+      config.jax_dynamic_shapes or config.jax_debug_nans or
+      config.jax_debug_infs):
+    return None
+  in_avals = _abstractify_args(args)
+  if in_avals is None:
+    return None
+  jaxpr, out_avals, consts = _trace_call(fun, *in_avals)
+  if jaxpr.effects:
+    # `fun` has been traced, so it can't be compiled by the caller anymore.
+    return core.eval_jaxpr(jaxpr, consts, *args)
+  return _record(xla.xla_call_p, (jaxpr, len(consts)), [*consts, *args],
+                 out_avals)
+
+
+def _bind(prim, params, args):
+  if prim is xla.xla_call_p:
+    jaxpr, num_consts = params
+    return core.eval_jaxpr(jaxpr, args[:num_consts], *args[num_consts:])
+  out = prim.bind(*args, **dict(params))
+  return out if prim.multiple_results else [out]
+
+
+def _toposort(root: _PendingEqn) -> List[_PendingEqn]:
+  order: List[_PendingEqn] = []
+  visited = {id(root)}
+  stack = [(root, iter(root.args))]
+  while stack:
+    eqn, args = stack[-1]
+    for arg in args:
+      if (type(arg) is _Ref and arg.eqn.results[arg.out_index] is None and
+          id(arg.eqn) not in visited):
+        visited.add(id(arg.eqn))
+        stack.append((arg.eqn, iter(arg.eqn.args)))
+        break
+    else:
+      stack.pop()
+      order.append(eqn)
+  return order
+
+
+def _execute(root: _PendingEqn, root_index: Optional[int] = None) -> None:
+  """Compiles and runs the graph of pending operations that `root` depends on.
+
+  Materializes the outputs of `root` and every output of the graph that is
+  held by a live lazy array.
+  """
+  eqns = _toposort(root)
+  eqn_numbers = {id(eqn): n for n, eqn in enumerate(eqns)}
+  consts: List[Any] = []
+  const_numbers: Dict[int, int] = {}
+  rules = []
+  outs = []
+  for n, eqn in enumerate(eqns):
+    encoded_args: List[Union[int, Tuple[int, int]]] = []
+    for arg in eqn.args:
+      if type(arg) is _Ref:
+        if arg.eqn.results[arg.out_index] is None:
+          encoded_args.append((eqn_numbers[id(arg.eqn)], arg.out_index))
+          continue
+        arg = arg.eqn.results[arg.out_index]
+      const_number = const_numbers.get(id(arg))
+      if const_number is None:
+        const_number = const_numbers[id(arg)] = len(consts)
+        consts.append(arg)
+      encoded_args.append(const_number)
+    rules.append((eqn.prim, eqn.params, tuple(encoded_args)))
+    for i, out_ref in enumerate(eqn.outs):
+      if eqn.results[i] is None and (
+          out_ref() is not None or (eqn is root and i == root_index)):
+        outs.append((n, i))
+  arg_specs = tuple(map(dispatch.arg_spec, consts))
+  key = (config._jit_state(), tuple(rules), arg_specs, tuple(outs))
+  compiled = _fused_cache.get(key)
+  if compiled is None:
+    start_time = time.perf_counter()
+    compiled = _compile(rules, outs, arg_specs)
+    _fused_cache.put(key, compiled, time.perf_counter() - start_time)
+  results = compiled(*consts)
+  for (n, i), result in zip(outs, results):
+    eqn = eqns[n]
+    eqn.results[i] = result
+    out = eqn.outs[i]()
+    if out is not None:
+      out._array = result
+      out._eqn = None
+
+
+def _compile(rules, outs, arg_specs):
+  def fused(*consts):
+    env = []
+    for prim, params, encoded_args in rules:
+      args = [consts[a] if type(a) is int else env[a[0]][a[1]]
+              for a in encoded_args]
+      env.append(_bind(prim, params, args))
+    return [env[n][i] for n, i in outs]
+
+  device = dispatch._device_from_arg_devices([d for _, d in arg_specs])
+  with lazy_eager(False):
+    return dispatch._xla_callable_uncached(
+        lu.wrap_init(fused), device, None, "lazy_eager",
+        (False,) * len(arg_specs), False, *arg_specs)
+
+
+def _force(x: _LazyDeviceArray):
+  return x._force()
+
+def _device_put_lazy_array(x, device):
+  return dispatch.device_put(_force(x), device)
+
+def _shard_lazy_array(x, devices, indices):
+  x = _force(x)
+  return pxla.shard_arg_handlers[type(x)](x, devices, indices)
+
+def _lazy_array_constant_handler(val, canonicalize_types):
+  return mlir.ir_constants(_force(val), canonicalize_types)
+
+core.pytype_aval_mappings[_LazyDeviceArray] = (
+    lambda x: abstract_arrays.canonical_concrete_aval(_force(x),
+                                                      x.aval.weak_type))
+core.literalable_types.add(_LazyDeviceArray)
+xla.pytype_aval_mappings[_LazyDeviceArray] = lambda x: x.aval
+xla.canonicalize_dtype_handlers[_LazyDeviceArray] = lambda x: x
+dispatch.device_put_handlers[_LazyDeviceArray] = _device_put_lazy_array
+pxla.shard_arg_handlers[_LazyDeviceArray] = _shard_lazy_array
+mlir.register_constant_handler(_LazyDeviceArray, _lazy_array_constant_handler)
+ad_util.jaxval_adders[_LazyDeviceArray] = lax_internal.add
+ad_util.jaxval_zeros_likers[_LazyDeviceArray] = lax_internal.zeros_like_array
+lax_numpy._set_device_array_attributes(_LazyDeviceArray)
@@ -22,7 +22,7 @@ import warnings
 from typing import Optional, Tuple
 
 __all__ = [
-  'cuda_linalg', 'cuda_prng', 'cusolver', 'gpu_linalg', 'gpu_prng',
+  'cpu_sparse', 'cuda_linalg', 'cuda_prng', 'cusolver', 'gpu_linalg', 'gpu_prng',
   'gpu_sparse', 'hip_linalg', 'hip_prng',
   'hipsolver','jaxlib', 'lapack', 'pocketfft', 'pytree',
    'tpu_driver_client', 'version', 'xla_client', 'xla_extension',
@@ -146,6 +146,12 @@ try:
 except ImportError:
   gpu_sparse = None
 
+# cpu_sparse is absent from jaxlib versions older than the jax version.
+try:
+  import jaxlib.cpu_sparse as cpu_sparse  # pytype: disable=import-error
+except ImportError:
+  cpu_sparse = None
+
 sparse_apis = cusparse or hipsparse or None
 solver_apis = cusolver or hipsolver or None
 
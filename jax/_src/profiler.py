@@ -20,13 +20,17 @@ import http.server
 import json
 import os
 import socketserver
+import collections
 import threading
+import time
 import warnings
 
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 from absl import logging
+from jax._src import source_info_util
 from jax._src import traceback_util
+from jax._src import util
 traceback_util.register_exclusion(__file__)
 
 from jax._src.lib import xla_bridge
@@ -77,6 +81,80 @@ class _ProfileState:
 _profile_state = _ProfileState()
 
 
+class _CompileTraceState:
+  def __init__(self):
+    self.enabled = False
+    self.events: List[Dict[str, Any]] = []
+    self.lock = threading.Lock()
+
+_compile_trace_state = _CompileTraceState()
+
+# The name of the file, next to the profiler's `trace.json.gz`, holding the
+# events recorded by `compile_event`.
+_COMPILE_TRACE_FILENAME = "jax_compile_trace.json.gz"
+
+
+@contextmanager
+def compile_event(phase: str, name: str) -> Iterator[Optional[Dict[str, Any]]]:
+  """Records the wall time spent in a phase of tracing or compiling `name`.
+
+  Events are only recorded while a profiler trace is running, and are written
+  as Chrome trace events, which Perfetto and TensorBoard can open, when the
+  trace is stopped. Yields a dictionary to which arguments of the event may be
+  added, or None if no trace is running.
+  """
+  if not _compile_trace_state.enabled:
+    yield None
+    return
+  args: Dict[str, Any] = {"function": name}
+  start_us = time.time() * 1e6
+  start_time = time.perf_counter()
+  try:
+    yield args
+  finally:
+    duration_us = (time.perf_counter() - start_time) * 1e6
+    event = {"name": f"{phase} {name}", "cat": phase, "ph": "X",
+             "ts": start_us, "dur": duration_us, "pid": os.getpid(),
+             "tid": threading.get_ident(), "args": args}
+    with _compile_trace_state.lock:
+      if _compile_trace_state.enabled:
+        _compile_trace_state.events.append(event)
+
+
+def eqn_source_counts(jaxpr) -> Dict[str, int]:
+  """Counts the equations of `jaxpr` and its subjaxprs per user source line.
+
+  The most frequent lines come first.
+  """
+  # Avoid import cycle between jax.core and jax._src.profiler
+  from jax import core
+  counts: collections.Counter = collections.Counter()
+  jaxprs = [jaxpr]
+  while jaxprs:
+    jaxpr = jaxprs.pop()
+    for eqn in jaxpr.eqns:
+      counts[source_info_util.summarize(eqn.source_info) or "unknown"] += 1
+    jaxprs.extend(core.subjaxprs(jaxpr))
+  return dict(counts.most_common())
+
+
+def _start_compile_trace():
+  with _compile_trace_state.lock:
+    _compile_trace_state.enabled = True
+    _compile_trace_state.events = []
+
+
+def _stop_compile_trace() -> List[Dict[str, Any]]:
+  with _compile_trace_state.lock:
+    events = _compile_trace_state.events
+    _compile_trace_state.enabled = False
+    _compile_trace_state.events = []
+  if events:
+    events.insert(0, {"name": "process_name", "ph": "M", "pid": os.getpid(),
+                      "args": {"name": "JAX tracing and compilation"}})
+  return events
+
+
 def start_trace(log_dir, create_perfetto_link: bool = False):
   """Starts a profiler trace.
 
@@ -110,14 +188,24 @@ def start_trace(log_dir, create_perfetto_link: bool = False):
     _profile_state.profile_session = xla_client.profiler.ProfilerSession()
     _profile_state.create_perfetto_link = create_perfetto_link
     _profile_state.log_dir = log_dir
+    _start_compile_trace()
 
-def _write_perfetto_trace_file(log_dir):
-  # Navigate to folder with the latest trace dump to find `trace.json.jz`
+def _latest_trace_folder(log_dir):
   curr_path = os.path.abspath(log_dir)
   root_trace_folder = os.path.join(curr_path, "plugins", "profile")
   trace_folders = [os.path.join(root_trace_folder, trace_folder) for
       trace_folder in os.listdir(root_trace_folder)]
-  latest_folder = max(trace_folders, key=os.path.getmtime)
+  return max(trace_folders, key=os.path.getmtime)
+
+def _write_compile_trace_file(log_dir, events):
+  compile_trace = os.path.join(_latest_trace_folder(log_dir),
+                               _COMPILE_TRACE_FILENAME)
+  with gzip.open(compile_trace, "w") as fp:
+    fp.write(json.dumps({"traceEvents": events}).encode("utf-8"))
+
+def _write_perfetto_trace_file(log_dir, compile_events=()):
+  # Navigate to folder with the latest trace dump to find `trace.json.jz`
+  latest_folder = _latest_trace_folder(log_dir)
   trace_jsons = glob.glob(os.path.join(latest_folder, "*.trace.json.gz"))
   if len(trace_jsons) != 1:
     raise ValueError(f"Invalid trace folder: {latest_folder}")
@@ -131,6 +219,7 @@ def _write_perfetto_trace_file(log_dir):
   with gzip.open(trace_json, "rb") as fp:
     trace = json.load(fp)
     del trace["metadata"]
+  trace["traceEvents"].extend(compile_events)
   filename = "perfetto_trace.json.gz"
   perfetto_trace = os.path.join(latest_folder, filename)
   logging.info("Writing perfetto_trace.json.gz...")
@@ -152,11 +241,11 @@ class _PerfettoServer(http.server.SimpleHTTPRequestHandler):
   def do_POST(self):
     self.send_error(404, "File not found")
 
-def _host_perfetto_trace_file(log_dir):
+def _host_perfetto_trace_file(log_dir, compile_events=()):
   # ui.perfetto.dev looks for files hosted on `127.0.0.1:9001`. We set up a
   # TCP server that is hosting the `perfetto_trace.json.gz` file.
   port = 9001
-  abs_filename = _write_perfetto_trace_file(log_dir)
+  abs_filename = _write_perfetto_trace_file(log_dir, compile_events)
   orig_directory = os.path.abspath(os.getcwd())
   directory, filename = os.path.split(abs_filename)
   try:
@@ -178,13 +267,23 @@ def stop_trace():
 
   The trace will be saved to the ``log_dir`` passed to the corresponding
   ``start_trace()`` call. Raises a RuntimeError if a trace hasn't been started.
+
+  The time JAX spent tracing, lowering and compiling each function while the
+  trace was running is saved next to the trace, as Chrome trace events in a
+  ``jax_compile_trace.json.gz`` file that can be opened with Perfetto. Tracing
+  events list the number of jaxpr equations attributed to each line of user
+  code. If ``create_perfetto_link`` was set, these events are also included in
+  the linked trace.
   """
   with _profile_state.lock:
     if _profile_state.profile_session is None:
       raise RuntimeError("No profile started")
+    compile_events = _stop_compile_trace()
     _profile_state.profile_session.stop_and_export(_profile_state.log_dir)
+    if compile_events:
+      _write_compile_trace_file(_profile_state.log_dir, compile_events)
     if _profile_state.create_perfetto_link:
-      _host_perfetto_trace_file(_profile_state.log_dir)
+      _host_perfetto_trace_file(_profile_state.log_dir, compile_events)
     _profile_state.profile_session = None
     _profile_state.create_perfetto_link = False
     _profile_state.log_dir = None
@@ -366,3 +465,22 @@ def save_device_memory_profile(filename, backend: Optional[str] = None):
   profile = device_memory_profile(backend)
   with open(filename, "wb") as f:
     f.write(profile)
+
+
+def cache_stats() -> Dict[str, util.CacheStats]:
+  """Returns statistics for JAX's in-memory caches.
+
+  JAX caches traced jaxprs and compiled executables in many places, e.g. for
+  :func:`jax.jit`, :func:`jax.pmap` and for the dispatch of individual
+  primitives. A cache whose number of misses keeps growing, or which spends a
+  lot of time on misses, usually indicates that a function is retraced or
+  recompiled more often than expected.
+
+  Returns:
+    A dictionary mapping the qualified name of each cached function to a
+    ``CacheStats`` named tuple with fields ``hits``, ``misses``, ``evictions``,
+    ``maxsize``, ``currsize`` and ``miss_time``, the total time in seconds
+    spent on misses. Time spent on misses of nested caches is also counted
+    towards the enclosing cache.
+  """
+  return util.cache_stats()
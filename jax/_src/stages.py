@@ -29,6 +29,8 @@ various internal XLA-backed lowerings and executables into the lowering and
 executable protocols described above.
 """
 
+import concurrent.futures
+import os
 import warnings
 
 from dataclasses import dataclass
@@ -493,6 +495,46 @@ class Lowered(Stage):
       return None
 
 
+def compile_all(lowered: Sequence[Lowered],
+                max_workers: Optional[int] = None) -> List[Compiled]:
+  """Compiles several lowerings concurrently.
+
+  Compilation of each lowering runs on a thread pool, which lets XLA compile
+  independent computations in parallel. Like ``Lowered.compile``, it goes
+  through the persistent compilation cache if it is initialized.
+
+  Args:
+    lowered: the ``Lowered`` instances to compile, e.g. the results of calling
+      ``.lower(...)`` on several jitted functions.
+    max_workers: optional; the maximum number of compilations to run at once.
+      Defaults to the number of CPUs.
+
+  Returns:
+    A list with the ``Compiled`` instance of each element of ``lowered``, in
+    the same order.
+
+  Raises:
+    The first exception, in the order of ``lowered``, raised by a compilation.
+    The remaining compilations are completed before it is raised.
+  """
+  lowered = list(lowered)
+  # A lowering caches its executable, so compile each one only once.
+  unique = list({id(l): l for l in lowered}.values())
+  if max_workers is None:
+    max_workers = os.cpu_count() or 1
+  max_workers = min(max_workers, len(unique))
+  if max_workers <= 1:
+    compiled = {id(l): l.compile() for l in unique}
+  else:
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix="jax_compile_all") as executor:
+      futures = {id(l): executor.submit(l.compile) for l in unique}
+      concurrent.futures.wait(futures.values())
+    compiled = {k: f.result() for k, f in futures.items()}
+  return [compiled[id(l)] for l in lowered]
+
+
 class Wrapped(Protocol):
   def __call__(self, *args, **kwargs):
     """Executes the wrapped function, lowering and compiling as needed."""
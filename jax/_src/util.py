@@ -16,12 +16,13 @@
 import functools
 from functools import partial
 import itertools as it
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 import operator
 import types
 import threading
-from typing import (Any, Callable, Dict, Iterable, List, Tuple, Generic,
-                    TypeVar, Set, Iterator, Sequence)
+import time
+from typing import (Any, Callable, Dict, Iterable, List, Optional, Tuple,
+                    Generic, TypeVar, Set, Iterator, Sequence)
 import weakref
 
 from absl import logging
@@ -206,11 +207,199 @@ def split_merge(predicate, xs):
 
   return lhs, rhs, merge
 
-def cache(max_size=4096):
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+CacheStats = namedtuple("CacheStats", ["hits", "misses", "evictions",
+                                       "maxsize", "currsize", "miss_time"])
+CacheStats.__doc__ = """Statistics of an in-memory cache.
+
+Attributes:
+  hits: the number of lookups that found a cached value.
+  misses: the number of lookups that computed a new value.
+  evictions: the number of values dropped from the cache to bound its size.
+  maxsize: the maximum number of values in the cache, or None if unbounded.
+  currsize: the current number of values in the cache.
+  miss_time: the total time in seconds spent computing values on misses.
+"""
+
+_registered_caches: List[Tuple[str, Any]] = []
+_registered_caches_lock = threading.Lock()
+
+def register_cache(fun: Callable, name: Optional[str] = None) -> None:
+  """Registers a cached function so that ``cache_stats`` reports it.
+
+  ``fun`` must have a ``cache_stats`` attribute returning a ``CacheStats``. Only
+  a weak reference to ``fun`` is kept.
+  """
+  if name is None:
+    name = f"{getattr(fun, '__module__', '?')}.{getattr(fun, '__qualname__', fun)}"
+  with _registered_caches_lock:
+    _registered_caches[:] = [(n, r) for n, r in _registered_caches
+                             if r() is not None]
+    _registered_caches.append((name, weakref.ref(fun)))
+
+def cache_stats() -> Dict[str, CacheStats]:
+  """Returns the statistics of every registered cache, keyed by name."""
+  stats: Dict[str, CacheStats] = {}
+  with _registered_caches_lock:
+    _registered_caches[:] = [(n, r) for n, r in _registered_caches
+                             if r() is not None]
+    caches = [(n, r()) for n, r in _registered_caches]
+  for name, fun in caches:
+    if fun is None:
+      continue
+    unique_name, i = name, 1
+    while unique_name in stats:
+      i += 1
+      unique_name = f"{name}#{i}"
+    stats[unique_name] = fun.cache_stats()
+  return stats
+
+def executable_size_in_bytes(value: Any) -> int:
+  """Returns the size of the executables held by a cached value.
+
+  Cached values expose their executable through an ``xla_executable``
+  attribute, which may be ``None`` for computations that were not compiled.
+  """
+  if isinstance(value, (list, tuple)):
+    return sum(executable_size_in_bytes(v) for v in value)
+  xla_executable = getattr(value, "xla_executable", None)
+  if xla_executable is None:
+    return 0
+  try:
+    return xla_executable.size_of_generated_code_in_bytes()
+  except (AttributeError, RuntimeError):
+    return 0
+
+
+class ExecutableCache:
+  """The entries of an in-memory cache of compiled executables.
+
+  The number of entries and the total size of the executables they hold are
+  bounded by the ``jax_executable_cache_max_entries`` and
+  ``jax_executable_cache_max_bytes`` options, which are read on every insertion
+  so that they can be changed at any time. Entries are evicted following
+  ``jax_executable_cache_eviction_policy``: ``"lru"`` evicts the least recently
+  used entries first, and ``"cost"`` evicts the entries that took the least
+  time to compute per byte of executable first. The entry inserted last is
+  never evicted, so a single executable larger than the byte budget is still
+  cached until the next insertion.
+
+  Evicted values are dropped, releasing their executables once no other
+  references to them remain.
+
+  Lookups don't take a lock: ``OrderedDict.move_to_end`` is atomic. Changes to
+  the entries are made under a lock, since other threads may be dispatching
+  concurrently.
+  """
+  __slots__ = ["entries", "total_bytes", "evictions", "_lock"]
+
+  def __init__(self):
+    # key -> (value, size in bytes, time in seconds spent computing the value)
+    self.entries: OrderedDict = OrderedDict()
+    self.total_bytes = 0
+    self.evictions = 0
+    self._lock = threading.Lock()
+
+  def __len__(self):
+    return len(self.entries)
+
+  def get(self, key, default=None):
+    try:
+      value, _, _ = self.entries[key]
+    except KeyError:
+      return default
+    try:
+      self.entries.move_to_end(key)
+    except KeyError:
+      pass  # Evicted by another thread since it was found.
+    return value
+
+  def put(self, key, value, miss_time: float,
+          size: Optional[int] = None) -> None:
+    """Inserts ``value``, whose size is ``size`` bytes if given, and otherwise
+    that of the executables it holds."""
+    if size is None:
+      size = executable_size_in_bytes(value)
+    with self._lock:
+      self._pop(key)
+      self.entries[key] = (value, size, miss_time)
+      self.total_bytes += size
+      self._evict()
+
+  def pop(self, key) -> None:
+    with self._lock:
+      self._pop(key)
+
+  def _pop(self, key) -> None:
+    entry = self.entries.pop(key, None)
+    if entry is not None:
+      self.total_bytes -= entry[1]
+
+  def remove_if(self, pred: Callable[[Any], bool]) -> int:
+    """Removes the entries whose key satisfies ``pred``, returning how many."""
+    with self._lock:
+      keys = [k for k in list(self.entries) if pred(k)]
+      for k in keys:
+        self._pop(k)
+    return len(keys)
+
+  def clear(self) -> None:
+    with self._lock:
+      self.entries.clear()
+      self.total_bytes = 0
+      self.evictions = 0
+
+  @staticmethod
+  def max_entries() -> Optional[int]:
+    max_entries = config.FLAGS.jax_executable_cache_max_entries
+    return max_entries if max_entries > 0 else None
+
+  def _over_budget(self, max_entries, max_bytes) -> bool:
+    return ((max_entries is not None and len(self.entries) > max_entries) or
+            (max_bytes > 0 and self.total_bytes > max_bytes))
+
+  def _evict(self) -> None:
+    max_entries = self.max_entries()
+    max_bytes = config.FLAGS.jax_executable_cache_max_bytes
+    if not self._over_budget(max_entries, max_bytes):
+      return
+    *candidates, _ = list(self.entries.items())
+    if config.FLAGS.jax_executable_cache_eviction_policy == "cost":
+      candidates.sort(key=lambda item: item[1][2] / max(item[1][1], 1))
+    for key, _ in candidates:
+      if not self._over_budget(max_entries, max_bytes):
+        break
+      self._pop(key)
+      self.evictions += 1
+
+
+def cache(max_size=4096, executable_cache: bool = False):
+  """Memoization decorator keyed on the arguments and the trace context.
+
+  Args:
+    max_size: the maximum number of entries, or None for an unbounded cache.
+    executable_cache: whether the cached function returns compiled executables,
+      in which case the cache is an ``ExecutableCache`` bounded by the
+      ``jax_executable_cache_*`` options rather than by ``max_size``.
+  """
+  if executable_cache:
+    return _executable_cache
   def wrap(f):
+    failures = 0
+    miss_time = 0.
+
     @functools.lru_cache(max_size)
     def cached(_, *args, **kwargs):
-      return f(*args, **kwargs)
+      nonlocal failures, miss_time
+      start_time = time.perf_counter()
+      try:
+        return f(*args, **kwargs)
+      except BaseException:
+        failures += 1
+        raise
+      finally:
+        miss_time += time.perf_counter() - start_time
 
     @functools.wraps(f)
     def wrapper(*args, **kwargs):
@@ -219,33 +408,104 @@ def cache(max_size=4096):
       else:
         return cached(config._trace_context(), *args, **kwargs)
 
-    wrapper.cache_clear = cached.cache_clear
+    def cache_stats():
+      info = cached.cache_info()
+      # functools.lru_cache doesn't count evictions, but every miss that
+      # didn't raise inserted a value, so those not in the cache were evicted.
+      evictions = max(info.misses - failures - info.currsize, 0)
+      return CacheStats(info.hits, info.misses, evictions, info.maxsize,
+                        info.currsize, miss_time)
+
+    def cache_clear():
+      nonlocal failures, miss_time
+      cached.cache_clear()
+      failures = 0
+      miss_time = 0.
+
+    wrapper.cache_clear = cache_clear
     wrapper.cache_info = cached.cache_info
+    wrapper.cache_stats = cache_stats
+    register_cache(wrapper)
     return wrapper
   return wrap
 
-memoize = cache(max_size=None)
+_NOT_FOUND = object()
 
-CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+def _executable_cache(f):
+  entries = ExecutableCache()
+  hits = misses = 0
+  miss_time = 0.
+
+  @functools.wraps(f)
+  def wrapper(*args, **kwargs):
+    nonlocal hits, misses, miss_time
+    if config.jax_check_tracer_leaks:
+      return f(*args, **kwargs)
+    key = (config._trace_context(), args, tuple(kwargs.items()))
+    result = entries.get(key, _NOT_FOUND)
+    if result is not _NOT_FOUND:
+      hits += 1
+      return result
+    misses += 1
+    start_time = time.perf_counter()
+    try:
+      result = f(*args, **kwargs)
+    finally:
+      elapsed_time = time.perf_counter() - start_time
+      miss_time += elapsed_time
+    entries.put(key, result, elapsed_time)
+    return result
+
+  def cache_info():
+    return CacheInfo(hits, misses, entries.max_entries(), len(entries))
+
+  def cache_stats():
+    return CacheStats(hits, misses, entries.evictions, entries.max_entries(),
+                      len(entries), miss_time)
+
+  def cache_clear():
+    nonlocal hits, misses, miss_time
+    entries.clear()
+    hits = misses = 0
+    miss_time = 0.
+
+  wrapper.cache_info = cache_info
+  wrapper.cache_stats = cache_stats
+  wrapper.cache_clear = cache_clear
+  register_cache(wrapper)
+  return wrapper
+
+memoize = cache(max_size=None)
 
-def weakref_lru_cache(call: Callable, maxsize=2048):
+def weakref_lru_cache(call: Optional[Callable] = None, maxsize=2048, *,
+                      executable_cache: bool = False):
   """
   Least recently used cache decorator with weakref support.
 
   The cache will take a weakref to the first argument of the wrapped function
   and strong refs to all subsequent operations. In all other respects it should
   behave similar to `functools.lru_cache`.
+
+  Cache hits don't take a lock, so that concurrent callers of a cached function
+  don't contend with each other. The hit count may then miss concurrent hits.
+
+  If ``executable_cache`` is true the cached values hold compiled executables,
+  and the maximum number of entries is ``jax_executable_cache_max_entries``
+  rather than ``maxsize``.
   """
-  cache: Dict[Any, Any] = {}
-  hits = misses = 0
+  if call is None:
+    return partial(weakref_lru_cache, maxsize=maxsize,
+                   executable_cache=executable_cache)
+  cache: OrderedDict = OrderedDict()
+  hits = misses = evictions = 0
+  miss_time = 0.
   lock = threading.Lock()
 
   def remove_key(tctx, args, kwargs, weak_arg):
     k = (weak_arg, tctx, args, kwargs)
     try:
-      # This has a chance to race with the iteration in next(iter(cache)),
-      # but we cannot lock because GC can get triggered synchronously inside
-      # a critical section and will not relinquish control until the callback
+      # We cannot lock because GC can get triggered synchronously inside a
+      # critical section and will not relinquish control until the callback
       # has finished. This would lead to a deadlock between this weakref
       # cleanup function and any function below which locks.
       del cache[k]
@@ -253,56 +513,71 @@ def weakref_lru_cache(call: Callable, maxsize=2048):
       pass
 
   def wrapped(weak_arg, *args, **kwargs):
-    nonlocal hits, misses
+    nonlocal hits, misses, evictions, miss_time
     if config.jax_check_tracer_leaks:
       return call(weak_arg, *args, **kwargs)
     kwargs_key = tuple(kwargs.items())
     tctx = config._trace_context()
+    # Weak references compare and hash like their referents, so lookups can use
+    # a weak reference without a callback, which CPython reuses between calls.
+    entry = cache.get((weakref.ref(weak_arg), tctx, args, kwargs_key))
+    if entry is not None:
+      hits += 1
+      # Entries hold their key, whose weak reference has the callback. Bump it
+      # in the LRU order with move_to_end, which is atomic, so that concurrent
+      # lookups always find the entry.
+      stored_k, result = entry
+      try:
+        cache.move_to_end(stored_k)
+      except KeyError:
+        pass  # Evicted by another thread since it was found.
+      return result
     k = (weakref.ref(weak_arg,
          functools.partial(remove_key, tctx, args, kwargs_key)),
          tctx, args, kwargs_key)
     with lock:
-      if k in cache:
-        hits += 1
-        result = cache[k]
-        # del and reinsert to bump key in the insertion order.
-        del cache[k]
-        cache[k] = result
-        return result
       misses += 1
-    result = call(weak_arg, *args, **kwargs)
+    start_time = time.perf_counter()
+    try:
+      result = call(weak_arg, *args, **kwargs)
+    finally:
+      elapsed_time = time.perf_counter() - start_time
     with lock:
-      cache[k] = result
-      num_errors = 0
-      while len(cache) > maxsize:
+      miss_time += elapsed_time
+      cache[k] = (k, result)
+      max_entries = _max_entries()
+      while max_entries is not None and len(cache) > max_entries:
         try:
-          del_k = next(iter(cache))
-          # This happens if a weakref callback happens between iter and
-          # next. Just ignore the error. WeakKeyDictionary handles this
-          # by deferring the deletes, but that has a chance at leaking,
-          # and this solution is easier.
-        except RuntimeError:
-          num_errors += 1
-          if num_errors > len(cache):
-            # This must be some other problem.
-            raise
-          else:
-            continue
-        del cache[del_k]
+          cache.popitem(last=False)
+        except KeyError:  # Emptied by weakref callbacks.
+          break
+        evictions += 1
       return result
 
+  def _max_entries():
+    return ExecutableCache.max_entries() if executable_cache else maxsize
+
   def cache_info():
     with lock:
-      return CacheInfo(hits, misses, maxsize, len(cache))
+      return CacheInfo(hits, misses, _max_entries(), len(cache))
+
+  def cache_stats():
+    with lock:
+      return CacheStats(hits, misses, evictions, _max_entries(), len(cache),
+                        miss_time)
 
   def cache_clear():
-    nonlocal hits, misses
+    nonlocal hits, misses, evictions, miss_time
     with lock:
-      hits = misses = 0
+      hits = misses = evictions = 0
+      miss_time = 0.
       cache.clear()
 
   wrapped.cache_info = cache_info
+  wrapped.cache_stats = cache_stats
   wrapped.cache_clear = cache_clear
+  register_cache(wrapped, f"{getattr(call, '__module__', '?')}."
+                          f"{getattr(call, '__qualname__', call)}")
   return wrapped
 
 def prod(xs):
@@ -13,6 +13,8 @@
 # limitations under the License.
 
 from abc import ABC, abstractmethod
+import mmap
+import os
 
 class CacheInterface(ABC):
     @abstractmethod
@@ -20,5 +22,29 @@ class CacheInterface(ABC):
         pass
 
     @abstractmethod
-    def put(self, key: str, value: bytes):
+    def put(self, key: str, value: bytes, compile_time_secs: float = 0.):
+        """Stores 'value' under 'key'.
+
+        ``compile_time_secs`` is the compilation time saved by a hit on this
+        entry. Backends may use it to decide which entries to evict.
+        """
         pass
+
+    def get_buffer(self, key: str):
+        """Returns the value for 'key' as a buffer, or None if not present.
+
+        Backends may return a read-only ``mmap.mmap`` instead of ``bytes`` to
+        avoid copying the entry into memory; callers must close it.
+        """
+        return self.get(key)
+
+
+def mmap_file(path: str):
+    """Maps the file at 'path' read-only into memory.
+
+    Returns ``b""`` for empty files, which cannot be mapped.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
@@ -12,33 +12,97 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import atexit
 import hashlib
+import mmap
 import os
+import queue
 import re
+import struct
 import sys
+import threading
 from typing import List, Optional
+import zlib
+
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+
+import numpy as np
 
 import jax
+from jax.experimental.compilation_cache.cache_interface import CacheInterface
 from jax.experimental.compilation_cache.gfile_cache import GFileCache
+from jax.experimental.compilation_cache.lru_cache import LRUCache
 import jax._src.lib
 from jax._src.lib import xla_client
 from absl import logging
 
-_cache = None
+_cache: Optional[CacheInterface] = None
+_compression: Optional[str] = None
+_writer: Optional["_AsyncCacheWriter"] = None
 
-def initialize_cache(path):
+def initialize_cache(path, max_cache_size_bytes: Optional[int] = None,
+                     eviction_policy: str = "lru",
+                     compression: Optional[str] = None,
+                     async_writes: bool = False,
+                     max_pending_writes: int = 16):
   """Creates a global cache object. Should only be called once per process.
+
+  Args:
+    path: the directory in which to store cache entries.
+    max_cache_size_bytes: if set, the cache is kept on the local file system
+      and bounded to this many bytes, evicting entries according to
+      ``eviction_policy``. If None, the cache grows without bound.
+    eviction_policy: ``"lru"`` to evict the least recently used entries first,
+      or ``"cost"`` to evict the entries saving the least compile time per byte
+      first. Only used when ``max_cache_size_bytes`` is set.
+    compression: if set, the codec used to compress new cache entries, either
+      ``"zlib"`` or ``"zstd"`` (which requires the ``zstandard`` package).
+      Entries written with any codec, or uncompressed, can always be read.
+      Compressed entries on the local file system are decompressed straight
+      from a memory map of the file; uncompressed entries are copied into
+      ``bytes`` to be deserialized, so they don't save peak memory.
+    async_writes: if True, new entries are serialized and written to the cache
+      on a background thread, so that compilation doesn't wait on the file
+      system. Use ``wait_for_cache_writes`` to wait for pending writes; they
+      are also flushed when the process exits.
+    max_pending_writes: the maximum number of writes queued when
+      ``async_writes`` is True. Compilations wait for the queue to drain once
+      it is full.
   """
-  global _cache
-  assert _cache == None, f"The cache path has already been initialized to {_cache._path}"
-  _cache = GFileCache(path)
+  global _cache, _compression, _writer
+  assert _cache == None, f"The cache path has already been initialized to {_cache._path}"  # type: ignore
+  if compression is not None and compression not in _CODECS:
+    raise ValueError(f"Unknown compilation cache compression {compression!r}; "
+                     f"expected one of {[c for c in _CODECS if c != 'none']}.")
+  if compression == "zstd" and zstandard is None:
+    raise ValueError("zstd compression of the compilation cache requires the "
+                     "zstandard package to be installed.")
+  _compression = compression
+  if max_cache_size_bytes is None:
+    _cache = GFileCache(path)
+  else:
+    _cache = LRUCache(path, max_cache_size_bytes, eviction_policy)
+  if _writer is not None and (not async_writes or
+                              _writer.max_pending_writes != max_pending_writes):
+    _stop_writer()
+  if async_writes and _writer is None:
+    _writer = _AsyncCacheWriter(max_pending_writes)
   logging.warning("Initialized persistent compilation cache at %s", path)
 
-def get_executable(xla_computation, compile_options, backend) -> Optional[xla_client.Executable]:
-  """Returns the cached executable if present, or None otherwise."""
+def get_executable(xla_computation, compile_options, backend,
+                   cache_key: Optional[str] = None) -> Optional[xla_client.Executable]:
+  """Returns the cached executable if present, or None otherwise.
+
+  If ``cache_key`` is given it is used instead of recomputing the key from
+  ``xla_computation``, which may then be None.
+  """
   assert _cache is not None, "initialize_cache must be called before you can call get_executable()"
-  cache_key = get_cache_key(xla_computation, compile_options, backend)
-  xla_executable_serialized = _cache.get(cache_key)
+  if cache_key is None:
+    cache_key = get_cache_key(xla_computation, compile_options, backend)
+  xla_executable_serialized = get_bytes(cache_key)
   if not xla_executable_serialized:
     return None
   xla_executable_deserialized = backend.deserialize_executable(
@@ -47,14 +111,157 @@ def get_executable(xla_computation, compile_options, backend) -> Optional[xla_cl
   return xla_executable_deserialized
 
 def put_executable(module_name, xla_computation, compile_options,
-                   executable: xla_client.Executable, backend):
-  """Adds 'executable' to the cache, possibly evicting older entries."""
+                   executable: xla_client.Executable, backend,
+                   compile_time_secs: float = 0.,
+                   cache_key: Optional[str] = None):
+  """Adds 'executable' to the cache, possibly evicting older entries.
+
+  ``compile_time_secs`` is the time it took to compile ``executable``; caches
+  with cost-aware eviction use it to prefer keeping expensive entries. If
+  ``cache_key`` is given it is used instead of recomputing the key from
+  ``xla_computation``.
+  """
   assert _cache is not None, "initialize_cache must be called before you can call put_executable()"
-  cache_key = get_cache_key(xla_computation, compile_options, backend)
+  if _writer is not None:
+    _writer.submit(_put_executable, _cache, module_name, xla_computation,
+                   compile_options, executable, backend, compile_time_secs,
+                   cache_key)
+  else:
+    _put_executable(_cache, module_name, xla_computation, compile_options,
+                    executable, backend, compile_time_secs, cache_key)
+
+def _put_executable(cache, module_name, xla_computation, compile_options,
+                    executable: xla_client.Executable, backend,
+                    compile_time_secs: float, cache_key: Optional[str]):
+  if cache_key is None:
+    cache_key = get_cache_key(xla_computation, compile_options, backend)
   logging.info('Writing %s to persistent compilation cache with key %s.',
                module_name, cache_key)
   serialized_executable = backend.serialize_executable(executable)
-  _cache.put(cache_key, serialized_executable)
+  _put_bytes(cache, cache_key, serialized_executable, compile_time_secs)
+
+def get_bytes(key: str) -> Optional[bytes]:
+  """Returns the bytes stored under 'key' by ``put_bytes``, or None."""
+  assert _cache is not None, "initialize_cache must be called before you can call get_bytes()"
+  cache_entry = _cache.get_buffer(key)
+  if not cache_entry:
+    return None
+  try:
+    return _decode_entry(cache_entry)
+  finally:
+    if isinstance(cache_entry, mmap.mmap):
+      cache_entry.close()
+
+def put_bytes(key: str, value: bytes, compile_time_secs: float = 0.):
+  """Stores 'value' under 'key', compressed and written like executables."""
+  assert _cache is not None, "initialize_cache must be called before you can call put_bytes()"
+  if _writer is not None:
+    _writer.submit(_put_bytes, _cache, key, value, compile_time_secs)
+  else:
+    _put_bytes(_cache, key, value, compile_time_secs)
+
+def _put_bytes(cache, key: str, value: bytes, compile_time_secs: float):
+  cache_entry = _encode_entry(value, _compression)
+  cache.put(key, cache_entry, compile_time_secs=compile_time_secs)
+
+def wait_for_cache_writes():
+  """Blocks until all pending asynchronous cache writes have completed."""
+  if _writer is not None:
+    _writer.wait()
+
+atexit.register(wait_for_cache_writes)
+
+def _stop_writer():
+  """Waits for pending asynchronous writes and stops the writer thread."""
+  global _writer
+  if _writer is not None:
+    _writer.stop()
+    _writer = None
+
+class _AsyncCacheWriter:
+  """Runs cache writes on a daemon thread, in submission order."""
+
+  def __init__(self, max_pending_writes: int):
+    self.max_pending_writes = max_pending_writes
+    self._queue: queue.Queue = queue.Queue(maxsize=max_pending_writes)
+    self._thread = threading.Thread(
+        target=self._run, name="jax_compilation_cache_writer", daemon=True)
+    self._thread.start()
+
+  def submit(self, fn, *args):
+    self._queue.put((fn, args))
+
+  def wait(self):
+    self._queue.join()
+
+  def stop(self):
+    """Runs the pending writes, then ends the writer thread."""
+    self._queue.put(None)
+    self._thread.join()
+
+  def _run(self):
+    while True:
+      item = self._queue.get()
+      if item is None:
+        self._queue.task_done()
+        return
+      fn, args = item
+      try:
+        fn(*args)
+      except Exception as e:  # pylint: disable=broad-except
+        logging.warning("Error writing to persistent compilation cache: %s", e)
+      finally:
+        self._queue.task_done()
+
+# Cache entries written with compression start with a header made of
+# _ENTRY_MAGIC followed by a one byte format version and a one byte codec id.
+# Entries without the header are raw serialized executables, as written by
+# earlier versions of JAX.
+_ENTRY_MAGIC = b"JAXCE"
+_ENTRY_VERSION = 1
+_ENTRY_HEADER = struct.Struct(f"{len(_ENTRY_MAGIC)}sBB")
+_CODECS = {"none": 0, "zlib": 1, "zstd": 2}
+
+def _encode_entry(serialized: bytes, compression: Optional[str]) -> bytes:
+  if compression is None:
+    return serialized
+  if compression == "zlib":
+    payload = zlib.compress(serialized)
+  elif compression == "zstd":
+    payload = zstandard.ZstdCompressor().compress(serialized)
+  else:
+    assert compression == "none", compression
+    payload = serialized
+  header = _ENTRY_HEADER.pack(_ENTRY_MAGIC, _ENTRY_VERSION, _CODECS[compression])
+  return header + payload
+
+def _decode_entry(entry) -> bytes:
+  """Returns the serialized executable stored in the bytes-like 'entry'.
+
+  ``Client.deserialize_executable`` only accepts ``bytes``, so uncompressed
+  entries are copied out of 'entry' once.
+  """
+  if entry[:len(_ENTRY_MAGIC)] != _ENTRY_MAGIC:
+    return bytes(entry)
+  magic, version, codec = _ENTRY_HEADER.unpack_from(entry)
+  if version != _ENTRY_VERSION:
+    raise ValueError(f"Unsupported compilation cache entry version {version}.")
+  with memoryview(entry) as view:
+    payload = view[_ENTRY_HEADER.size:]
+    try:
+      if codec == _CODECS["none"]:
+        return bytes(payload)
+      elif codec == _CODECS["zlib"]:
+        return zlib.decompress(payload)
+      elif codec == _CODECS["zstd"]:
+        if zstandard is None:
+          raise ValueError("Reading a zstd-compressed compilation cache entry "
+                           "requires the zstandard package to be installed.")
+        return zstandard.ZstdDecompressor().decompress(payload)
+      else:
+        raise ValueError(f"Unknown compilation cache entry codec {codec}.")
+    finally:
+      payload.release()
 
 def _log_cache_key_hash(hash_obj, last_serialized: str, hashfn):
   if logging.vlog_is_on(1):
@@ -67,19 +274,27 @@ def _log_cache_key_hash(hash_obj, last_serialized: str, hashfn):
     logging.vlog(1, "get_cache_key hash after serializing %s: %s",
                  last_serialized, hash_obj.digest().hex())
 
-def get_cache_key(xla_computation, compile_options, backend) -> str:
+def get_cache_key(xla_computation, compile_options, backend,
+                  fingerprint: Optional[bytes] = None) -> str:
   """Creates a hashed string to use as a key to the compilation cache.
 
      get_cache_key takes in the xla_computation and compile_options of a program and hashes
      all the components into a uniuqe byte string. This byte string is returned as a regular
      string that is 256 characters long.
 
+     If ``fingerprint`` (see ``get_jaxpr_fingerprint``) is given, it is hashed
+     in place of ``xla_computation``, which may then be None.
+
      Typical return value example:
       '14ac577cdb2ef6d986078b4054cc9893a9a14a16dbb0d8f37b89167c1f1aacdf'
   """
+  if fingerprint is None:
+    hash_computation = lambda hash_obj: _hash_computation(hash_obj,
+                                                          xla_computation)
+  else:
+    hash_computation = lambda hash_obj: hash_obj.update(fingerprint)
   entries = [
-      ("computation",
-       lambda hash_obj: _hash_computation(hash_obj, xla_computation)),
+      ("computation", hash_computation),
       ("compile_options",
        lambda hash_obj: _hash_compile_options(hash_obj, compile_options)),
       ("jax_lib version",
@@ -94,6 +309,43 @@ def get_cache_key(xla_computation, compile_options, backend) -> str:
     _log_cache_key_hash(hash_obj, name, hashfn)
   return hash_obj.digest().hex()
 
+def get_jaxpr_fingerprint(module_name: str, closed_jaxpr,
+                          donated_invars, platform: str) -> bytes:
+  """Returns a digest identifying the computation lowered from a jaxpr.
+
+  This is a cheaper alternative to hashing the lowered computation: it covers
+  the jaxpr, its constants, the donated arguments, the target platform and the
+  configuration that affects lowering. It must only be used for jaxprs
+  without side effects or host callbacks, whose executables refer to objects
+  of the process that compiled them.
+  """
+  hash_obj = hashlib.sha256()
+  _hash_string(hash_obj, module_name)
+  _hash_string(hash_obj, platform)
+  _hash_string(hash_obj, jax.__version__)
+  # Parameters may print as Python objects such as
+  # "<function _memoize.<locals>.memoized at 0x7f3fa30f0940>"; see
+  # _hash_computation.
+  _hash_string(hash_obj, re.sub(r" at 0x[a-f0-9]+>", " at 0x...>",
+                                str(closed_jaxpr.jaxpr)))
+  for const in closed_jaxpr.consts:
+    const = np.asarray(const)
+    _hash_string(hash_obj, f"{const.dtype}{const.shape}")
+    hash_obj.update(np.ascontiguousarray(const).tobytes())
+  _hash_string(hash_obj, str(tuple(donated_invars)))
+  _hash_string(hash_obj, str(jax.config._trace_context()))
+  for name in _jaxpr_fingerprint_config_names:
+    _hash_string(hash_obj, f"{name}={getattr(jax.config, name)}")
+  return hash_obj.digest()
+
+# Configuration options, besides those in config._trace_context(), that
+# affect how a jaxpr is lowered.
+_jaxpr_fingerprint_config_names = [
+    "jax_remat_opt_barrier",
+    "jax_bcoo_cusparse_lowering",
+    "jax_experimental_name_stack",
+]
+
 def _hash_computation(hash_obj, xla_computation):
   # The HLO op_name metadata sometimes includes Python function pointers,
   # which cause spurious cache misses. Scrub anything that looks like a
@@ -16,6 +16,7 @@ import os
 import pathlib
 
 from jax.experimental.compilation_cache.cache_interface import CacheInterface
+from jax.experimental.compilation_cache.cache_interface import mmap_file
 from etils import epath
 from absl import logging
 
@@ -36,8 +37,23 @@ class GFileCache(CacheInterface):
     else:
       return None
 
-  def put(self, key: str, value: bytes):
-    """Adds new cache entry."""
+  def get_buffer(self, key: str):
+    """Returns None if 'key' isn't present.
+
+    Entries on the local file system are memory-mapped rather than read.
+    """
+    if not key:
+      raise ValueError("key cannot be empty")
+    path_to_key = self._path / key
+    if '://' in str(path_to_key):
+      return self.get(key)
+    try:
+      return mmap_file(str(path_to_key))
+    except FileNotFoundError:
+      return None
+
+  def put(self, key: str, value: bytes, compile_time_secs: float = 0.):
+    """Adds new cache entry. ``compile_time_secs`` is unused."""
     if not key:
       raise ValueError("key cannot be empty")
     path_to_new_file = self._path / key
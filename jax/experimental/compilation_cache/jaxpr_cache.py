@@ -0,0 +1,473 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent cache of lowered `jit` computations, keyed on Python functions.
+
+The persistent compilation cache saves XLA compilation time, but every process
+still traces and lowers each jitted function before it can look up the cached
+executable. When ``jax_persistent_jaxpr_cache`` is enabled, top-level calls of
+jitted functions are instead keyed on the function itself: its code, the values
+it closes over or reads from its module's globals, its static arguments and
+the abstract values of its other arguments. An entry stores the lowered module
+together with what is needed to call it, and the executable is stored in the
+compilation cache under a key derived from the entry's, so that a later
+process can run the function without tracing or lowering it.
+
+The code of functions and classes defined outside of installed libraries and
+the standard library is hashed, following the functions, classes, module
+attributes and values they refer to. Library code is hashed by name and the
+library's version. Calls that refer to values that can't be hashed reliably,
+such as instances of arbitrary classes whose state the key wouldn't reflect,
+aren't cached and are traced as usual.
+
+Entries are serialized with ``pickle``, and reading an entry unpickles it, so
+the cache directory must only be writable by trusted users.
+"""
+
+import enum
+import functools
+import hashlib
+import os
+import pickle
+import site
+import sys
+import sysconfig
+import threading
+import types
+from typing import (Any, Callable, Dict, List, Optional, Sequence, Set,
+                    Tuple)
+import weakref
+
+from absl import logging
+import numpy as np
+
+import jax
+from jax import core
+from jax._src import device_array
+from jax._src import dispatch
+from jax._src import dtypes
+import jax._src.lib
+from jax._src.lib import xla_bridge as xb
+from jax._src.lib.mlir import ir
+from jax.experimental.compilation_cache import compilation_cache as cc
+from jax.interpreters import mlir
+from jax.tree_util import tree_structure, tree_unflatten
+
+_ENTRY_VERSION = 1
+_KEY_PREFIX = "jaxpr-"
+
+_DTYPES_BY_NAME = {np.dtype(t).name: np.dtype(t) for t in dtypes._jax_types}
+
+
+class _Uncacheable(Exception):
+  pass
+
+
+# Executables loaded or compiled by this process, by function and then by the
+# rest of the call signature, so that repeated cache misses of the C++ jit
+# dispatch path don't rehash the function.
+_loaded: "weakref.WeakKeyDictionary[Callable, Dict[Any, Tuple[Any, Any]]]" = (
+    weakref.WeakKeyDictionary())
+_loaded_lock = threading.Lock()
+
+
+def evict_function(fun: Callable):
+  with _loaded_lock:
+    _loaded.pop(fun, None)
+
+
+def clear_cache():
+  with _loaded_lock:
+    _loaded.clear()
+
+
+def call(fun: Callable, flat_fun, out_tree_thunk: Callable[[], Any],
+         static_args: Sequence[Any], in_tree, args_flat: Sequence[Any],
+         donated_invars: Sequence[bool], device, backend: Optional[str],
+         keep_unused: bool):
+  """Runs a top-level call of a jitted function through the cache.
+
+  Returns a tuple ``(out_flat, out_tree, execute)``, where ``execute`` is the
+  function that ran the computation, or None if the call can't be cached, in
+  which case nothing has been traced and the caller should proceed as usual.
+  """
+  arg_specs = tuple(map(dispatch.arg_spec, args_flat))
+  local_key = (tuple(static_args), in_tree, arg_specs, tuple(donated_invars),
+               device, backend, keep_unused, jax.config._trace_context())
+  try:
+    with _loaded_lock:
+      loaded = _loaded.get(fun, {}).get(local_key)
+  except TypeError:  # `fun` can't be weakly referenced
+    return None
+  if loaded is None:
+    loaded = _load_or_compile(fun, flat_fun, out_tree_thunk, static_args,
+                              in_tree, arg_specs, donated_invars, device,
+                              backend, keep_unused)
+    if loaded is None:
+      return None
+    with _loaded_lock:
+      _loaded.setdefault(fun, {})[local_key] = loaded
+  compiled, out_tree = loaded
+  out_flat = compiled.unsafe_call(*args_flat)
+  return out_flat, out_tree, compiled.unsafe_call
+
+
+def _load_or_compile(fun, flat_fun, out_tree_thunk, static_args, in_tree,
+                     arg_specs, donated_invars, device, backend, keep_unused):
+  try:
+    key = get_cache_key(fun, static_args, in_tree, arg_specs, donated_invars,
+                        device, backend, keep_unused)
+  except _Uncacheable as e:
+    logging.vlog(1, "Not using the persistent jaxpr cache for %s: %s",
+                 getattr(fun, "__qualname__", fun), e)
+    return None
+  fingerprint = key.encode("utf-8")
+
+  serialized_entry = cc.get_bytes(key)
+  if serialized_entry is not None:
+    try:
+      return _load_entry(pickle.loads(serialized_entry), arg_specs,
+                         fingerprint)
+    except Exception as e:  # pylint: disable=broad-except
+      logging.warning("Ignoring unreadable persistent jaxpr cache entry %s: "
+                      "%s", key, e)
+
+  computation = dispatch.lower_xla_callable(
+      flat_fun, device, backend, flat_fun.__name__, donated_invars, False,
+      keep_unused, *arg_specs)
+  out_tree = out_tree_thunk()
+  entry = _make_entry(computation, out_tree)
+  if entry is None:
+    return computation.compile(), out_tree
+  compile_args = dict(computation.compile_args, cache_fingerprint=fingerprint)
+  compiled = dispatch.XlaCompiledComputation.from_xla_computation(
+      computation.name, computation._lowered_hlo(), computation._in_type,
+      computation._out_type, **compile_args)
+  try:
+    serialized_entry = pickle.dumps(entry)
+  except Exception as e:  # pylint: disable=broad-except
+    logging.vlog(1, "Not writing persistent jaxpr cache entry: %s", e)
+  else:
+    logging.info("Writing %s to persistent jaxpr cache with key %s.",
+                 computation.name, key)
+    cc.put_bytes(key, serialized_entry)
+  return compiled, out_tree
+
+
+def _make_entry(computation, out_tree) -> Optional[Dict[str, Any]]:
+  if computation.is_trivial():
+    return None
+  args = computation.compile_args
+  if (args["nreps"] != 1 or args["has_unordered_effects"] or
+      args["ordered_effects"] or args["keepalive"]):
+    return None
+  try:
+    in_avals = [_aval_to_tuple(a) for a in args["in_avals"]]
+    out_avals = [_aval_to_tuple(a) for a in args["out_avals"]]
+  except _Uncacheable:
+    return None
+  example_output = tree_unflatten(out_tree, range(out_tree.num_leaves))
+  device = args["device"]
+  return {
+      "version": _ENTRY_VERSION,
+      "name": computation.name,
+      "module": mlir.module_to_string(computation.mhlo()),
+      "platform": args["backend"].platform,
+      "device_id": None if device is None else device.id,
+      "tuple_args": args["tuple_args"],
+      "in_avals": in_avals,
+      "out_avals": out_avals,
+      "kept_var_idx": sorted(args["kept_var_idx"]),
+      "example_output": example_output,
+  }
+
+
+def _load_entry(entry, arg_specs, fingerprint: bytes):
+  if entry["version"] != _ENTRY_VERSION:
+    raise ValueError(f"unsupported entry version {entry['version']}")
+  backend = xb.get_backend(entry["platform"])
+  device = None
+  if entry["device_id"] is not None:
+    device, = (d for d in backend.devices() if d.id == entry["device_id"])
+  in_type = tuple((aval, True) for aval, _ in arg_specs)
+  out_avals = [_tuple_to_aval(a) for a in entry["out_avals"]]
+  out_type = tuple((aval, True) for aval in out_avals)
+
+  def parse_module():
+    with mlir.make_ir_context():
+      return ir.Module.parse(entry["module"])
+
+  compiled = dispatch.XlaCompiledComputation.from_xla_computation(
+      entry["name"], parse_module, in_type, out_type, nreps=1, device=device,
+      backend=backend, tuple_args=entry["tuple_args"],
+      in_avals=[_tuple_to_aval(a) for a in entry["in_avals"]],
+      out_avals=out_avals, has_unordered_effects=False, ordered_effects=[],
+      kept_var_idx=set(entry["kept_var_idx"]), keepalive=None,
+      cache_fingerprint=fingerprint)
+  logging.info("Persistent jaxpr cache hit for %s.", entry["name"])
+  return compiled, tree_structure(entry["example_output"])
+
+
+def _aval_to_tuple(aval) -> Tuple[Tuple[int, ...], str, bool]:
+  if (type(aval) is not core.ShapedArray or aval.named_shape or
+      _DTYPES_BY_NAME.get(aval.dtype.name) != aval.dtype):
+    raise _Uncacheable(f"unsupported abstract value {aval}")
+  return (tuple(aval.shape), aval.dtype.name, aval.weak_type)
+
+
+def _tuple_to_aval(t) -> core.ShapedArray:
+  shape, dtype, weak_type = t
+  return core.ShapedArray(shape, _DTYPES_BY_NAME[dtype], weak_type)
+
+
+def get_cache_key(fun: Callable, static_args: Sequence[Any], in_tree,
+                  arg_specs, donated_invars: Sequence[bool], device,
+                  backend: Optional[str], keep_unused: bool) -> str:
+  """Returns the persistent cache key of a call of jitted function `fun`.
+
+  Raises _Uncacheable if `fun` or its static arguments can't be hashed
+  deterministically across processes.
+  """
+  hash_obj = hashlib.sha256()
+  _hash_string(hash_obj, jax.__version__)
+  _hash_string(hash_obj, jax._src.lib.version_str)
+  _hash_string(hash_obj, sys.version)
+  state = _HashState()
+  _hash_value(hash_obj, fun, state)
+  _hash_value(hash_obj, tuple(static_args), state)
+  _hash_string(hash_obj, str(in_tree))
+  for aval, arg_device in arg_specs:
+    _hash_string(hash_obj, aval.str_short())
+    _hash_string(hash_obj, str(aval.weak_type))
+    _hash_string(hash_obj, _device_str(arg_device))
+  _hash_string(hash_obj, str(tuple(donated_invars)))
+  _hash_string(hash_obj, _device_str(device))
+  _hash_string(hash_obj, str(xb.get_backend(backend).platform))
+  _hash_string(hash_obj, str(keep_unused))
+  _hash_string(hash_obj, str(jax.config._trace_context()))
+  return _KEY_PREFIX + hash_obj.digest().hex()
+
+
+def _device_str(device) -> str:
+  return "None" if device is None else f"{device.platform}:{device.id}"
+
+
+class _HashState:
+  """Tracks the functions and classes hashed so far."""
+
+  def __init__(self):
+    self.seen: List[Any] = []
+    self.module_attributes: Set[Tuple[str, str]] = set()
+
+  def first_visit(self, x) -> bool:
+    if any(x is y for y in self.seen):
+      return False
+    self.seen.append(x)
+    return True
+
+
+def _library_dirs() -> Tuple[str, ...]:
+  paths = sysconfig.get_paths()
+  dirs = {paths[k] for k in ("stdlib", "platstdlib", "purelib", "platlib")
+          if k in paths}
+  dirs.update(site.getsitepackages() if hasattr(site, "getsitepackages") else ())
+  dirs.add(os.path.dirname(os.path.abspath(jax.__file__)))
+  return tuple(os.path.join(os.path.realpath(d), "") for d in dirs)
+
+_LIBRARY_DIRS = _library_dirs()
+
+
+@functools.lru_cache(maxsize=None)
+def _is_library_file(filename: str) -> bool:
+  if filename.startswith("<"):  # e.g. "<stdin>" or "<string>"
+    return False
+  return os.path.realpath(filename).startswith(_LIBRARY_DIRS)
+
+
+def _is_library_module(module_name: Optional[str]) -> bool:
+  """Whether `module_name` belongs to an installed library or the stdlib.
+
+  Code of libraries is hashed by name and the library's version, the code of
+  anything else, i.e. the user's own modules, is hashed by its contents.
+  """
+  if module_name is None:
+    return False
+  if module_name in sys.builtin_module_names:
+    return True
+  module = sys.modules.get(module_name)
+  filename = getattr(module, "__file__", None)
+  return filename is not None and _is_library_file(filename)
+
+
+def _hash_library_version(hash_obj, module_name: str):
+  package = module_name.partition(".")[0]
+  version = getattr(sys.modules.get(package), "__version__", None)
+  _hash_string(hash_obj, f"{package}=={version}")
+
+
+def _hash_string(hash_obj, s: str):
+  hash_obj.update(s.encode("utf-8"))
+  hash_obj.update(b"\0")
+
+
+def _hash_value(hash_obj, x, state: _HashState):
+  if x is None or isinstance(x, (bool, int, float, complex, str, bytes)):
+    _hash_string(hash_obj, f"{type(x).__name__}:{x!r}")
+  elif isinstance(x, core.Tracer):
+    raise _Uncacheable("closes over a tracer")
+  elif isinstance(x, (tuple, list)):
+    _hash_string(hash_obj, f"{type(x).__name__}:{len(x)}")
+    for y in x:
+      _hash_value(hash_obj, y, state)
+  elif isinstance(x, dict):
+    _hash_string(hash_obj, f"dict:{len(x)}")
+    for k, v in x.items():
+      _hash_value(hash_obj, k, state)
+      _hash_value(hash_obj, v, state)
+  elif (isinstance(x, (np.ndarray, np.generic)) or
+        device_array.type_is_device_array(x) or hasattr(x, "__jax_array__")):
+    x = np.asarray(x)
+    _hash_string(hash_obj, f"array:{x.dtype}{x.shape}")
+    hash_obj.update(np.ascontiguousarray(x).tobytes())
+  elif isinstance(x, np.dtype):
+    _hash_string(hash_obj, f"dtype:{x}")
+  elif isinstance(x, types.ModuleType):
+    _hash_module(hash_obj, x, (), state)
+  elif isinstance(x, functools.partial):
+    _hash_string(hash_obj, "partial")
+    _hash_value(hash_obj, x.func, state)
+    _hash_value(hash_obj, x.args, state)
+    _hash_value(hash_obj, x.keywords, state)
+  elif isinstance(x, types.MethodType):
+    _hash_string(hash_obj, "method")
+    _hash_value(hash_obj, x.__self__, state)
+    _hash_value(hash_obj, x.__func__, state)
+  elif isinstance(x, types.FunctionType):
+    _hash_function(hash_obj, x, state)
+  elif callable(x) and hasattr(x, "__wrapped__"):
+    # E.g. functions decorated with `jit`.
+    _hash_string(hash_obj, f"wrapped:{type(x).__qualname__}")
+    _hash_value(hash_obj, x.__wrapped__, state)
+  elif isinstance(x, type):
+    _hash_class(hash_obj, x, state)
+  elif isinstance(x, np.ufunc):
+    _hash_string(hash_obj, f"ufunc:{x.__name__}")
+    _hash_library_version(hash_obj, "numpy")
+  elif isinstance(x, enum.Enum):
+    _hash_value(hash_obj, type(x), state)
+    _hash_string(hash_obj, f"enum:{x.name}")
+  elif (isinstance(x, types.BuiltinFunctionType) or
+        callable(x) and hasattr(x, "__qualname__") and
+        _is_library_module(getattr(x, "__module__", None))):
+    _hash_string(hash_obj, f"{x.__module__}.{x.__qualname__}")
+    _hash_library_version(hash_obj, x.__module__ or "builtins")
+  elif isinstance(x, types.CodeType):
+    _hash_code(hash_obj, x, state)
+  else:
+    # The repr of an object needn't reflect all of its state, so the key
+    # can't be trusted to change when the object does.
+    raise _Uncacheable(f"value of unsupported type {type(x).__qualname__}")
+
+
+def _hash_function(hash_obj, f: types.FunctionType, state: _HashState):
+  _hash_string(hash_obj, f"function:{f.__module__}.{f.__qualname__}")
+  if _is_library_file(f.__code__.co_filename):
+    _hash_library_version(hash_obj, f.__module__ or "builtins")
+    return
+  if not state.first_visit(f):
+    return
+  _hash_code(hash_obj, f.__code__, state)
+  _hash_value(hash_obj, f.__defaults__, state)
+  _hash_value(hash_obj, f.__kwdefaults__, state)
+  # co_names also contains attribute names, which only costs some unneeded
+  # hashing when they match a global or a module attribute.
+  names = sorted(set(_global_names(f.__code__)))
+  if f.__closure__:
+    for cell in f.__closure__:
+      try:
+        contents = cell.cell_contents
+      except ValueError:  # empty cell
+        contents = None
+      _hash_referenced_value(hash_obj, contents, names, state)
+  for name in names:
+    if name in f.__globals__:
+      _hash_string(hash_obj, name)
+      _hash_referenced_value(hash_obj, f.__globals__[name], names, state)
+
+
+def _hash_referenced_value(hash_obj, x, names: Sequence[str],
+                           state: _HashState):
+  if isinstance(x, types.ModuleType):
+    # Hash the attributes that the code may read from the module.
+    _hash_module(hash_obj, x, names, state)
+  else:
+    _hash_value(hash_obj, x, state)
+
+
+def _hash_module(hash_obj, module: types.ModuleType, names: Sequence[str],
+                 state: _HashState):
+  _hash_string(hash_obj, f"module:{module.__name__}")
+  if _is_library_module(module.__name__):
+    _hash_library_version(hash_obj, module.__name__)
+    return
+  for name in names:
+    if name not in vars(module):
+      continue
+    if (module.__name__, name) in state.module_attributes:
+      continue
+    state.module_attributes.add((module.__name__, name))
+    _hash_string(hash_obj, name)
+    _hash_referenced_value(hash_obj, vars(module)[name], names, state)
+
+
+# Class attributes that don't affect behavior, or are hashed otherwise.
+_SKIPPED_CLASS_ATTRIBUTES = frozenset(
+    ["__dict__", "__weakref__", "__module__", "__qualname__", "__doc__",
+     "__annotations__", "__slots__", "__abstractmethods__", "_abc_impl",
+     "__dataclass_fields__", "__dataclass_params__"])
+
+
+def _hash_class(hash_obj, cls: type, state: _HashState):
+  _hash_string(hash_obj, f"class:{cls.__module__}.{cls.__qualname__}")
+  if _is_library_module(cls.__module__):
+    _hash_library_version(hash_obj, cls.__module__)
+    return
+  if not state.first_visit(cls):
+    return
+  _hash_value(hash_obj, cls.__bases__, state)
+  for name, value in sorted(vars(cls).items()):
+    if name in _SKIPPED_CLASS_ATTRIBUTES:
+      continue
+    _hash_string(hash_obj, name)
+    if isinstance(value, (staticmethod, classmethod)):
+      value = value.__func__
+    elif isinstance(value, property):
+      value = (value.fget, value.fset, value.fdel)
+    _hash_value(hash_obj, value, state)
+
+
+def _global_names(code: types.CodeType):
+  yield from code.co_names
+  for const in code.co_consts:
+    if isinstance(const, types.CodeType):
+      yield from _global_names(const)
+
+
+def _hash_code(hash_obj, code: types.CodeType, state: _HashState):
+  hash_obj.update(code.co_code)
+  _hash_value(hash_obj, code.co_names, state)
+  _hash_value(hash_obj, code.co_varnames, state)
+  _hash_value(hash_obj, code.co_freevars, state)
+  for const in code.co_consts:
+    _hash_value(hash_obj, const, state)
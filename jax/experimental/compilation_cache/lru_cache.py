@@ -0,0 +1,368 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+import weakref
+
+from jax.experimental.compilation_cache.cache_interface import CacheInterface
+from jax.experimental.compilation_cache.cache_interface import mmap_file
+from absl import logging
+
+_INDEX_FILENAME = "_index.json"
+_JOURNAL_FILENAME = "_index.journal"
+_INDEX_VERSION = 1
+
+_EVICTION_POLICIES = ("lru", "cost")
+
+# The journal is folded into the index file once it holds more records than
+# the index has entries, and at least this many.
+_MIN_JOURNAL_RECORDS = 256
+
+# Access times recorded by lookups are written to the journal at most this
+# often, and when the process exits.
+_ACCESS_FLUSH_INTERVAL_SECS = 60.
+
+
+class _Entry:
+  __slots__ = ["size", "atime", "compile_time"]
+
+  def __init__(self, size: int, atime: float, compile_time: float):
+    self.size = size
+    self.atime = atime
+    self.compile_time = compile_time
+
+  def to_json(self):
+    return {"size": self.size, "atime": self.atime,
+            "compile_time": self.compile_time}
+
+  @staticmethod
+  def from_json(d) -> "_Entry":
+    return _Entry(int(d["size"]), float(d["atime"]),
+                  float(d.get("compile_time", 0.)))
+
+
+def _flush_at_exit(cache_ref):
+  cache = cache_ref()
+  if cache is None or not os.path.isdir(cache._path):
+    return
+  try:
+    cache.flush_index()
+  except OSError as e:
+    logging.warning("Failed to write compilation cache index at exit: %s", e)
+
+
+class LRUCache(CacheInterface):
+  """A size-bounded cache on the local file system.
+
+  Entries are stored one file per key, like ``GFileCache``. In addition, an
+  index in the cache directory records the size, last access time and the
+  compile time saved by each entry, and is used to evict entries once the
+  total size of the cache exceeds ``max_size_bytes``. The index is kept in
+  memory; lookups of absent keys only ``stat`` the index files, to pick up
+  entries written by other processes sharing the directory.
+
+  On disk, the index is a snapshot file plus a journal of the changes made
+  since, so that adding an entry appends to the journal rather than rewriting
+  the whole index. Access times are journaled periodically and when the
+  process exits, so that LRU order is shared between processes.
+
+  Two eviction policies are supported:
+
+  * ``"lru"`` evicts the least recently used entries first.
+  * ``"cost"`` evicts the entries that save the least compile time per byte
+    first, breaking ties by access time.
+  """
+
+  def __init__(self, path: str, max_size_bytes: int,
+               eviction_policy: str = "lru"):
+    """Sets up a cache at 'path'. Cached values may already be present."""
+    if "://" in path and not path.startswith("file://"):
+      raise ValueError(
+          f"LRUCache only supports local file systems, got path {path}")
+    if max_size_bytes <= 0:
+      raise ValueError(
+          f"max_size_bytes must be positive, got {max_size_bytes}")
+    if eviction_policy not in _EVICTION_POLICIES:
+      raise ValueError(
+          f"eviction_policy must be one of {_EVICTION_POLICIES}, got "
+          f"{eviction_policy!r}")
+    if path.startswith("file://"):
+      path = path[len("file://"):]
+    self._path = path
+    self._max_size_bytes = max_size_bytes
+    self._eviction_policy = eviction_policy
+    self._lock = threading.Lock()
+    self._index: Dict[str, _Entry] = {}
+    self._total_size = 0
+    self._index_state: Optional[Tuple] = None
+    self._journal_records = 0
+    self._accessed: Set[str] = set()
+    self._last_flush = time.monotonic()
+    self._last_time = 0.
+    os.makedirs(path, exist_ok=True)
+    with self._lock:
+      self._load_index()
+    atexit.register(_flush_at_exit, weakref.ref(self))
+
+  @property
+  def max_size_bytes(self) -> int:
+    return self._max_size_bytes
+
+  @property
+  def total_size_bytes(self) -> int:
+    return self._total_size
+
+  def __len__(self):
+    return len(self._index)
+
+  def contains(self, key: str) -> bool:
+    """Returns whether 'key' is present, without reading the entry."""
+    if not key:
+      raise ValueError("key cannot be empty")
+    with self._lock:
+      if key not in self._index:
+        self._maybe_reload_index()
+      return key in self._index
+
+  def get(self, key: str):
+    """Returns None if 'key' isn't present."""
+    return self._read(key, use_mmap=False)
+
+  def get_buffer(self, key: str):
+    """Like ``get``, but returns a memory-mapped view of the entry."""
+    return self._read(key, use_mmap=True)
+
+  def _read(self, key: str, use_mmap: bool):
+    if not key:
+      raise ValueError("key cannot be empty")
+    with self._lock:
+      entry = self._index.get(key)
+      if entry is None:
+        # Another process sharing this directory may have written the entry.
+        self._maybe_reload_index()
+        entry = self._index.get(key)
+        if entry is None:
+          return None
+      try:
+        if use_mmap:
+          value = mmap_file(self._key_path(key))
+        else:
+          with open(self._key_path(key), "rb") as f:
+            value = f.read()
+      except FileNotFoundError:
+        # Evicted by another process since the index was last read.
+        self._remove_from_index(key)
+        return None
+      entry.atime = self._now()
+      self._accessed.add(key)
+      if time.monotonic() - self._last_flush >= _ACCESS_FLUSH_INTERVAL_SECS:
+        self._flush_accessed()
+      return value
+
+  def put(self, key: str, value: bytes, compile_time_secs: float = 0.):
+    """Adds new cache entry, evicting older entries if the cache is full.
+
+    Args:
+      key: the cache key.
+      value: the bytes to store.
+      compile_time_secs: the compilation time saved by a hit on this entry,
+        used by the ``"cost"`` eviction policy.
+    """
+    if not key:
+      raise ValueError("key cannot be empty")
+    size = len(value)
+    if size > self._max_size_bytes:
+      logging.warning(
+          "Not writing cache entry %s of size %d bytes, which exceeds the "
+          "maximum cache size of %d bytes.", key, size, self._max_size_bytes)
+      return
+    with self._lock:
+      self._maybe_reload_index()
+      tmp_path = os.path.join(self._path, f"_temp_{key}")
+      with open(tmp_path, "wb") as f:
+        f.write(value)
+        f.flush()
+        os.fsync(f.fileno())
+      os.rename(tmp_path, self._key_path(key))
+      self._remove_from_index(key)
+      entry = _Entry(size, self._now(), compile_time_secs)
+      self._index[key] = entry
+      self._total_size += size
+      self._accessed.discard(key)
+      records: List[Tuple[str, Optional[_Entry]]] = [(key, entry)]
+      records.extend((k, None) for k in self._evict())
+      self._append_journal(records)
+
+  def flush_index(self):
+    """Writes the access times recorded since the last flush to disk."""
+    with self._lock:
+      self._flush_accessed()
+
+  def _now(self) -> float:
+    # Access times must be strictly increasing for LRU order to be well
+    # defined, even if the clock hasn't advanced between two accesses.
+    self._last_time = max(time.time(), self._last_time + 1e-6)
+    return self._last_time
+
+  def _key_path(self, key: str) -> str:
+    return os.path.join(self._path, key)
+
+  def _index_path(self) -> str:
+    return os.path.join(self._path, _INDEX_FILENAME)
+
+  def _journal_path(self) -> str:
+    return os.path.join(self._path, _JOURNAL_FILENAME)
+
+  def _remove_from_index(self, key: str):
+    entry = self._index.pop(key, None)
+    if entry is not None:
+      self._total_size -= entry.size
+
+  def _eviction_order_key(self, item):
+    key, entry = item
+    if self._eviction_policy == "cost":
+      return (entry.compile_time / max(entry.size, 1), entry.atime)
+    return (entry.atime,)
+
+  def _evict(self):
+    """Evicts entries until the cache fits, returning the evicted keys."""
+    evicted = []
+    if self._total_size <= self._max_size_bytes:
+      return evicted
+    for key, entry in sorted(self._index.items(),
+                             key=self._eviction_order_key):
+      if self._total_size <= self._max_size_bytes:
+        break
+      logging.info("Evicting entry %s of size %d bytes from the persistent "
+                   "compilation cache.", key, entry.size)
+      try:
+        os.remove(self._key_path(key))
+      except FileNotFoundError:
+        pass
+      self._remove_from_index(key)
+      self._accessed.discard(key)
+      evicted.append(key)
+    return evicted
+
+  def _stat_index(self):
+    state = []
+    for path in (self._index_path(), self._journal_path()):
+      try:
+        st = os.stat(path)
+        state.append((st.st_mtime_ns, st.st_size, st.st_ino))
+      except FileNotFoundError:
+        state.append(None)
+    return tuple(state)
+
+  def _maybe_reload_index(self):
+    if self._stat_index() != self._index_state:
+      self._load_index()
+
+  def _load_index(self):
+    """Reads the on-disk index, reconciling it with the files present."""
+    on_disk: Dict[str, _Entry] = {}
+    self._index_state = self._stat_index()
+    index_path = self._index_path()
+    try:
+      with open(index_path, "r") as f:
+        data = json.load(f)
+      if data.get("version") == _INDEX_VERSION:
+        on_disk = {k: _Entry.from_json(v) for k, v in data["entries"].items()}
+    except FileNotFoundError:
+      pass
+    except (ValueError, KeyError, TypeError) as e:
+      logging.warning("Ignoring corrupt compilation cache index %s: %s",
+                      index_path, e)
+    self._journal_records = 0
+    try:
+      with open(self._journal_path(), "r") as f:
+        for line in f:
+          self._journal_records += 1
+          try:
+            key, value = json.loads(line)
+            if value is None:
+              on_disk.pop(key, None)
+            else:
+              on_disk[key] = _Entry.from_json(value)
+          except (ValueError, KeyError, TypeError):
+            # A record cut short by a process that died while writing it.
+            continue
+    except FileNotFoundError:
+      pass
+
+    index: Dict[str, _Entry] = {}
+    for name in os.listdir(self._path):
+      if name in (_INDEX_FILENAME, _JOURNAL_FILENAME) or name.startswith("_temp_"):
+        continue
+      entry = on_disk.get(name)
+      if entry is None:
+        # Written without an index, e.g. by GFileCache or another process.
+        try:
+          st = os.stat(self._key_path(name))
+        except FileNotFoundError:
+          # Evicted by another process since it was listed.
+          continue
+        entry = _Entry(st.st_size, st.st_mtime, 0.)
+      old_entry = self._index.get(name)
+      if old_entry is not None:
+        entry.atime = max(entry.atime, old_entry.atime)
+        entry.compile_time = max(entry.compile_time, old_entry.compile_time)
+      index[name] = entry
+    self._index = index
+    self._total_size = sum(e.size for e in index.values())
+
+  def _flush_accessed(self):
+    self._last_flush = time.monotonic()
+    if not self._accessed:
+      return
+    self._maybe_reload_index()
+    records = [(k, self._index[k]) for k in self._accessed if k in self._index]
+    self._accessed.clear()
+    if records:
+      self._append_journal(records)
+
+  def _append_journal(self, records):
+    """Appends (key, entry or None for removals) records to the journal."""
+    if (self._journal_records + len(records) >
+        max(_MIN_JOURNAL_RECORDS, len(self._index))):
+      self._write_index()
+      return
+    lines = "".join(
+        json.dumps([k, None if e is None else e.to_json()]) + "\n"
+        for k, e in records)
+    with open(self._journal_path(), "a") as f:
+      f.write(lines)
+    self._journal_records += len(records)
+    self._index_state = self._stat_index()
+
+  def _write_index(self):
+    """Writes the whole index to the snapshot file and clears the journal."""
+    data = {"version": _INDEX_VERSION,
+            "entries": {k: e.to_json() for k, e in self._index.items()}}
+    tmp_path = os.path.join(self._path, f"_temp_{_INDEX_FILENAME}")
+    with open(tmp_path, "w") as f:
+      json.dump(data, f)
+    os.rename(tmp_path, self._index_path())
+    try:
+      os.remove(self._journal_path())
+    except FileNotFoundError:
+      pass
+    self._journal_records = 0
+    self._accessed.clear()
+    self._index_state = self._stat_index()
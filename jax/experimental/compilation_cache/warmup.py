@@ -0,0 +1,287 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Records the compiles of a run and replays them ahead of time.
+
+While recording, every call of a ``jit``, ``pmap`` or ``pjit`` function that
+may have compiled appends an entry to a manifest file: the function's module
+and qualified name, the values of its static arguments and the abstract values
+of its other arguments. ``warmup`` reads a manifest and compiles each entry
+without executing it, so that the first calls with the recorded argument types
+don't compile:
+
+* ``jit`` functions are traced and compiled into the same in-memory cache that
+  a call uses.
+* ``pjit`` functions are lowered and compiled, which populates the in-memory
+  cache of ``pjit`` as well. ``warmup`` must be called under the same mesh as
+  the recorded calls.
+* ``pmap`` functions are lowered and compiled, which only populates the
+  persistent compilation cache, if it is initialized.
+
+Only calls whose arguments are nests of tuples, lists, dicts and ``None`` with
+array leaves, and whose static arguments are JSON-serializable, are recorded.
+Arrays committed to a device are recorded as if they were uncommitted.
+
+Example::
+
+  # In a representative run:
+  with warmup.record("/tmp/manifest.jsonl"):
+    serve_requests()
+
+  # At service start:
+  warmup.warmup(warmup.load_manifest("/tmp/manifest.jsonl"))
+"""
+
+import concurrent.futures
+import contextlib
+from functools import partial
+import importlib
+import json
+import os
+import threading
+from typing import (Any, Callable, Dict, Iterator, List, Mapping, Optional,
+                    Sequence, Set)
+
+from absl import logging
+import numpy as np
+
+from jax import core
+from jax._src import dispatch
+from jax._src import dtypes
+from jax._src.api_util import shaped_abstractify
+from jax.tree_util import tree_leaves
+
+_MANIFEST_VERSION = 1
+
+_DTYPES_BY_NAME = {np.dtype(t).name: np.dtype(t) for t in dtypes._jax_types}
+
+
+class _Unrecordable(Exception):
+  pass
+
+
+class _Recorder:
+
+  def __init__(self, path: str):
+    self._lock = threading.Lock()
+    self._seen: Set[str] = set()
+    self._file = open(path, "a")
+
+  def __call__(self, kind, fun, args, kwargs, static_argnums, static_argnames):
+    try:
+      line = json.dumps(_make_entry(kind, fun, args, kwargs, static_argnums,
+                                    static_argnames), sort_keys=True)
+    except _Unrecordable as e:
+      logging.debug("Not recording %s call of %s: %s", kind, fun, e)
+      return
+    with self._lock:
+      if line in self._seen or self._file.closed:
+        return
+      self._seen.add(line)
+      self._file.write(line + "\n")
+      self._file.flush()
+
+  def close(self):
+    with self._lock:
+      self._file.close()
+
+
+def start_recording(path: str) -> None:
+  """Starts appending an entry for each compile to the manifest at ``path``."""
+  if dispatch.compile_recorder is not None:
+    raise RuntimeError("Compiles are already being recorded.")
+  dispatch.compile_recorder = _Recorder(path)
+
+
+def stop_recording() -> None:
+  """Stops recording compiles and closes the manifest."""
+  recorder = dispatch.compile_recorder
+  dispatch.compile_recorder = None
+  if isinstance(recorder, _Recorder):
+    recorder.close()
+
+
+@contextlib.contextmanager
+def record(path: str) -> Iterator[None]:
+  """Context manager recording compiles to the manifest at ``path``."""
+  start_recording(path)
+  try:
+    yield
+  finally:
+    stop_recording()
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+  """Reads the entries of a manifest written by ``record``."""
+  entries = []
+  with open(path) as f:
+    for line in f:
+      line = line.strip()
+      if not line:
+        continue
+      entry = json.loads(line)
+      if entry.get("version") != _MANIFEST_VERSION:
+        logging.warning("Skipping manifest entry with unknown version: %s",
+                        line)
+        continue
+      entries.append(entry)
+  return entries
+
+
+def warmup(manifest: Sequence[Mapping[str, Any]],
+           functions: Optional[Mapping[str, Callable]] = None,
+           max_workers: Optional[int] = None) -> int:
+  """Compiles the entries of a manifest ahead of time.
+
+  Args:
+    manifest: the entries returned by ``load_manifest``.
+    functions: optional; maps the ``"module:qualname"`` names of recorded
+      functions to the transformed functions to warm up, for functions that
+      can't be imported by name, e.g. those defined in a function body.
+      Other functions are imported by name.
+    max_workers: optional; the maximum number of compilations to run at once.
+      Defaults to the number of CPUs.
+
+  Returns:
+    The number of entries that were compiled. Entries that fail, e.g. because
+    their function can't be found, are logged and skipped.
+  """
+  functions = functions or {}
+  if max_workers is None:
+    max_workers = os.cpu_count() or 1
+  compiles: List[Callable[[], Any]] = []
+  for entry in manifest:
+    try:
+      fun = _resolve_function(entry, functions)
+      args, kwargs = _placeholder_args(entry)
+      if entry["kind"] == "jit" and hasattr(fun, "_precompile"):
+        compiles.append(partial(fun._precompile, *args, **kwargs))
+      else:
+        # pjit lowers under the mesh of the calling thread, so lower here and
+        # only compile on the thread pool.
+        compiles.append(fun.lower(*args, **kwargs).compile)
+    except Exception as e:  # pylint: disable=broad-except
+      logging.warning("Failed to warm up %s: %s", entry.get("function"), e)
+  if not compiles:
+    return 0
+
+  def run(compile_fn):
+    try:
+      compile_fn()
+      return True
+    except Exception as e:  # pylint: disable=broad-except
+      logging.warning("Failed to warm up a compiled function: %s", e)
+      return False
+
+  # Tracing holds the GIL, but XLA compilation releases it.
+  with concurrent.futures.ThreadPoolExecutor(
+      max_workers=min(max_workers, len(compiles)),
+      thread_name_prefix="jax_warmup") as executor:
+    return sum(executor.map(run, compiles))
+
+
+def _make_entry(kind, fun, args, kwargs, static_argnums, static_argnames):
+  module = getattr(fun, "__module__", None)
+  qualname = getattr(fun, "__qualname__", None)
+  if module is None or qualname is None:
+    raise _Unrecordable("function has no module or qualified name")
+  static_argnums = {i % len(args) for i in static_argnums
+                    if -len(args) <= i < len(args)}
+  static_argnames = set(static_argnames)
+  dyn_leaves = tree_leaves(
+      ([a for i, a in enumerate(args) if i not in static_argnums],
+       {k: v for k, v in kwargs.items() if k not in static_argnames}))
+  if any(isinstance(x, core.Tracer) for x in dyn_leaves):
+    raise _Unrecordable("the call was traced")
+  encoded_args = [_encode_static(a) if i in static_argnums else _encode_tree(a)
+                  for i, a in enumerate(args)]
+  encoded_kwargs = {k: _encode_static(v) if k in static_argnames
+                    else _encode_tree(v) for k, v in kwargs.items()}
+  return {"version": _MANIFEST_VERSION, "kind": kind,
+          "function": f"{module}:{qualname}", "args": encoded_args,
+          "kwargs": encoded_kwargs}
+
+
+def _encode_static(x):
+  try:
+    json.dumps(x)
+  except (TypeError, ValueError) as e:
+    raise _Unrecordable(f"static argument {x!r} isn't JSON-serializable") from e
+  # Tuples and lists are both JSON arrays, so record which one it was.
+  return {"static": x, "tuple": isinstance(x, tuple)}
+
+
+def _encode_tree(x):
+  if x is None:
+    return {"none": None}
+  if type(x) in (tuple, list):
+    return {type(x).__name__: [_encode_tree(y) for y in x]}
+  if type(x) is dict:
+    if not all(isinstance(k, str) for k in x):
+      raise _Unrecordable("dict with non-string keys")
+    return {"dict": {k: _encode_tree(v) for k, v in x.items()}}
+  try:
+    aval = shaped_abstractify(x)
+  except TypeError as e:
+    raise _Unrecordable(f"unsupported argument of type {type(x)}") from e
+  if not isinstance(aval, core.ShapedArray):
+    raise _Unrecordable(f"unsupported abstract value {aval}")
+  return {"aval": [list(aval.shape), aval.dtype.name, aval.weak_type]}
+
+
+def _resolve_function(entry, functions):
+  name = entry["function"]
+  if name in functions:
+    return functions[name]
+  module_name, qualname = name.split(":", 1)
+  if "<" in qualname:
+    raise ValueError(f"{name} can't be imported; pass it in `functions`.")
+  obj: Any = importlib.import_module(module_name)
+  for attr in qualname.split("."):
+    obj = getattr(obj, attr)
+  if not hasattr(obj, "lower"):
+    raise ValueError(f"{name} is not a jit, pmap or pjit function; pass the "
+                     "transformed function in `functions`.")
+  return obj
+
+
+def _placeholder_args(entry):
+  kind = entry["kind"]
+  args = [_decode(a, kind) for a in entry["args"]]
+  kwargs = {k: _decode(v, kind) for k, v in entry["kwargs"].items()}
+  return args, kwargs
+
+
+def _decode(x, kind):
+  if "static" in x:
+    return tuple(x["static"]) if x["tuple"] else x["static"]
+  (tag, value), = x.items()
+  if tag == "none":
+    return None
+  if tag == "tuple":
+    return tuple(_decode(y, kind) for y in value)
+  if tag == "list":
+    return [_decode(y, kind) for y in value]
+  if tag == "dict":
+    return {k: _decode(v, kind) for k, v in value.items()}
+  assert tag == "aval", tag
+  shape, dtype_name, weak_type = value
+  dtype = _DTYPES_BY_NAME[dtype_name]
+  if kind != "pmap":
+    return core.ShapedArray(tuple(shape), dtype, weak_type=weak_type)
+  # pmap only accepts concrete arguments. A broadcast view of a scalar doesn't
+  # allocate memory for the full shape.
+  if weak_type and not shape:
+    return dtype.type(0).item()
+  return np.broadcast_to(np.zeros((), dtype), shape)
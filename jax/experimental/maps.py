@@ -661,7 +661,7 @@ def xmap_impl(fun: lu.WrappedFun, *args, name, in_axes, out_axes_thunk, donated_
                         ("abstract args", in_avals))
   return xmap_callable(*args)
 
-@lu.cache
+@lu.cache(executable_cache=True)
 def make_xmap_callable(fun: lu.WrappedFun,
                        name,
                        in_axes, out_axes_thunk, donated_invars,
@@ -353,6 +353,8 @@ def pjit(fun: Callable,
     for arg in args_flat:
       _check_arg(arg)
     out = pjit_p.bind(*args_flat, **params)
+    if dispatch.compile_recorder is not None:
+      dispatch.compile_recorder("pjit", fun, args, kwargs, static_argnums, ())
     return tree_unflatten(out_tree, out)
 
   def lower(*args, _global_avals=False, **kwargs):
@@ -722,7 +724,7 @@ def _pjit_call_impl(*args, jaxpr,
   return compiled.unsafe_call(*args)
 pjit_p.def_impl(_pjit_call_impl)
 
-@weakref_lru_cache
+@weakref_lru_cache(executable_cache=True)
 def _pjit_lower(
     jaxpr: core.ClosedJaxpr,
     in_axis_resources: Tuple[CanonicalizedParsedPartitionSpec, ...],
@@ -254,6 +254,18 @@ from jax.experimental.sparse.csr import (
     CSR as CSR,
 )
 
+from jax.experimental.sparse.bsr import (
+    bsr_fromdense as bsr_fromdense,
+    bsr_fromdense_p as bsr_fromdense_p,
+    bsr_matmat as bsr_matmat,
+    bsr_matmat_p as bsr_matmat_p,
+    bsr_matvec as bsr_matvec,
+    bsr_matvec_p as bsr_matvec_p,
+    bsr_todense as bsr_todense,
+    bsr_todense_p as bsr_todense_p,
+    BSR as BSR,
+)
+
 from jax.experimental.sparse.random import random_bcoo as random_bcoo
 from jax.experimental.sparse.transform import (
     sparsify as sparsify,
@@ -37,6 +37,7 @@ from jax import core
 from jax import tree_util
 from jax.experimental.sparse._base import JAXSparse
 from jax.experimental.sparse.bcoo import BCOO
+from jax.experimental.sparse.bsr import BSR, _bsr_extract
 from jax.experimental.sparse.coo import COO
 from jax.experimental.sparse.csr import CSR, CSC
 from jax.experimental.sparse.util import _coo_extract
@@ -91,6 +92,9 @@ def _todense_transpose(ct, *bufs, tree):
   elif isinstance(obj, COO):
     _, row, col = bufs
     return _coo_extract(row, col, ct), row, col
+  elif isinstance(obj, BSR):
+    data, indices, indptr = bufs
+    return _bsr_extract(indices, indptr, ct, data.aval.shape[1:]), indices, indptr
   else:
     raise NotImplementedError(f"todense_transpose for {type(obj)}")
 
@@ -116,7 +120,7 @@ def empty(shape, dtype=None, index_dtype='int32', sparse_format='bcoo', **kwds):
   Returns:
     mat: empty sparse matrix.
   """
-  formats = {'bcoo': BCOO, 'coo': COO, 'csr': CSR, 'csc': CSC}
+  formats = {'bcoo': BCOO, 'bsr': BSR, 'coo': COO, 'csr': CSR, 'csc': CSC}
   if sparse_format not in formats:
     raise ValueError(f"sparse_format={sparse_format!r} not recognized; "
                      f"must be one of {list(formats.keys())}")
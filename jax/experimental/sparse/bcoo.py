@@ -17,7 +17,7 @@
 import functools
 from functools import partial
 import operator
-from typing import Any, NamedTuple, Sequence, Tuple
+from typing import Any, Callable, NamedTuple, Sequence, Tuple
 import warnings
 
 import numpy as np
@@ -480,8 +480,15 @@ def bcoo_transpose(mat, *, permutation: Sequence[int]):
   Returns:
     A BCOO-format array.
   """
-  return BCOO(_bcoo_transpose(mat.data, mat.indices, permutation=permutation, spinfo=mat._info),
-              shape=mat._info.shape, unique_indices=mat.unique_indices)
+  buffers = _bcoo_transpose(mat.data, mat.indices, permutation=permutation, spinfo=mat._info)
+  out_shape = tuple(mat.shape[p] for p in permutation)
+  # Permuting batch or dense axes leaves the order of the indices unchanged.
+  sparse_perm = [p - mat.n_batch
+                 for p in permutation[mat.n_batch: mat.n_batch + mat.n_sparse]]
+  indices_sorted = (mat.indices_sorted and
+                    tuple(sparse_perm) == tuple(range(mat.n_sparse)))
+  return BCOO(buffers, shape=out_shape, indices_sorted=indices_sorted,
+              unique_indices=mat.unique_indices)
 
 def _bcoo_transpose(data, indices, *, permutation: Sequence[int], spinfo: BCOOInfo):
   permutation = tuple(permutation)
@@ -588,7 +595,7 @@ def _dot_general_validated_shape(lhs_shape: Shape, rhs_shape: Shape, dimension_n
     lhs, rhs, dimension_numbers=dimension_numbers,
     precision=None, preferred_element_type=None)
 
-def bcoo_dot_general(lhs, rhs, *, dimension_numbers):
+def bcoo_dot_general(lhs, rhs, *, dimension_numbers, nse=None):
   """A general contraction operation.
 
   Args:
@@ -597,6 +604,12 @@ def bcoo_dot_general(lhs, rhs, *, dimension_numbers):
     dimension_numbers: a tuple of tuples of the form
       `((lhs_contracting_dims, rhs_contracting_dims),
       (lhs_batch_dims, rhs_batch_dims))`.
+    nse: integer (optional), only used if both inputs are sparse. If specified,
+      the product is computed by matching the nonzeros of ``lhs`` and ``rhs``
+      with equal contracting indices, which takes memory proportional to
+      ``nse`` rather than to ``lhs.nse * rhs.nse``. ``nse`` bounds the number
+      of nonzero products, and is the nse of the result; products beyond it
+      are dropped.
 
   Returns:
     An ndarray or BCOO-format sparse array containing the result. If both inputs
@@ -607,8 +620,9 @@ def bcoo_dot_general(lhs, rhs, *, dimension_numbers):
     shape = _dot_general_validated_shape(lhs.shape, rhs.shape, dimension_numbers)
     bufs = _bcoo_spdot_general(lhs.data, lhs.indices, rhs.data, rhs.indices,
                                lhs_spinfo=lhs._info, rhs_spinfo=rhs._info,
-                               dimension_numbers=dimension_numbers)
-    return BCOO(bufs, shape=shape)
+                               dimension_numbers=dimension_numbers, nse=nse)
+    # The product is assembled by bcoo_sum_duplicates.
+    return BCOO(bufs, shape=shape, indices_sorted=True, unique_indices=True)
   elif isinstance(lhs, BCOO):
     return _bcoo_dot_general(*lhs._bufs, rhs, dimension_numbers=dimension_numbers,
                              lhs_spinfo=lhs._info)
@@ -661,9 +675,17 @@ def _bcoo_dot_general_impl(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs
     lhs_data = lhs_data.transpose([*batch_perm, *range(n_batch, lhs_data.ndim)])
     lhs_indices = lhs_indices.transpose([*batch_perm, *range(n_batch, lhs_indices.ndim)])
 
+  # Sorted lhs indices remain sorted along any prefix of the sparse dimensions,
+  # which lets the gather from rhs skip sorting, and lets the output be
+  # accumulated with a segment sum over runs of equal output indices.
+  lhs_contracting_s = [d - n_batch for d in lhs_contracting_s]
+  gather_sorted = (lhs_spinfo.indices_sorted and
+                   tuple(lhs_contracting_s) == tuple(range(len(lhs_contracting_s))))
+  scatter_sorted = (lhs_spinfo.indices_sorted and not lhs_contracting_b and
+                    set(lhs_contracting_s) == set(range(n_sparse - len(lhs_contracting_s), n_sparse)))
+
   # Reorder lhs sparse dimensions
   if lhs_contracting_s:
-    lhs_contracting_s = [d - n_batch for d in lhs_contracting_s]
     sparse_perm = jnp.array([*lhs_contracting_s, *remaining(range(n_sparse), lhs_contracting_s)])
     lhs_indices = lhs_indices[..., sparse_perm]
 
@@ -682,9 +704,12 @@ def _bcoo_dot_general_impl(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs
           indexing='ij')[:lhs_indices.ndim - 2]
       idx_right = (*idx_batch, *idx_right)
     batch_dims = list(range(len(lhs_contracting_b) + bool(lhs_contracting_s)))
-    prod = lax.dot_general(lhs_data, rhs.at[idx_right].get(mode='fill', fill_value=0),
-                           (([], []), (batch_dims, batch_dims)))
-    if idx_out:
+    rhs_gathered = rhs.at[idx_right].get(mode='fill', fill_value=0,
+                                         indices_are_sorted=gather_sorted)
+    prod = lax.dot_general(lhs_data, rhs_gathered, (([], []), (batch_dims, batch_dims)))
+    if idx_out and scatter_sorted:
+      return _bcoo_segment_sum(prod, idx_out, out_array.shape)
+    elif idx_out:
       return out_array.at[idx_out].add(prod)
     else:
       return prod.sum(tuple(range(prod.ndim - out_array.ndim)), dtype=out_array.dtype)
@@ -694,6 +719,27 @@ def _bcoo_dot_general_impl(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs
   out_array = jnp.zeros(out_aval.shape, out_aval.dtype)
   return result(out_array, lhs_data, lhs_indices, rhs)
 
+def _bcoo_segment_sum(data, indices, shape):
+  """Sum rows of ``data`` into a dense array of the given shape.
+
+  ``indices`` is a tuple of index arrays into the leading dimensions of ``shape``
+  whose entries must be sorted lexicographically; each run of equal indices is
+  reduced with :func:`jax.ops.segment_sum`. Out-of-bound entries are dropped.
+  """
+  segment_shape = tuple(shape[:len(indices)])
+  num_segments = int(np.prod(segment_shape))
+  valid = functools.reduce(operator.and_, (i < n for i, n in zip(indices, segment_shape)))
+  segment_ids = jnp.ravel_multi_index(indices, segment_shape, mode='clip')
+  # Out-of-bound entries needn't come last: e.g. (0, 6) sorts between (0, 5)
+  # and (1, 0) in shape (5, 6). They are zeroed and given the id of the
+  # preceding entry, so that the ids stay sorted.
+  segment_ids = lax.cummax(jnp.where(valid, segment_ids, 0), axis=0)
+  valid = valid.reshape(valid.shape + (1,) * (data.ndim - 1))
+  data = jnp.where(valid, data, jnp.zeros((), data.dtype))
+  out = jax.ops.segment_sum(data, segment_ids, num_segments=num_segments,
+                            indices_are_sorted=True)
+  return out.reshape(shape)
+
 @bcoo_dot_general_p.def_abstract_eval
 def _bcoo_dot_general_abstract_eval(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_spinfo: BCOOInfo):
   if lhs_data.dtype != rhs.dtype:
@@ -913,7 +959,11 @@ def _bcoo_dot_general_batch_rule(batched_args, batch_dims, *, dimension_numbers,
   new_dimension_numbers, result_batch_dim = _dot_general_batch_dim_nums(
       (len(lhs_spinfo.shape), rhs.ndim), (batch_dims[0], batch_dims[2]), dimension_numbers)
   new_shape = (batch_size, *lhs_spinfo.shape)
-  batched_out = _bcoo_dot_general(lhs_data, lhs_indices, rhs, lhs_spinfo=BCOOInfo(new_shape),
+  new_spinfo = BCOOInfo(
+      shape=new_shape,
+      indices_sorted=lhs_spinfo.indices_sorted,
+      unique_indices=lhs_spinfo.unique_indices)
+  batched_out = _bcoo_dot_general(lhs_data, lhs_indices, rhs, lhs_spinfo=new_spinfo,
                                   dimension_numbers=new_dimension_numbers)
   return batched_out, result_batch_dim
 
@@ -1025,15 +1075,17 @@ mlir.register_lowering(
 bcoo_spdot_general_p = core.Primitive('bcoo_spdot_general')
 bcoo_spdot_general_p.multiple_results = True
 
-def _bcoo_spdot_general(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lhs_spinfo: BCOOInfo, rhs_spinfo: BCOOInfo, dimension_numbers: DotDimensionNumbers):
+def _bcoo_spdot_general(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lhs_spinfo: BCOOInfo, rhs_spinfo: BCOOInfo, dimension_numbers: DotDimensionNumbers, nse=None):
   (lhs_contract, rhs_contract), (lhs_batch, rhs_batch) = dimension_numbers
   cdims = (api_util._ensure_index_tuple(lhs_contract),
            api_util._ensure_index_tuple(rhs_contract))
   bdims = (api_util._ensure_index_tuple(lhs_batch),
            api_util._ensure_index_tuple(rhs_batch))
+  if nse is not None:
+    nse = core.concrete_or_error(operator.index, nse, "nse argument of bcoo_dot_general.")
   return bcoo_spdot_general_p.bind(lhs_data, lhs_indices, rhs_data, rhs_indices,
                                    lhs_spinfo=lhs_spinfo, rhs_spinfo=rhs_spinfo,
-                                   dimension_numbers=(cdims, bdims))
+                                   dimension_numbers=(cdims, bdims), nse=nse)
 
 def _bcoo_spdot_general_unbatched(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lhs_spinfo, rhs_spinfo, lhs_contracting, rhs_contracting):
   lhs_shape = lhs_spinfo.shape
@@ -1082,8 +1134,77 @@ def _bcoo_spdot_general_unbatched(lhs_data, lhs_indices, rhs_data, rhs_indices,
   # See https://github.com/google/jax/issues/10163.
   return _bcoo_sum_duplicates(out_data, out_indices, spinfo=BCOOInfo(shape=out_shape), nse=out_nse)
 
+def _bcoo_spdot_general_unbatched_sorted(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lhs_spinfo, rhs_spinfo, lhs_contracting, rhs_contracting, nse):
+  # Computes the products of lhs and rhs nonzeros with equal contracting
+  # indices only: rhs nonzeros are sorted by their contracting indices, the
+  # range of matching rhs nonzeros of each lhs nonzero is found by binary
+  # search, and the products are enumerated into a buffer of size nse.
+  lhs_shape = lhs_spinfo.shape
+  rhs_shape = rhs_spinfo.shape
+
+  lhs = _validate_bcoo(lhs_data, lhs_indices, lhs_shape)
+  rhs = _validate_bcoo(rhs_data, rhs_indices, rhs_shape)
+
+  assert lhs.n_batch == rhs.n_batch == 0
+  assert lhs.n_dense == rhs.n_dense == 0
+  assert [lhs_shape[d] for d in lhs_contracting] == [rhs_shape[d] for d in rhs_contracting]
+  assert max(lhs_contracting, default=-1) < lhs.n_sparse
+  assert max(rhs_contracting, default=-1) < rhs.n_sparse
+
+  out_shape = (
+    *(s for i, s in enumerate(lhs_shape) if i not in lhs_contracting),
+    *(s for i, s in enumerate(rhs_shape) if i not in rhs_contracting))
+  index_dtype = jnp.result_type(lhs_indices, rhs_indices)
+  out_fill_value = jnp.array(out_shape, dtype=index_dtype)
+
+  if lhs.nse == 0 or rhs.nse == 0:
+    return (jnp.zeros(nse, lhs_data.dtype),
+            jnp.broadcast_to(out_fill_value, (nse, len(out_shape))))
+
+  lhs_i = lhs_indices[:, jnp.array(lhs_contracting, dtype=int)]
+  rhs_i = rhs_indices[:, jnp.array(rhs_contracting, dtype=int)]
+  lhs_j = lhs_indices[:, jnp.array(remaining(range(lhs.n_sparse), lhs_contracting), dtype=int)]
+  rhs_j = rhs_indices[:, jnp.array(remaining(range(rhs.n_sparse), rhs_contracting), dtype=int)]
+
+  contracting_shape = jnp.array([lhs_shape[d] for d in lhs_contracting], dtype=lhs_i.dtype)
+  lhs_valid = (lhs_i < contracting_shape).all(-1)
+  rhs_valid = (rhs_i < contracting_shape.astype(rhs_i.dtype)).all(-1)
+
+  # Key the nonzeros by their contracting indices.
+  if len(lhs_contracting) == 0:
+    lhs_key = jnp.zeros(lhs.nse, dtype='int32')
+    rhs_key = jnp.zeros(rhs.nse, dtype='int32')
+  elif len(lhs_contracting) == 1:
+    lhs_key = lhs_i[:, 0].astype(index_dtype)
+    rhs_key = rhs_i[:, 0].astype(index_dtype)
+  else:
+    _, key = _unique(jnp.concatenate([lhs_i, rhs_i]).astype(index_dtype), axis=0,
+                     return_inverse=True, size=lhs.nse + rhs.nse)
+    lhs_key, rhs_key = key[:lhs.nse], key[lhs.nse:]
+  rhs_key = jnp.where(rhs_valid, rhs_key, jnp.iinfo(rhs_key.dtype).max)
+
+  rhs_perm = jnp.argsort(rhs_key)
+  rhs_key = rhs_key[rhs_perm]
+  start = jnp.searchsorted(rhs_key, lhs_key, side='left')
+  count = jnp.where(lhs_valid, jnp.searchsorted(rhs_key, lhs_key, side='right') - start, 0)
+
+  # Product p multiplies lhs nonzero a with the (p - offset[a])-th rhs nonzero
+  # matching it.
+  end = jnp.cumsum(count)
+  product = jnp.arange(nse)
+  a = jnp.minimum(jnp.searchsorted(end, product, side='right'), lhs.nse - 1)
+  b = rhs_perm[jnp.clip(start[a] + product - (end[a] - count[a]), 0, rhs.nse - 1)]
+  valid = product < end[-1]
+
+  out_data = jnp.where(valid, lhs_data[a] * rhs_data[b], 0)
+  out_indices = jnp.concatenate([lhs_j[a].astype(index_dtype), rhs_j[b].astype(index_dtype)], axis=1)
+  out_indices = jnp.where(valid[:, None], out_indices, out_fill_value)
+  # Note: we do not eliminate zeros here, because it can cause issues with autodiff.
+  # See https://github.com/google/jax/issues/10163.
+  return _bcoo_sum_duplicates(out_data, out_indices, spinfo=BCOOInfo(shape=out_shape), nse=nse)
+
 @bcoo_spdot_general_p.def_impl
-def _bcoo_spdot_general_impl(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lhs_spinfo: BCOOInfo, rhs_spinfo: BCOOInfo, dimension_numbers):
+def _bcoo_spdot_general_impl(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lhs_spinfo: BCOOInfo, rhs_spinfo: BCOOInfo, dimension_numbers, nse):
   lhs_shape = lhs_spinfo.shape
   rhs_shape = rhs_spinfo.shape
 
@@ -1092,7 +1213,8 @@ def _bcoo_spdot_general_impl(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lh
   assert lhs.n_dense == rhs.n_dense == 0
   data_aval, indices_aval = _bcoo_spdot_general_abstract_eval(
     lhs_data.aval, lhs_indices.aval, rhs_data.aval, rhs_indices.aval,
-    lhs_spinfo=lhs_spinfo, rhs_spinfo=rhs_spinfo, dimension_numbers=dimension_numbers)
+    lhs_spinfo=lhs_spinfo, rhs_spinfo=rhs_spinfo, dimension_numbers=dimension_numbers,
+    nse=nse)
   out_shape = _dot_general_validated_shape(lhs_shape, rhs_shape, dimension_numbers)
   _validate_bcoo(data_aval, indices_aval, out_shape)
 
@@ -1107,7 +1229,12 @@ def _bcoo_spdot_general_impl(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lh
   rhs_indices = rhs_indices.transpose([*rhs_batch_perm, *range(rhs.n_batch, rhs_indices.ndim)])
 
   # Implement batched dot product via vmap
-  func = functools.partial(_bcoo_spdot_general_unbatched,
+  func: Callable
+  if nse is None:
+    func = _bcoo_spdot_general_unbatched
+  else:
+    func = functools.partial(_bcoo_spdot_general_unbatched_sorted, nse=nse)
+  func = functools.partial(func,
       lhs_spinfo=BCOOInfo(lhs_shape[lhs.n_batch:]),
       rhs_spinfo=BCOOInfo(rhs_shape[rhs.n_batch:]),
       lhs_contracting=[d - lhs.n_batch for d in lhs_contracting],
@@ -1122,7 +1249,7 @@ def _bcoo_spdot_general_impl(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lh
   return func(lhs_data, lhs_indices, rhs_data, rhs_indices)
 
 @bcoo_spdot_general_p.def_abstract_eval
-def _bcoo_spdot_general_abstract_eval(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lhs_spinfo: BCOOInfo, rhs_spinfo: BCOOInfo, dimension_numbers):
+def _bcoo_spdot_general_abstract_eval(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lhs_spinfo: BCOOInfo, rhs_spinfo: BCOOInfo, dimension_numbers, nse):
   lhs_shape = lhs_spinfo.shape
   rhs_shape = rhs_spinfo.shape
 
@@ -1150,10 +1277,13 @@ def _bcoo_spdot_general_abstract_eval(lhs_data, lhs_indices, rhs_data, rhs_indic
   if rhs.n_batch > len(rhs_batch) and lhs.n_sparse > len(lhs_contracting):
     raise ValueError("bcoo_spdot_general: cannot have unused batch dims on rhs with unused sparse dims on lhs.")
 
-  out_nse = (
-    (lhs.nse if lhs.n_sparse > len(lhs_contracting) else 1) *
-    (rhs.nse if rhs.n_sparse > len(rhs_contracting) else 1)
-  )
+  if nse is not None:
+    out_nse = nse
+  else:
+    out_nse = (
+      (lhs.nse if lhs.n_sparse > len(lhs_contracting) else 1) *
+      (rhs.nse if rhs.n_sparse > len(rhs_contracting) else 1)
+    )
 
   data_shape = (
     *(lhs_shape[dim] for dim in lhs_batch),
@@ -1167,7 +1297,7 @@ def _bcoo_spdot_general_abstract_eval(lhs_data, lhs_indices, rhs_data, rhs_indic
     out_nse, lhs.n_sparse + rhs.n_sparse - 2 * len(lhs_contracting))
   return core.ShapedArray(data_shape, lhs_data.dtype), core.ShapedArray(indices_shape, lhs_indices.dtype)
 
-def _bcoo_spdot_general_batch_rule(batched_args, batch_dims, *, lhs_spinfo: BCOOInfo, rhs_spinfo: BCOOInfo, dimension_numbers):
+def _bcoo_spdot_general_batch_rule(batched_args, batch_dims, *, lhs_spinfo: BCOOInfo, rhs_spinfo: BCOOInfo, dimension_numbers, nse):
   lhs_shape = lhs_spinfo.shape
   rhs_shape = rhs_spinfo.shape
 
@@ -1198,7 +1328,8 @@ def _bcoo_spdot_general_batch_rule(batched_args, batch_dims, *, lhs_spinfo: BCOO
   batched_out = _bcoo_spdot_general(lhs_data, lhs_indices, rhs_data, rhs_indices,
                                     dimension_numbers=new_dimension_numbers,
                                     lhs_spinfo=BCOOInfo(new_lhs_shape),
-                                    rhs_spinfo=BCOOInfo(new_rhs_shape))
+                                    rhs_spinfo=BCOOInfo(new_rhs_shape),
+                                    nse=nse)
   return batched_out, (result_batch_dim, result_batch_dim)
 
 
@@ -1239,6 +1370,8 @@ def bcoo_sort_indices(mat):
   Returns:
     mat_out : BCOO array with sorted indices.
   """
+  if mat.indices_sorted:
+    return mat
   data, indices = bcoo_sort_indices_p.bind(*mat._bufs, spinfo=mat._info)
   return BCOO((data, indices), shape=mat.shape, indices_sorted=True,
               unique_indices=mat.unique_indices)
@@ -1283,7 +1416,10 @@ def _bcoo_sort_indices_batching_rule(batched_args, batch_dims, *, spinfo):
     data = data[None, ...]
   if batch_dims[1] is None:
     indices = indices[None, ...]
-  new_spinfo = BCOOInfo(shape=(max(data.shape[0], indices.shape[0]), *spinfo.shape))
+  new_spinfo = BCOOInfo(
+      shape=(max(data.shape[0], indices.shape[0]), *spinfo.shape),
+      indices_sorted=spinfo.indices_sorted,
+      unique_indices=spinfo.unique_indices)
   data_out, indices_out = bcoo_sort_indices_p.bind(data, indices, spinfo=new_spinfo)
   out_axes = (0, 0)
   # Note: if data is unbatched on input, it will be batched on output.
@@ -1343,6 +1479,8 @@ def bcoo_sum_duplicates(mat, nse=None):
   Returns:
     mat_out : BCOO array with sorted indices and no duplicate indices.
   """
+  if mat.indices_sorted and mat.unique_indices and nse == mat.nse:
+    return mat
   data, indices = _bcoo_sum_duplicates(mat.data, mat.indices, spinfo=mat._info, nse=nse)
   return BCOO((data, indices), shape=mat.shape, indices_sorted=True,
               unique_indices=True)
@@ -1355,7 +1493,8 @@ def _bcoo_sum_duplicates(data, indices, *, spinfo, nse):
 @bcoo_sum_duplicates_p.def_impl
 def _bcoo_sum_duplicates_impl(data, indices, *, spinfo, nse):
   props = _validate_bcoo(data, indices, spinfo.shape)
-  f = functools.partial(_bcoo_sum_duplicates_unbatched, shape=spinfo.shape[props.n_batch:])
+  f = functools.partial(_bcoo_sum_duplicates_unbatched, shape=spinfo.shape[props.n_batch:],
+                        indices_sorted=spinfo.indices_sorted)
   for _ in range(props.n_batch):
     f = vmap(f)
   indices_out, mapping, nse_batched = f(indices)
@@ -1385,7 +1524,7 @@ def _adjust_indices_nse(indices, *, nse, shape):
     indices = lax.concatenate([indices, fill], dimension=indices.ndim - 2)
   return indices
 
-def _bcoo_sum_duplicates_unbatched(indices, *, shape):
+def _bcoo_sum_duplicates_unbatched(indices, *, shape, indices_sorted=False):
   props = _validate_bcoo_indices(indices, shape)
   if props.n_sparse == 0:
     nse = 1
@@ -1394,14 +1533,27 @@ def _bcoo_sum_duplicates_unbatched(indices, *, shape):
     return indices_out, mapping, nse
   fill_value = jnp.expand_dims(jnp.array(shape[:props.n_sparse], dtype=indices.dtype), (0,))
   out_of_bounds = (indices >= fill_value).any(-1, keepdims=True)
+  if indices_sorted:
+    return _bcoo_sum_duplicates_unbatched_sorted(indices, out_of_bounds[:, 0], fill_value)
   indices = jnp.where(out_of_bounds, fill_value, indices)
-  # TODO: check if `indices_sorted` is True.
   indices_unique, inv_idx, nse = _unique(
     indices, axis=0, return_inverse=True, return_true_size=True,
     size=props.nse, fill_value=fill_value)
   nse = nse - (indices == fill_value).any().astype(nse.dtype)
   return indices_unique, inv_idx, nse
 
+def _bcoo_sum_duplicates_unbatched_sorted(indices, out_of_bounds, fill_value):
+  # Duplicates of sorted indices are adjacent, so they can be found without the
+  # sort performed by _unique. Out-of-bounds entries map to the first padding slot.
+  is_new = jnp.ones(indices.shape[0], dtype=bool).at[1:].set(
+    (indices[1:] != indices[:-1]).any(-1))
+  is_new = is_new & ~out_of_bounds
+  nse = is_new.sum(dtype=np.int32)
+  inv_idx = jnp.where(out_of_bounds, nse, jnp.cumsum(is_new, dtype=np.int32) - 1)
+  indices_unique = jnp.broadcast_to(fill_value, indices.shape).at[
+    jnp.where(is_new, inv_idx, indices.shape[0])].set(indices, mode='drop')
+  return indices_unique, inv_idx, nse
+
 @bcoo_sum_duplicates_p.def_abstract_eval
 def _bcoo_sum_duplicates_abstract_eval(data, indices, *, spinfo, nse):
   if nse is None:
@@ -1423,7 +1575,10 @@ def _bcoo_sum_duplicates_batching_rule(batched_args, batch_dims, *, spinfo, nse)
     data = data[None, ...]
   if batch_dims[1] is None:
     indices = indices[None, ...]
-  new_spinfo = BCOOInfo(shape=(max(data.shape[0], indices.shape[0]), *spinfo.shape))
+  new_spinfo = BCOOInfo(
+      shape=(max(data.shape[0], indices.shape[0]), *spinfo.shape),
+      indices_sorted=spinfo.indices_sorted,
+      unique_indices=spinfo.unique_indices)
   data_out, indices_out = bcoo_sum_duplicates_p.bind(data, indices, spinfo=new_spinfo, nse=nse)
   out_axes = (0, 0)
   # Note: if data is unbatched on input, it will be batched on output.
@@ -1438,7 +1593,8 @@ def _bcoo_sum_duplicates_jvp(primals, tangents, *, spinfo, nse):
 
   data, indices = primals
   data_dot, _ = tangents
-  f = functools.partial(_bcoo_sum_duplicates_unbatched, shape=spinfo.shape[props.n_batch:])
+  f = functools.partial(_bcoo_sum_duplicates_unbatched, shape=spinfo.shape[props.n_batch:],
+                        indices_sorted=spinfo.indices_sorted)
   for _ in range(props.n_batch):
     f = broadcasting_vmap(f)
   indices_out, mapping, nse_batched = f(indices)
@@ -1829,7 +1985,16 @@ def bcoo_reduce_sum(mat, *, axes):
   """
   out_data, out_indices, out_shape = _bcoo_reduce_sum(
       mat.data, mat.indices, spinfo=mat._info, axes=axes)
-  return BCOO((out_data, out_indices), shape=out_shape)
+  # Summing over batch axes concatenates indices, and summing over sparse axes
+  # can introduce duplicates; dropping trailing sparse axes preserves the order.
+  batch_axes = [ax for ax in axes if ax < mat.n_batch]
+  sparse_axes = {ax - mat.n_batch for ax in axes
+                 if mat.n_batch <= ax < mat.n_batch + mat.n_sparse}
+  indices_sorted = (mat.indices_sorted and not batch_axes and
+                    all(ax + len(sparse_axes) >= mat.n_sparse for ax in sparse_axes))
+  unique_indices = mat.unique_indices and not batch_axes and not sparse_axes
+  return BCOO((out_data, out_indices), shape=out_shape,
+              indices_sorted=indices_sorted, unique_indices=unique_indices)
 
 def _bcoo_reduce_sum(data, indices, *, spinfo, axes):
   shape = spinfo.shape
@@ -1899,7 +2064,12 @@ def bcoo_multiply_sparse(lhs, rhs):
   out_data, out_indices, out_shape = _bcoo_multiply_sparse(
       lhs.data, lhs.indices, rhs.data, rhs.indices, lhs_spinfo=lhs._info,
       rhs_spinfo=rhs._info)
-  return BCOO((out_data, out_indices), shape=out_shape)
+  # Without broadcasting, the output indices are the matching lhs indices in
+  # their original order.
+  same_layout = lhs.shape == rhs.shape and lhs.n_batch == rhs.n_batch
+  return BCOO((out_data, out_indices), shape=out_shape,
+              indices_sorted=same_layout and lhs.indices_sorted,
+              unique_indices=same_layout and lhs.unique_indices and rhs.unique_indices)
 
 def _bcoo_multiply_sparse(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lhs_spinfo, rhs_spinfo):
   lhs_shape = lhs_spinfo.shape
@@ -2233,18 +2403,7 @@ class BCOO(JAXSparse):
   def transpose(self, axes=None):
     """Create a new array containing the transpose."""
     axes = np.arange(self.ndim)[::-1] if axes is None else axes
-    mat_T = bcoo_transpose(self, permutation=axes)
-    shape_T = tuple(self.shape[i] for i in axes)
-    sparse_perm = [p - self.n_batch
-                   for p in axes[self.n_batch: self.n_batch + self.n_sparse]]
-    if tuple(sparse_perm) == tuple(range(self.n_sparse)):
-      is_sorted = self.indices_sorted
-    else:
-      # TODO: address the corner cases that the transposed indices are sorted.
-      # possibly use permutation?
-      is_sorted = False
-    return BCOO((mat_T.data, mat_T.indices), shape=shape_T,
-                indices_sorted=is_sorted, unique_indices=self.unique_indices)
+    return bcoo_transpose(self, permutation=axes)
 
   def tree_flatten(self):
     return (self.data, self.indices), self._info._asdict()
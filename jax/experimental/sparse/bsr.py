@@ -0,0 +1,511 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""BSR (block compressed sparse row) matrix object and associated primitives."""
+
+import operator
+from typing import Tuple
+
+import numpy as np
+
+import jax
+from jax import core
+from jax import lax
+from jax import tree_util
+from jax.interpreters import ad
+from jax.interpreters import mlir
+from jax.experimental.sparse._base import JAXSparse
+from jax.experimental.sparse.bcoo import BCOO
+from jax.experimental.sparse.util import _csr_to_coo, _safe_asarray
+from jax._src.numpy.lax_numpy import _promote_dtypes
+import jax.numpy as jnp
+
+
+@tree_util.register_pytree_node_class
+class BSR(JAXSparse):
+  """Experimental BSR matrix implemented in JAX.
+
+  A BSR matrix stores dense ``blocksize`` tiles of a 2D matrix in CSR format:
+  ``data`` has shape ``(nblocks, *blocksize)``, and ``indices`` and ``indptr``
+  give the block column of each tile and the extent of each block row. Products
+  with dense arrays are computed as batched dense products of the tiles.
+
+  Args:
+    (data, indices, indptr) : data, block column indices and block row pointers.
+    shape : length-2 tuple giving the matrix shape, a multiple of ``blocksize``.
+    indices_sorted : whether the block column indices are sorted within each
+      block row.
+    unique_indices : whether each block column appears at most once in a block
+      row.
+  """
+  data: jnp.ndarray
+  indices: jnp.ndarray
+  indptr: jnp.ndarray
+  shape: Tuple[int, int]
+  nse = property(lambda self: self.data.size)
+  dtype = property(lambda self: self.data.dtype)
+  nblocks = property(lambda self: self.data.shape[0])
+  blocksize = property(lambda self: tuple(self.data.shape[1:]))
+  indices_sorted: bool
+  unique_indices: bool
+
+  def __init__(self, args, *, shape, indices_sorted=False, unique_indices=False):
+    self.data, self.indices, self.indptr = _safe_asarray(args)
+    self.indices_sorted = indices_sorted
+    self.unique_indices = unique_indices
+    super().__init__(args, shape=shape)
+
+  @classmethod
+  def fromdense(cls, mat, *, blocksize, nblocks=None, index_dtype=np.int32):
+    """Create a BSR array from a dense matrix, storing its nonzero tiles."""
+    mat = jnp.asarray(mat)
+    blocksize = _validate_blocksize(mat.shape, blocksize)
+    if nblocks is None:
+      nblocks = (_to_blocks(mat, blocksize) != 0).any((2, 3)).sum()
+    return cls(bsr_fromdense(mat, nblocks=nblocks, blocksize=blocksize,
+                             index_dtype=index_dtype),
+               shape=mat.shape, indices_sorted=True, unique_indices=True)
+
+  @classmethod
+  def _empty(cls, shape, *, dtype=None, index_dtype='int32', blocksize=(1, 1)):
+    """Create an empty BSR instance. Public method is sparse.empty()."""
+    shape = tuple(shape)
+    if len(shape) != 2:
+      raise ValueError(f"BSR must have ndim=2; got shape={shape}")
+    blocksize = _validate_blocksize(shape, blocksize)
+    data = jnp.empty((0, *blocksize), dtype)
+    indices = jnp.empty(0, index_dtype)
+    indptr = jnp.zeros(shape[0] // blocksize[0] + 1, index_dtype)
+    return cls((data, indices, indptr), shape=shape, indices_sorted=True,
+               unique_indices=True)
+
+  def todense(self):
+    return bsr_todense(self.data, self.indices, self.indptr, shape=self.shape)
+
+  def to_bcoo(self):
+    """Convert to an equivalent :class:`BCOO` array with one index per element.
+
+    The elements are ordered row by row, so the result has sorted indices if the
+    block column indices of ``self`` are sorted.
+    """
+    data, indices = _bsr_to_bcoo(self.data, self.indices, self.indptr, shape=self.shape)
+    return BCOO((data, indices), shape=self.shape,
+                indices_sorted=self.indices_sorted,
+                unique_indices=self.unique_indices)
+
+  def transpose(self, axes=None):
+    assert axes is None or tuple(axes) == (1, 0)
+    data, indices, indptr = _bsr_transpose(self.data, self.indices, self.indptr,
+                                           shape=self.shape)
+    return BSR((data, indices, indptr), shape=self.shape[::-1],
+               indices_sorted=True, unique_indices=self.unique_indices)
+
+  def __matmul__(self, other):
+    if isinstance(other, JAXSparse):
+      raise NotImplementedError("matmul between two sparse objects.")
+    other = jnp.asarray(other)
+    data, other = _promote_dtypes(self.data, other)
+    if other.ndim == 1:
+      return bsr_matvec(data, self.indices, self.indptr, other, shape=self.shape)
+    elif other.ndim == 2:
+      return bsr_matmat(data, self.indices, self.indptr, other, shape=self.shape)
+    else:
+      raise NotImplementedError(f"matmul with object of shape {other.shape}")
+
+  def __rmatmul__(self, other):
+    if isinstance(other, JAXSparse):
+      raise NotImplementedError("matmul between two sparse objects.")
+    other = jnp.asarray(other)
+    data, other = _promote_dtypes(self.data, other)
+    if other.ndim == 1:
+      return bsr_matvec(data, self.indices, self.indptr, other, shape=self.shape,
+                        transpose=True)
+    elif other.ndim == 2:
+      return bsr_matmat(data, self.indices, self.indptr, other.T, shape=self.shape,
+                        transpose=True).T
+    else:
+      raise NotImplementedError(f"matmul with object of shape {other.shape}")
+
+  def tree_flatten(self):
+    return (self.data, self.indices, self.indptr), {
+        "shape": self.shape, "indices_sorted": self.indices_sorted,
+        "unique_indices": self.unique_indices}
+
+
+#--------------------------------------------------------------------
+# utilities
+
+def _validate_blocksize(shape, blocksize):
+  blocksize = tuple(core.concrete_or_error(operator.index, b, "BSR blocksize")
+                    for b in blocksize)
+  if len(shape) != 2 or len(blocksize) != 2:
+    raise ValueError(f"BSR requires a 2D shape and blocksize; got shape={shape}, "
+                     f"blocksize={blocksize}")
+  if any(b <= 0 or s % b for s, b in zip(shape, blocksize)):
+    raise ValueError(f"BSR shape={shape} must be a multiple of blocksize={blocksize}")
+  return blocksize
+
+def _to_blocks(mat, blocksize):
+  """Reshape a dense (M, N) matrix to (M // R, N // C, R, C) tiles."""
+  (M, N), (R, C) = mat.shape, blocksize
+  return mat.reshape(M // R, R, N // C, C).transpose(0, 2, 1, 3)
+
+def _from_blocks(blocks):
+  """Inverse of _to_blocks."""
+  mb, nb, R, C = blocks.shape
+  return blocks.transpose(0, 2, 1, 3).reshape(mb * R, nb * C)
+
+def _bsr_extract(indices, indptr, mat, blocksize):
+  """Extract the tiles of dense matrix mat at given BSR indices."""
+  row, col = _csr_to_coo(indices, indptr)
+  return _to_blocks(mat, blocksize).at[row, col].get(mode='fill', fill_value=0)
+
+def _bsr_to_bcoo(data, indices, indptr, *, shape):
+  nblocks, R, C = data.shape
+  mb = shape[0] // R
+  row, col = _csr_to_coo(indices, indptr)
+  valid = (row < mb)[:, None, None]
+  r = lax.broadcasted_iota(indices.dtype, data.shape, 1)
+  c = lax.broadcasted_iota(indices.dtype, data.shape, 2)
+  b = lax.broadcasted_iota(indices.dtype, data.shape, 0)
+
+  # Within a block row, element (r, c) of the k-th tile goes after the first r
+  # rows of all tiles in the block row and the first k tiles of row r.
+  start = indptr[row][:, None, None]
+  count = (indptr[jnp.minimum(row + 1, mb)] - indptr[row])[:, None, None]
+  dest = start * R * C + r * count * C + (b - start) * C + c
+  # Padding tiles follow indptr[-1], and are left in place.
+  dest = jnp.where(valid, dest, b * R * C + r * C + c).ravel()
+
+  out_row = jnp.where(valid, row[:, None, None] * R + r, shape[0])
+  out_col = jnp.where(valid, col[:, None, None] * C + c, shape[1])
+  out_indices = jnp.column_stack([out_row.ravel(), out_col.ravel()])
+  out_data = jnp.zeros(data.size, data.dtype).at[dest].set(
+      data.ravel(), unique_indices=True)
+  out_indices = jnp.zeros_like(out_indices).at[dest].set(
+      out_indices, unique_indices=True)
+  return out_data, out_indices
+
+def _bsr_transpose(data, indices, indptr, *, shape):
+  nblocks, R, C = data.shape
+  mb, nb = shape[0] // R, shape[1] // C
+  row, col = _csr_to_coo(indices, indptr)
+  # Sort tiles by (column, row), with padding tiles last.
+  col = jnp.where(row < mb, col, nb)
+  col, row, perm = lax.sort((col, row, lax.iota(indices.dtype, nblocks)), num_keys=2)
+  data_T = data[perm].transpose(0, 2, 1)
+  indptr_T = jnp.zeros(nb + 1, dtype=indptr.dtype).at[1:].set(
+      jnp.cumsum(jnp.bincount(col, length=nb).astype(indptr.dtype)))
+  return data_T, row.astype(indices.dtype), indptr_T
+
+
+#--------------------------------------------------------------------
+# bsr_todense
+
+bsr_todense_p = core.Primitive('bsr_todense')
+
+def bsr_todense(data, indices, indptr, *, shape):
+  """Convert BSR-format sparse matrix to a dense matrix.
+
+  Args:
+    data : array of shape ``(nblocks, *blocksize)``.
+    indices : array of shape ``(nblocks,)``
+    indptr : array of shape ``(shape[0] // blocksize[0] + 1,)`` and dtype
+      ``indices.dtype``
+    shape : length-2 tuple representing the matrix shape
+
+  Returns:
+    mat : array with specified shape and dtype matching ``data``
+  """
+  return bsr_todense_p.bind(data, indices, indptr, shape=tuple(shape))
+
+@bsr_todense_p.def_impl
+def _bsr_todense_impl(data, indices, indptr, *, shape):
+  _, R, C = data.shape
+  row, col = _csr_to_coo(indices, indptr)
+  blocks = jnp.zeros((shape[0] // R, shape[1] // C, R, C), data.dtype)
+  return _from_blocks(blocks.at[row, col].add(data, mode='drop'))
+
+@bsr_todense_p.def_abstract_eval
+def _bsr_todense_abstract_eval(data, indices, indptr, *, shape):
+  assert data.ndim == 3
+  assert indices.ndim == indptr.ndim == 1
+  assert indices.dtype == indptr.dtype
+  assert data.shape[:1] == indices.shape
+  assert indptr.shape[0] == shape[0] // data.shape[1] + 1
+  return core.ShapedArray(shape, data.dtype)
+
+def _bsr_todense_jvp(data_dot, data, indices, indptr, *, shape):
+  return bsr_todense(data_dot, indices, indptr, shape=shape)
+
+def _bsr_todense_transpose(ct, data, indices, indptr, *, shape):
+  assert ad.is_undefined_primal(data)
+  if ad.is_undefined_primal(indices) or ad.is_undefined_primal(indptr):
+    raise ValueError("Cannot transpose with respect to sparse indices")
+  assert ct.shape == shape
+  assert ct.dtype == data.aval.dtype
+  return _bsr_extract(indices, indptr, ct, data.aval.shape[1:]), indices, indptr
+
+ad.defjvp(bsr_todense_p, _bsr_todense_jvp, None, None)
+ad.primitive_transposes[bsr_todense_p] = _bsr_todense_transpose
+mlir.register_lowering(bsr_todense_p, mlir.lower_fun(
+    _bsr_todense_impl, multiple_results=False))
+
+#--------------------------------------------------------------------
+# bsr_fromdense
+
+bsr_fromdense_p = core.Primitive('bsr_fromdense')
+bsr_fromdense_p.multiple_results = True
+
+def bsr_fromdense(mat, *, nblocks, blocksize, index_dtype=np.int32):
+  """Create BSR-format sparse matrix from a dense matrix.
+
+  Args:
+    mat : array to be converted to BSR.
+    nblocks : number of tiles of ``mat`` to store.
+    blocksize : length-2 tuple giving the shape of the tiles.
+    index_dtype : dtype of sparse indices
+
+  Returns:
+    data : array of shape ``(nblocks, *blocksize)`` and dtype ``mat.dtype``.
+    indices : array of shape ``(nblocks,)`` and dtype ``index_dtype``
+    indptr : array of shape ``(mat.shape[0] // blocksize[0] + 1,)`` and dtype
+      ``index_dtype``
+  """
+  mat = jnp.asarray(mat)
+  nblocks = core.concrete_or_error(operator.index, nblocks, "nblocks argument of bsr_fromdense()")
+  blocksize = _validate_blocksize(mat.shape, blocksize)
+  return bsr_fromdense_p.bind(mat, nblocks=nblocks, blocksize=blocksize,
+                              index_dtype=np.dtype(index_dtype))
+
+@bsr_fromdense_p.def_impl
+def _bsr_fromdense_impl(mat, *, nblocks, blocksize, index_dtype):
+  mat = jnp.asarray(mat)
+  blocks = _to_blocks(mat, blocksize)
+  mb = blocks.shape[0]
+  nonzero = (blocks != 0).any((2, 3))
+
+  row, col = jnp.nonzero(nonzero, size=nblocks)
+  data = blocks[row, col]
+
+  true_nonzeros = jnp.arange(nblocks) < nonzero.sum()
+  data = jnp.where(true_nonzeros[:, None, None], data, 0)
+  row = jnp.where(true_nonzeros, row, mb)
+  indices = col.astype(index_dtype)
+  indptr = jnp.zeros(mb + 1, dtype=index_dtype).at[1:].set(
+      jnp.cumsum(jnp.bincount(row, length=mb).astype(index_dtype)))
+  return data, indices, indptr
+
+@bsr_fromdense_p.def_abstract_eval
+def _bsr_fromdense_abstract_eval(mat, *, nblocks, blocksize, index_dtype):
+  data = core.ShapedArray((nblocks, *blocksize), mat.dtype)
+  indices = core.ShapedArray((nblocks,), index_dtype)
+  indptr = core.ShapedArray((mat.shape[0] // blocksize[0] + 1,), index_dtype)
+  return data, indices, indptr
+
+def _bsr_fromdense_jvp(primals, tangents, *, nblocks, blocksize, index_dtype):
+  M, = primals
+  Mdot, = tangents
+
+  primals_out = bsr_fromdense(M, nblocks=nblocks, blocksize=blocksize,
+                              index_dtype=index_dtype)
+  data, indices, indptr = primals_out
+
+  if type(Mdot) is ad.Zero:
+    data_dot = ad.Zero.from_value(data)
+  else:
+    data_dot = _bsr_extract(indices, indptr, Mdot, blocksize)
+
+  tangents_out = (data_dot, ad.Zero.from_value(indices), ad.Zero.from_value(indptr))
+
+  return primals_out, tangents_out
+
+def _bsr_fromdense_transpose(ct, M, *, nblocks, blocksize, index_dtype):
+  data, indices, indptr = ct
+  assert len(data) == nblocks
+  assert indices.dtype == indptr.dtype == index_dtype
+  if isinstance(indices, ad.Zero) or isinstance(indptr, ad.Zero):
+    raise ValueError("Cannot transpose with respect to sparse indices")
+  assert ad.is_undefined_primal(M)
+  return bsr_todense(data, indices, indptr, shape=M.aval.shape)
+
+ad.primitive_jvps[bsr_fromdense_p] = _bsr_fromdense_jvp
+ad.primitive_transposes[bsr_fromdense_p] = _bsr_fromdense_transpose
+mlir.register_lowering(bsr_fromdense_p, mlir.lower_fun(
+    _bsr_fromdense_impl, multiple_results=True))
+
+#--------------------------------------------------------------------
+# bsr_matvec and bsr_matmat
+#
+# Both are computed as a batched product of the tiles with the matching
+# blocks of the dense operand, followed by a segment sum over block rows.
+
+def _bsr_matmat_impl(data, indices, indptr, B, *, shape, transpose):
+  _, R, C = data.shape
+  mb, nb = shape[0] // R, shape[1] // C
+  row, col = _csr_to_coo(indices, indptr)
+  if transpose:
+    B_blocks = B.reshape(mb, R, -1).at[row].get(mode='fill', fill_value=0)
+    prod = lax.dot_general(data, B_blocks, (([1], [1]), ([0], [0])))
+    out = jax.ops.segment_sum(prod, col, num_segments=nb)
+    return out.reshape(shape[1], -1)
+  else:
+    B_blocks = B.reshape(nb, C, -1).at[col].get(mode='fill', fill_value=0)
+    prod = lax.dot_general(data, B_blocks, (([2], [1]), ([0], [0])))
+    out = jax.ops.segment_sum(prod, row, num_segments=mb, indices_are_sorted=True)
+    return out.reshape(shape[0], -1)
+
+def _bsr_matmat_abstract_eval_shape(data, indices, indptr, B, *, shape, transpose):
+  assert len(shape) == 2
+  assert data.ndim == 3
+  assert indices.ndim == indptr.ndim == 1
+  assert data.shape[:1] == indices.shape
+  assert data.dtype == B.dtype
+  assert indices.dtype == indptr.dtype
+  assert indptr.shape[0] == shape[0] // data.shape[1] + 1
+  assert B.shape[0] == (shape[0] if transpose else shape[1])
+  return shape[1] if transpose else shape[0]
+
+bsr_matvec_p = core.Primitive('bsr_matvec')
+
+def bsr_matvec(data, indices, indptr, v, *, shape, transpose=False):
+  """Product of BSR sparse matrix and a dense vector.
+
+  Args:
+    data : array of shape ``(nblocks, *blocksize)``.
+    indices : array of shape ``(nblocks,)``
+    indptr : array of shape ``(shape[0] // blocksize[0] + 1,)`` and dtype
+      ``indices.dtype``
+    v : array of shape ``(shape[0] if transpose else shape[1],)``
+      and dtype ``data.dtype``
+    shape : length-2 tuple representing the matrix shape
+    transpose : boolean specifying whether to transpose the sparse matrix
+      before computing.
+
+  Returns:
+    y : array of shape ``(shape[1] if transpose else shape[0],)`` representing
+      the matrix vector product.
+  """
+  return bsr_matvec_p.bind(data, indices, indptr, v, shape=tuple(shape),
+                           transpose=transpose)
+
+@bsr_matvec_p.def_impl
+def _bsr_matvec_impl(data, indices, indptr, v, *, shape, transpose):
+  return _bsr_matmat_impl(data, indices, indptr, v[:, None], shape=shape,
+                          transpose=transpose)[:, 0]
+
+@bsr_matvec_p.def_abstract_eval
+def _bsr_matvec_abstract_eval(data, indices, indptr, v, *, shape, transpose):
+  assert v.ndim == 1
+  out_shape = _bsr_matmat_abstract_eval_shape(data, indices, indptr, v, shape=shape,
+                                              transpose=transpose)
+  return core.ShapedArray((out_shape,), data.dtype)
+
+def _bsr_matvec_jvp_mat(data_dot, data, indices, indptr, v, *, shape, transpose):
+  return bsr_matvec(data_dot, indices, indptr, v, shape=shape, transpose=transpose)
+
+def _bsr_matvec_jvp_vec(v_dot, data, indices, indptr, v, *, shape, transpose):
+  return bsr_matvec(data, indices, indptr, v_dot, shape=shape, transpose=transpose)
+
+def _bsr_matvec_transpose(ct, data, indices, indptr, v, *, shape, transpose):
+  assert not ad.is_undefined_primal(indices)
+  assert not ad.is_undefined_primal(indptr)
+
+  if ad.is_undefined_primal(v):
+    return data, indices, indptr, bsr_matvec(data, indices, indptr, ct, shape=shape,
+                                             transpose=not transpose)
+  else:
+    v = jnp.asarray(v)
+    data_ct = _bsr_data_transpose(ct[:, None], v[:, None], indices, indptr,
+                                  blocksize=data.aval.shape[1:], shape=shape,
+                                  transpose=transpose)
+    return data_ct, indices, indptr, v
+
+ad.defjvp(bsr_matvec_p, _bsr_matvec_jvp_mat, None, None, _bsr_matvec_jvp_vec)
+ad.primitive_transposes[bsr_matvec_p] = _bsr_matvec_transpose
+mlir.register_lowering(bsr_matvec_p, mlir.lower_fun(
+    _bsr_matvec_impl, multiple_results=False))
+
+
+bsr_matmat_p = core.Primitive('bsr_matmat')
+
+def bsr_matmat(data, indices, indptr, B, *, shape, transpose=False):
+  """Product of BSR sparse matrix and a dense matrix.
+
+  Args:
+    data : array of shape ``(nblocks, *blocksize)``.
+    indices : array of shape ``(nblocks,)``
+    indptr : array of shape ``(shape[0] // blocksize[0] + 1,)`` and dtype
+      ``indices.dtype``
+    B : array of shape ``(shape[0] if transpose else shape[1], cols)`` and
+      dtype ``data.dtype``
+    shape : length-2 tuple representing the matrix shape
+    transpose : boolean specifying whether to transpose the sparse matrix
+      before computing.
+
+  Returns:
+    C : array of shape ``(shape[1] if transpose else shape[0], cols)``
+      representing the matrix-matrix product.
+  """
+  return bsr_matmat_p.bind(data, indices, indptr, B, shape=tuple(shape),
+                           transpose=transpose)
+
+bsr_matmat_p.def_impl(_bsr_matmat_impl)
+
+@bsr_matmat_p.def_abstract_eval
+def _bsr_matmat_abstract_eval(data, indices, indptr, B, *, shape, transpose):
+  assert B.ndim == 2
+  out_shape = _bsr_matmat_abstract_eval_shape(data, indices, indptr, B, shape=shape,
+                                              transpose=transpose)
+  return core.ShapedArray((out_shape, B.shape[1]), data.dtype)
+
+def _bsr_matmat_jvp_left(data_dot, data, indices, indptr, B, *, shape, transpose):
+  return bsr_matmat(data_dot, indices, indptr, B, shape=shape, transpose=transpose)
+
+def _bsr_matmat_jvp_right(B_dot, data, indices, indptr, B, *, shape, transpose):
+  return bsr_matmat(data, indices, indptr, B_dot, shape=shape, transpose=transpose)
+
+def _bsr_matmat_transpose(ct, data, indices, indptr, B, *, shape, transpose):
+  assert not ad.is_undefined_primal(indices)
+  assert not ad.is_undefined_primal(indptr)
+
+  if ad.is_undefined_primal(B):
+    return data, indices, indptr, bsr_matmat(data, indices, indptr, ct, shape=shape,
+                                             transpose=not transpose)
+  else:
+    B = jnp.asarray(B)
+    data_ct = _bsr_data_transpose(ct, B, indices, indptr,
+                                  blocksize=data.aval.shape[1:], shape=shape,
+                                  transpose=transpose)
+    return data_ct, indices, indptr, B
+
+def _bsr_data_transpose(ct, B, indices, indptr, *, blocksize, shape, transpose):
+  # The cotangent of each tile is the product of the matching blocks of the
+  # output cotangent and of the dense operand.
+  R, C = blocksize
+  mb, nb = shape[0] // R, shape[1] // C
+  row, col = _csr_to_coo(indices, indptr)
+  if transpose:
+    B_blocks = B.reshape(mb, R, -1).at[row].get(mode='fill', fill_value=0)
+    ct_blocks = ct.reshape(nb, C, -1).at[col].get(mode='fill', fill_value=0)
+    return lax.dot_general(B_blocks, ct_blocks, (([2], [2]), ([0], [0])))
+  else:
+    ct_blocks = ct.reshape(mb, R, -1).at[row].get(mode='fill', fill_value=0)
+    B_blocks = B.reshape(nb, C, -1).at[col].get(mode='fill', fill_value=0)
+    return lax.dot_general(ct_blocks, B_blocks, (([2], [2]), ([0], [0])))
+
+ad.defjvp(bsr_matmat_p, _bsr_matmat_jvp_left, None, None, _bsr_matmat_jvp_right)
+ad.primitive_transposes[bsr_matmat_p] = _bsr_matmat_transpose
+mlir.register_lowering(bsr_matmat_p, mlir.lower_fun(
+    _bsr_matmat_impl, multiple_results=False))
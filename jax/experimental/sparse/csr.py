@@ -30,6 +30,7 @@ from jax.experimental.sparse.util import _csr_to_coo, _csr_extract, _safe_asarra
 from jax import lax
 from jax import tree_util
 from jax._src.lax.lax import _const
+from jax._src.lib import cpu_sparse
 from jax._src.lib import gpu_sparse
 from jax._src.lib import sparse_apis
 from jax._src.numpy.lax_numpy import _promote_dtypes
@@ -224,6 +225,15 @@ def _csr_todense_gpu_lowering(csr_todense_mhlo, ctx, data, indices, indptr, *,
       index_dtype=indices_aval.dtype)]
 
 
+def _csr_todense_cpu_lowering(ctx, data, indices, indptr, *, shape):
+  data_aval, indices_aval, _ = ctx.avals_in
+  if not cpu_sparse.is_supported(data_aval.dtype, indices_aval.dtype):
+    return _csr_todense_lowering(ctx, data, indices, indptr, shape=shape)
+  return [cpu_sparse.csr_todense_mhlo(
+      data, indices, indptr, shape=shape, data_dtype=data_aval.dtype,
+      index_dtype=indices_aval.dtype)]
+
+
 def _csr_todense_jvp(data_dot, data, indices, indptr, *, shape):
   return csr_todense(data_dot, indices, indptr, shape=shape)
 
@@ -253,6 +263,10 @@ if gpu_sparse:
         partial(_csr_todense_gpu_lowering, gpu_sparse.rocm_csr_todense),
         platform='rocm')
 
+if cpu_sparse:
+  mlir.register_lowering(csr_todense_p, _csr_todense_cpu_lowering,
+                         platform='cpu')
+
 if sparse_apis and sparse_apis.is_supported:
   mlir.register_lowering(
       csr_todense_p,
@@ -423,6 +437,18 @@ def _csr_matvec_gpu_lowering(csr_matvec_mhlo, ctx, data, indices, indptr, v, *,
       data_dtype=dtype, index_dtype=indices_aval.dtype, x_dtype=v_aval.dtype)]
 
 
+def _csr_matvec_cpu_lowering(ctx, data, indices, indptr, v, *, shape,
+                             transpose):
+  data_aval, indices_aval, _, v_aval = ctx.avals_in
+  if not cpu_sparse.is_supported(data_aval.dtype, indices_aval.dtype):
+    return _csr_matvec_lowering(ctx, data, indices, indptr, v, shape=shape,
+                                transpose=transpose)
+  return [cpu_sparse.csr_matvec_mhlo(
+      data, indices, indptr, v, shape=shape, transpose=transpose,
+      data_dtype=data_aval.dtype, index_dtype=indices_aval.dtype,
+      x_dtype=v_aval.dtype)]
+
+
 def _csr_matvec_jvp_mat(data_dot, data, indices, indptr, v, *, shape, transpose):
   return csr_matvec(data_dot, indices, indptr, v, shape=shape, transpose=transpose)
 
@@ -458,6 +484,10 @@ if gpu_sparse:
         partial(_csr_matvec_gpu_lowering, gpu_sparse.rocm_csr_matvec),
         platform='rocm')
 
+if cpu_sparse:
+  mlir.register_lowering(csr_matvec_p, _csr_matvec_cpu_lowering,
+                         platform='cpu')
+
 if sparse_apis and sparse_apis.is_supported:
   mlir.register_lowering(
       csr_matvec_p,
@@ -523,6 +553,18 @@ def _csr_matmat_gpu_lowering(csr_matmat_mhlo, ctx, data, indices, indptr, B, *,
       B_dtype=B_aval.dtype)]
 
 
+def _csr_matmat_cpu_lowering(ctx, data, indices, indptr, B, *, shape,
+                             transpose):
+  data_aval, indices_aval, _, B_aval = ctx.avals_in
+  if not cpu_sparse.is_supported(data_aval.dtype, indices_aval.dtype):
+    return _csr_matmat_lowering(ctx, data, indices, indptr, B, shape=shape,
+                                transpose=transpose)
+  return [cpu_sparse.csr_matmat_mhlo(
+      data, indices, indptr, B, shape=shape, transpose=transpose,
+      index_dtype=indices_aval.dtype, data_dtype=data_aval.dtype,
+      B_dtype=B_aval.dtype)]
+
+
 def _csr_matmat_jvp_left(data_dot, data, indices, indptr, B, *, shape, transpose):
   return csr_matmat(data_dot, indices, indptr, B, shape=shape, transpose=transpose)
 
@@ -556,6 +598,10 @@ if gpu_sparse:
         partial(_csr_matmat_gpu_lowering, gpu_sparse.rocm_csr_matmat),
         platform='rocm')
 
+if cpu_sparse:
+  mlir.register_lowering(csr_matmat_p, _csr_matmat_cpu_lowering,
+                         platform='cpu')
+
 if sparse_apis and sparse_apis.is_supported:
   mlir.register_lowering(
       csr_matmat_p,
@@ -48,7 +48,7 @@ DeviceArray([-1.2655463 , -0.52060574, -0.14522289, -0.10817424,
 
 import functools
 from typing import (
-  Any, Callable, Dict, NamedTuple, List, Optional, Sequence, Tuple, Union)
+  Any, Callable, Dict, NamedTuple, List, Optional, Sequence, Set, Tuple, Union)
 
 import numpy as np
 
@@ -67,10 +67,14 @@ from jax._src.lax.control_flow import _check_tree_and_avals
 from jax._src.numpy import lax_numpy
 from jax._src.util import canonicalize_axis
 from jax.experimental import sparse
-from jax.experimental.sparse import BCOO
+from jax.experimental.sparse import BCOO, BSR
 
 sparse_rules : Dict[core.Primitive, Callable] = {}
 
+# Primitives whose sparse rules accept BSR arrays. BSR arguments of other
+# primitives are converted to BCOO before their sparse rule is applied.
+_bsr_sparse_rules : Set[core.Primitive] = set()
+
 _zero_preserving_unary_primitives = [
   lax.abs_p,
   lax.asin_p,
@@ -127,11 +131,17 @@ class SparsifyEnv:
   The environment is essentially a collection of buffers and/or tracers
   that may be shared between one or more SparsifyValue objects, which
   represent sparse or dense arrays via indices into the list of buffers.
+  BSR arrays additionally refer to their ``indptr`` buffer.
+
+  ``spdot_nse`` is the ``nse`` passed to ``bcoo_dot_general`` for products of
+  two sparse arrays.
   """
   _buffers : List[Array]
+  spdot_nse : Optional[int]
 
-  def __init__(self, bufs=()):
+  def __init__(self, bufs=(), *, spdot_nse=None):
     self._buffers = list(bufs)
+    self.spdot_nse = spdot_nse
 
   def _push(self, arr: Array) -> int:
     self._buffers.append(jnp.asarray(arr))  # type: ignore
@@ -149,14 +159,24 @@ class SparsifyEnv:
       raise RuntimeError("Internal: requested indices from spvalue with indices_ref=None")
     return self._buffers[spvalue.indices_ref]
 
+  def indptr(self, spvalue: 'SparsifyValue') -> Array:
+    """Get the indptr buffer associated with a BSR SparsifyValue."""
+    if spvalue.indptr_ref is None:
+      raise RuntimeError("Internal: requested indptr from spvalue with indptr_ref=None")
+    return self._buffers[spvalue.indptr_ref]
+
   def dense(self, data):
     """Add a new dense array to the sparsify environment."""
     return SparsifyValue(np.shape(data), self._push(data), None)
 
   def sparse(self, shape, data=None, indices=None,
-             *, data_ref=None, indices_ref=None, indices_sorted=False,
-             unique_indices=False):
-    """Add a new sparse array to the sparsify environment."""
+             *, data_ref=None, indices_ref=None, indptr=None, indptr_ref=None,
+             indices_sorted=False, unique_indices=False):
+    """Add a new sparse array to the sparsify environment.
+
+    The array is a BSR array if ``indptr`` or ``indptr_ref`` is given, and a
+    BCOO array otherwise.
+    """
     if data is not None:
       assert data_ref is None
       data_ref = self._push(data)
@@ -169,8 +189,14 @@ class SparsifyEnv:
     else:
       assert indices_ref is not None and indices_ref < len(self._buffers)
 
+    if indptr is not None:
+      assert indptr_ref is None
+      indptr_ref = self._push(indptr)
+    else:
+      assert indptr_ref is None or indptr_ref < len(self._buffers)
+
     return SparsifyValue(shape, data_ref, indices_ref, indices_sorted,
-                         unique_indices)
+                         unique_indices, indptr_ref)
 
 
 class SparsifyValue(NamedTuple):
@@ -179,6 +205,7 @@ class SparsifyValue(NamedTuple):
   indices_ref: Optional[int]
   indices_sorted: Optional[bool] = False
   unique_indices: Optional[bool] = False
+  indptr_ref: Optional[int] = None
 
   @property
   def ndim(self):
@@ -187,8 +214,11 @@ class SparsifyValue(NamedTuple):
   def is_sparse(self):
     return self.indices_ref is not None
 
+  def is_bsr(self):
+    return self.indptr_ref is not None
 
-_is_bcoo = lambda arg: isinstance(arg, BCOO)
+
+_is_sparse_array = lambda arg: isinstance(arg, (BCOO, BSR))
 _is_spvalue = lambda arg: isinstance(arg, SparsifyValue)
 
 
@@ -198,13 +228,17 @@ def arrays_to_spvalues(
     ) -> Any:
   """Convert a pytree of (sparse) arrays to an equivalent pytree of spvalues."""
   def array_to_spvalue(arg):
-    if isinstance(arg, BCOO):
+    if isinstance(arg, BSR):
+      return spenv.sparse(arg.shape, arg.data, arg.indices, indptr=arg.indptr,
+                          indices_sorted=arg.indices_sorted,
+                          unique_indices=arg.unique_indices)
+    elif isinstance(arg, BCOO):
       return spenv.sparse(arg.shape, arg.data, arg.indices,
                           indices_sorted=arg.indices_sorted,
                           unique_indices=arg.unique_indices)
     else:
       return spenv.dense(arg)
-  return tree_map(array_to_spvalue, args, is_leaf=_is_bcoo)
+  return tree_map(array_to_spvalue, args, is_leaf=_is_sparse_array)
 
 
 def spvalues_to_arrays(
@@ -213,7 +247,11 @@ def spvalues_to_arrays(
     ) -> Any:
   """Convert a pytree of spvalues to an equivalent pytree of (sparse) arrays."""
   def spvalue_to_array(spvalue):
-    if spvalue.is_sparse():
+    if spvalue.is_bsr():
+      return BSR((spenv.data(spvalue), spenv.indices(spvalue), spenv.indptr(spvalue)),
+                 shape=spvalue.shape, indices_sorted=spvalue.indices_sorted,
+                 unique_indices=spvalue.unique_indices)
+    elif spvalue.is_sparse():
       assert spvalue.indices_ref is not None
       return BCOO((spenv.data(spvalue), spenv.indices(spvalue)),
                   shape=spvalue.shape, indices_sorted=spvalue.indices_sorted,
@@ -234,6 +272,29 @@ def spvalues_to_avals(
   return tree_map(spvalue_to_aval, spvalues, is_leaf=_is_spvalue)
 
 
+def _apply_sparse_rule(
+    spenv: SparsifyEnv,
+    primitive: core.Primitive,
+    spvalues: Sequence[SparsifyValue],
+    params: Dict[str, Any],
+    ) -> Sequence[SparsifyValue]:
+  """Apply the sparse rule of a primitive, converting BSR arguments to BCOO
+  unless the rule accepts them."""
+  if primitive not in sparse_rules:
+    _raise_unimplemented_primitive(primitive)
+  if primitive not in _bsr_sparse_rules:
+    spvalues = [_bsr_spvalue_to_bcoo(spenv, spvalue) if spvalue.is_bsr() else spvalue
+                for spvalue in spvalues]
+  return sparse_rules[primitive](spenv, *spvalues, **params)
+
+def _bsr_spvalue_to_bcoo(spenv, spvalue):
+  # The elements are ordered row by row, so the indices stay sorted.
+  mat = spvalues_to_arrays(spenv, spvalue).to_bcoo()
+  return spenv.sparse(mat.shape, mat.data, mat.indices,
+                      indices_sorted=mat.indices_sorted,
+                      unique_indices=mat.unique_indices)
+
+
 #------------------------------------------------------------------------------
 # Implementation of sparsify() using tracers.
 
@@ -285,9 +346,7 @@ class SparseTrace(core.Trace):
     spenv = popattr(self.main, 'spenv')
     spvalues = [t._spvalue for t in tracers]
     if any(spvalue.is_sparse() for spvalue in spvalues):
-      if primitive not in sparse_rules:
-        _raise_unimplemented_primitive(primitive)
-      out_spvalues = sparse_rules[primitive](spenv, *(t._spvalue for t in tracers), **params)
+      out_spvalues = _apply_sparse_rule(spenv, primitive, spvalues, params)
     else:
       out_bufs = primitive.bind(*(spenv.data(spvalue) for spvalue in spvalues), **params)
       out_spvalues = arrays_to_spvalues(spenv, out_bufs if primitive.multiple_results else [out_bufs])
@@ -304,12 +363,12 @@ class SparseTrace(core.Trace):
       raise NotImplementedError("sparsify does not support donated_invars")
     params = dict(params, donated_invars=tuple(False for buf in in_bufs))
     bufs_out = call_primitive.bind(fun, *in_bufs, **params)
-    setnewattr(self.main, 'spenv', SparsifyEnv(bufs_out))
+    setnewattr(self.main, 'spenv', SparsifyEnv(bufs_out, spdot_nse=spenv.spdot_nse))
     return [SparseTracer(self, spvalue=spvalue) for spvalue in out_spvalues()]
 
 @lu.transformation_with_aux
 def sparsify_subtrace(main, spvalues, *bufs):
-  setnewattr(main, 'spenv', SparsifyEnv(bufs))
+  setnewattr(main, 'spenv', SparsifyEnv(bufs, spdot_nse=main.spdot_nse))
   trace = main.with_cur_sublevel()
   in_tracers = [SparseTracer(trace, spvalue=spvalue) for spvalue in spvalues]
   outs = yield in_tracers, {}
@@ -317,9 +376,10 @@ def sparsify_subtrace(main, spvalues, *bufs):
   buffers = popattr(main, 'spenv')._buffers
   yield buffers, [out._spvalue for out in out_traces]
 
-def sparsify_fun(wrapped_fun, args: List[ArrayOrSparse]):
+def sparsify_fun(wrapped_fun, args: List[ArrayOrSparse], spdot_nse=None):
   with core.new_main(SparseTrace) as main:
-    spenv = SparsifyEnv()
+    main.spdot_nse = spdot_nse  # type: ignore
+    spenv = SparsifyEnv(spdot_nse=spdot_nse)
     spvalues = arrays_to_spvalues(spenv, args)
     in_bufs = spenv._buffers
     fun, out_spvalues = sparsify_subtrace(wrapped_fun, main, spvalues)
@@ -328,13 +388,13 @@ def sparsify_fun(wrapped_fun, args: List[ArrayOrSparse]):
     del main
   return spvalues_to_arrays(spenv, out_spvalues())
 
-def _sparsify_with_tracer(fun):
+def _sparsify_with_tracer(fun, spdot_nse=None):
   """Implementation of sparsify() using tracers."""
   @functools.wraps(fun)
   def _wrapped(*args):
-    args_flat, in_tree = tree_flatten(args, is_leaf=_is_bcoo)
+    args_flat, in_tree = tree_flatten(args, is_leaf=_is_sparse_array)
     wrapped_fun, out_tree = flatten_fun_nokwargs(lu.wrap_init(fun), in_tree)
-    out = sparsify_fun(wrapped_fun, args_flat)
+    out = sparsify_fun(wrapped_fun, args_flat, spdot_nse=spdot_nse)
     return tree_unflatten(out_tree(), out)
   return _wrapped
 
@@ -374,10 +434,9 @@ def eval_sparse(
     prim = eqn.primitive
     invals = safe_map(read, eqn.invars)
 
+    out: Sequence[Optional[SparsifyValue]]
     if any(val.is_sparse() for val in invals):
-      if prim not in sparse_rules:
-        _raise_unimplemented_primitive(prim)
-      out = sparse_rules[prim](spenv, *invals, **eqn.params)
+      out = _apply_sparse_rule(spenv, prim, invals, eqn.params)
     else:
       if prim is xla.xla_call_p:
         # TODO(vanderplas,frostig): workaround for binding call primitives
@@ -388,12 +447,8 @@ def eval_sparse(
       else:
         out_bufs = prim.bind(*(spenv.data(val) for val in invals), **eqn.params)
       out_bufs = out_bufs if prim.multiple_results else [out_bufs]
-      out = []
-      for buf, outvar in safe_zip(out_bufs, eqn.outvars):
-        if isinstance(outvar, core.DropVar):
-          out.append(None)
-        else:
-          out.append(spenv.dense(buf))
+      out = [None if isinstance(outvar, core.DropVar) else spenv.dense(buf)
+             for buf, outvar in safe_zip(out_bufs, eqn.outvars)]
     safe_map(write, eqn.outvars, out)
 
   return safe_map(read, jaxpr.outvars)
@@ -411,21 +466,32 @@ def sparsify_raw(f):
     return result, out_tree()
   return wrapped
 
-def _sparsify_with_interpreter(f):
+def _sparsify_with_interpreter(f, spdot_nse=None):
   """Implementation of sparsify() using jaxpr interpreter."""
   f_raw = sparsify_raw(f)
   @functools.wraps(f)
   def wrapped(*args, **params):
-    spenv = SparsifyEnv()
+    spenv = SparsifyEnv(spdot_nse=spdot_nse)
     spvalues = arrays_to_spvalues(spenv, args)
     spvalues_out, out_tree = f_raw(spenv, *spvalues, **params)
     out = spvalues_to_arrays(spenv, spvalues_out)
     return tree_unflatten(out_tree, out)
   return wrapped
 
-def sparsify(f, use_tracer=False):
+def sparsify(f, use_tracer=False, *, spdot_nse=None):
   """Experimental sparsification transform.
 
+  :class:`jax.experimental.sparse.BSR` arguments keep their block structure
+  through elementwise zero-preserving operations, transposes, and products
+  with dense vectors and matrices, which are computed as products of the dense
+  tiles. Other operations convert them to
+  :class:`jax.experimental.sparse.BCOO` arrays with one index per element.
+
+  If ``spdot_nse`` is given, products of two sparse arrays are computed by
+  :func:`jax.experimental.sparse.bcoo_dot_general` with ``nse=spdot_nse``, in
+  memory proportional to ``spdot_nse`` rather than to the product of the
+  operands' numbers of specified elements.
+
   Examples:
 
     Decorate JAX functions to make them compatible with :class:`jax.experimental.sparse.BCOO`
@@ -445,9 +511,9 @@ def sparsify(f, use_tracer=False):
     DeviceArray([ 64,  82, 100, 118], dtype=int32)
   """
   if use_tracer:
-    return _sparsify_with_tracer(f)
+    return _sparsify_with_tracer(f, spdot_nse)
   else:
-    return _sparsify_with_interpreter(f)
+    return _sparsify_with_interpreter(f, spdot_nse)
 
 
 #------------------------------------------------------------------------------
@@ -461,6 +527,7 @@ def _zero_preserving_unary_op(prim):
     if spvalues[0].is_sparse():
       out_spvalue = spenv.sparse(spvalues[0].shape, buf_out,
                                  indices_ref=spvalues[0].indices_ref,
+                                 indptr_ref=spvalues[0].indptr_ref,
                                  indices_sorted=spvalues[0].indices_sorted,
                                  unique_indices=spvalues[0].unique_indices)
     else:
@@ -472,18 +539,51 @@ def _zero_preserving_unary_op(prim):
 #                how should we handle this?
 for _prim in _zero_preserving_unary_primitives:
   sparse_rules[_prim] = _zero_preserving_unary_op(_prim)
+  _bsr_sparse_rules.add(_prim)
 
 def _dot_general_sparse(spenv, *spvalues, dimension_numbers, precision, preferred_element_type):
   # TODO(jakevdp): pass along these unused configurations?
   del precision, preferred_element_type  # unused
+  lhs, rhs = spvalues
+  if lhs.is_bsr() or rhs.is_bsr():
+    result = _bsr_dot_general(spenv, lhs, rhs, dimension_numbers)
+    if result is not None:
+      return (spenv.dense(result),)
+    spvalues = [_bsr_spvalue_to_bcoo(spenv, spvalue) if spvalue.is_bsr() else spvalue
+                for spvalue in spvalues]
   result = sparse.bcoo_dot_general(*spvalues_to_arrays(spenv, spvalues),
-                                   dimension_numbers=dimension_numbers)
+                                   dimension_numbers=dimension_numbers,
+                                   nse=spenv.spdot_nse)
   return arrays_to_spvalues(spenv, [result])
 
+def _bsr_dot_general(spenv, lhs, rhs, dimension_numbers):
+  """Computes matrix-vector and matrix-matrix products of a BSR matrix and a
+  dense array from its tiles, or returns None for other products."""
+  (lhs_contracting, rhs_contracting), (lhs_batch, rhs_batch) = dimension_numbers
+  if lhs_batch or rhs_batch or lhs.ndim not in (1, 2) or rhs.ndim not in (1, 2):
+    return None
+  if lhs.is_bsr() and not rhs.is_sparse():
+    if tuple(lhs_contracting) != (1,) or tuple(rhs_contracting) != (0,):
+      return None
+    mat, other = spvalues_to_arrays(spenv, (lhs, rhs))
+    return mat @ other
+  if rhs.is_bsr() and not lhs.is_sparse():
+    if tuple(lhs_contracting) != (lhs.ndim - 1,) or tuple(rhs_contracting) != (0,):
+      return None
+    other, mat = spvalues_to_arrays(spenv, (lhs, rhs))
+    return mat.__rmatmul__(other)
+  return None
+
 sparse_rules[lax.dot_general_p] = _dot_general_sparse
+_bsr_sparse_rules.add(lax.dot_general_p)
 
 def _transpose_sparse(spenv, *spvalues, permutation):
   permutation = tuple(permutation)
+  if spvalues[0].is_bsr():
+    if permutation == (0, 1):
+      return spvalues
+    mat = spvalues_to_arrays(spenv, spvalues[0])
+    return arrays_to_spvalues(spenv, (mat.T,))
   args = spvalues_to_arrays(spenv, spvalues)
   shape = args[0].shape
   mat_transposed = sparse.bcoo_transpose(args[0], permutation=permutation)
@@ -514,6 +614,7 @@ def _transpose_sparse(spenv, *spvalues, permutation):
   return (spvalue,)
 
 sparse_rules[lax.transpose_p] = _transpose_sparse
+_bsr_sparse_rules.add(lax.transpose_p)
 
 def _add_sparse(spenv, *spvalues):
   X, Y = spvalues
@@ -691,6 +792,7 @@ def _xla_call_sparse(spenv, *spvalues, call_jaxpr, donated_invars, **params):
   return arrays_to_spvalues(spenv, tree_unflatten(out_tree, out_flat))
 
 sparse_rules[xla.xla_call_p] = _xla_call_sparse
+_bsr_sparse_rules.add(xla.xla_call_p)
 
 def _duplicate_for_sparse_spvalues(spvalues, params):
   for spvalue, param in safe_zip(spvalues, params):
@@ -745,6 +847,7 @@ def _todense_sparse_rule(spenv, spvalue, *, tree):
   return (spenv.dense(out),)
 
 sparse_rules[sparse.todense_p] = _todense_sparse_rule
+_bsr_sparse_rules.add(sparse.todense_p)
 
 
 #------------------------------------------------------------------------------
@@ -41,6 +41,7 @@ from jax._src.lib.mlir.dialects import mhlo
 from jax._src.lib.mlir.dialects import func as func_dialect
 from jax._src.lib import xla_bridge as xb
 from jax._src.lib import xla_client as xc
+from jax._src import profiler
 from jax._src import source_info_util
 import jax._src.util as util
 from jax.config import config
@@ -490,6 +491,9 @@ def sharded_aval(aval: core.ShapedArray,
   return aval.update(tuple(sharded_shape))
 
 
+# Platforms on which donated argument buffers can be reused for outputs.
+platforms_with_donation = ("cuda", "rocm", "tpu")
+
 def lower_jaxpr_to_module(
     module_name: str, jaxpr: core.ClosedJaxpr,
     unordered_effects: List[core.Effect],
@@ -522,7 +526,6 @@ def lower_jaxpr_to_module(
         sharded_aval(out_aval, out_sharding)
         for out_aval, out_sharding in zip(out_avals, result_shardings)
     ]
-  platforms_with_donation = ("cuda", "rocm", "tpu")
   if platform in platforms_with_donation:
     input_output_aliases, donated_args = _set_up_aliases(
         in_avals, out_avals, donated_args)
@@ -540,7 +543,8 @@ def lower_jaxpr_to_module(
   # Create a keepalives list that will be mutated during the lowering.
   keepalives: List[Any] = []
   ctx = ModuleContext(platform, axis_context, name_stack, keepalives)
-  with ctx.context, ir.Location.unknown(ctx.context):
+  with profiler.compile_event("lower", module_name), ctx.context, \
+       ir.Location.unknown(ctx.context):
     # Remove module name characters that XLA would alter. This ensures that
     # XLA computation preserves the module name.
     module_name = _module_name_regex.sub("_", module_name)
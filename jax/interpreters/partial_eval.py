@@ -23,6 +23,7 @@ import operator as op
 from typing import (Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple,
                     List, Union, Hashable, Set, cast)
 from weakref import ref
+import weakref
 
 import numpy as np
 
@@ -32,8 +33,8 @@ from jax import linear_util as lu
 from jax._src import profiler
 from jax._src.ad_util import Zero
 from jax._src.api_util import flattened_fun_in_tree, flatten_fun_nokwargs
-from jax._src.tree_util import (PyTreeDef, treedef_tuple, tree_unflatten,
-                                tree_leaves)
+from jax._src.tree_util import (PyTreeDef, treedef_tuple, tree_flatten,
+                                tree_unflatten, tree_leaves)
 from jax._src.util import (unzip2, safe_zip, safe_map, toposort, split_list,
                            merge_lists, partition_list, OrderedSet,
                            as_hashable_function, weakref_lru_cache)
@@ -1498,6 +1499,190 @@ def dce_jaxpr_closed_call_rule(used_outputs: List[bool], eqn: JaxprEqn
   return used_inputs, new_eqn
 dce_rules[core.closed_call_p] = dce_jaxpr_closed_call_rule
 
+
+# Jaxpr simplification, run before lowering when the
+# `jax_jaxpr_simplification_passes` option is set. Each pass maps a closed
+# jaxpr to an equivalent one with the same inputs and outputs.
+
+SimplificationPass = Callable[[ClosedJaxpr], ClosedJaxpr]
+
+def simplify_jaxpr(jaxpr: ClosedJaxpr, passes: Sequence[str]
+                   ) -> Tuple[ClosedJaxpr, Dict[str, int]]:
+  """Applies the named simplification `passes` to `jaxpr`, in order.
+
+  Returns the simplified jaxpr and the number of equations, including those of
+  subjaxprs, that each pass removed. Passes are in `simplification_passes`.
+  """
+  eqns_removed: Dict[str, int] = {}
+  num_eqns = _count_eqns(jaxpr.jaxpr)
+  for name in passes:
+    try:
+      simplify = simplification_passes[name]
+    except KeyError:
+      raise ValueError(
+          f"Unknown jaxpr simplification pass {name!r}, expected one of "
+          f"{list(simplification_passes)}.") from None
+    jaxpr = simplify(jaxpr)
+    new_num_eqns = _count_eqns(jaxpr.jaxpr)
+    eqns_removed[name] = eqns_removed.get(name, 0) + num_eqns - new_num_eqns
+    num_eqns = new_num_eqns
+  config.jax_enable_checks and core.check_jaxpr(jaxpr.jaxpr)
+  return jaxpr, eqns_removed
+
+def _count_eqns(jaxpr: Jaxpr) -> int:
+  return len(jaxpr.eqns) + sum(map(_count_eqns, core.subjaxprs(jaxpr)))
+
+def _substitute(subs: Dict[Var, Atom], jaxpr: ClosedJaxpr,
+                eqns: List[JaxprEqn]) -> ClosedJaxpr:
+  outvars = [subs.get(v, v) if type(v) is Var else v
+             for v in jaxpr.jaxpr.outvars]
+  new_jaxpr = Jaxpr(jaxpr.jaxpr.constvars, jaxpr.jaxpr.invars, outvars, eqns,
+                    jaxpr.jaxpr.effects)
+  return ClosedJaxpr(new_jaxpr, jaxpr.consts)
+
+def _subst_eqn(subs: Dict[Var, Atom], eqn: JaxprEqn) -> JaxprEqn:
+  if not subs:
+    return eqn
+  return eqn.replace(invars=[subs.get(v, v) if type(v) is Var else v
+                             for v in eqn.invars])
+
+def _inline_calls(jaxpr: ClosedJaxpr) -> ClosedJaxpr:
+  """Inlines calls, e.g. of nested `jit`s, that `inline_rules` allow."""
+  newvar = core.gensym([jaxpr.jaxpr])
+  subs: Dict[Var, Atom] = {}
+  new_eqns: List[JaxprEqn] = []
+
+  def inline(eqn: JaxprEqn) -> None:
+    eqn = _subst_eqn(subs, eqn)
+    rule = inline_rules.get(eqn.primitive)
+    call_jaxpr = rule(eqn) if rule else None
+    if call_jaxpr is None:
+      new_eqns.append(eqn)
+      return
+    # Fresh variables keep the jaxpr well-formed when a callee is inlined
+    # more than once.
+    env: Dict[Var, Atom] = dict(zip(call_jaxpr.invars, eqn.invars))
+    def read(x: Atom) -> Atom:
+      return env[x] if type(x) is Var else x
+    for inner in call_jaxpr.eqns:
+      outvars = [v if type(v) is DropVar else env.setdefault(v, newvar(v.aval))
+                 for v in inner.outvars]
+      inline(inner.replace(invars=map(read, inner.invars), outvars=outvars))
+    for v, x in zip(eqn.outvars, call_jaxpr.outvars):
+      if type(v) is not DropVar:
+        subs[v] = read(x)
+
+  for eqn in jaxpr.jaxpr.eqns:
+    inline(eqn)
+  return _substitute(subs, jaxpr, new_eqns)
+
+InlineRule = Callable[[JaxprEqn], Optional[Jaxpr]]
+inline_rules: Dict[Primitive, InlineRule] = {}
+
+def _forward_outputs(jaxpr: ClosedJaxpr) -> ClosedJaxpr:
+  """Replaces outputs that equal an input of their equation by that input."""
+  subs: Dict[Var, Atom] = {}
+  new_eqns: List[JaxprEqn] = []
+  for eqn in jaxpr.jaxpr.eqns:
+    eqn = _subst_eqn(subs, eqn)
+    if eqn.primitive in forwarding_rules:
+      fwd_vars, new_eqn = forwarding_rules[eqn.primitive](eqn)
+      for v_orig, v_new in zip(eqn.outvars, fwd_vars):
+        if v_new is not None: subs[v_orig] = v_new
+      if new_eqn is None: continue
+      eqn = new_eqn
+    elif eqn.primitive.call_primitive and not eqn.effects:
+      call_jaxpr = eqn.params['call_jaxpr']
+      if type(call_jaxpr) is Jaxpr:
+        # The call keeps computing the forwarded outputs until DCE prunes them.
+        for v, i in zip(eqn.outvars, _jaxpr_forwarding(call_jaxpr)):
+          if i is not None: subs[v] = eqn.invars[i]
+    new_eqns.append(eqn)
+  return _substitute(subs, jaxpr, new_eqns)
+
+# Literals folded by `_fold_literals` are at most this many elements.
+_MAX_FOLDED_LITERAL_SIZE = 1
+
+def _fold_literals(jaxpr: ClosedJaxpr) -> ClosedJaxpr:
+  """Evaluates equations whose inputs are all literals with `literal_fold_rules`.
+  """
+  subs: Dict[Var, Atom] = {}
+  new_eqns: List[JaxprEqn] = []
+  for eqn in jaxpr.jaxpr.eqns:
+    eqn = _subst_eqn(subs, eqn)
+    rule = literal_fold_rules.get(eqn.primitive)
+    if (rule is None or eqn.effects or
+        not all(type(x) is Literal for x in eqn.invars)):
+      new_eqns.append(eqn)
+      continue
+    vals = [np.asarray(x.val, dtype=x.aval.dtype)
+            for x in cast(List[Literal], eqn.invars)]
+    with np.errstate(all='ignore'):
+      out = rule(*vals, **eqn.params)
+    outs = out if eqn.primitive.multiple_results else [out]
+    outs = [np.asarray(o) for o in outs]
+    if not all(np.size(o) <= _MAX_FOLDED_LITERAL_SIZE and
+               np.shape(o) == v.aval.shape and o.dtype == v.aval.dtype
+               for o, v in zip(outs, eqn.outvars)):
+      new_eqns.append(eqn)
+      continue
+    for v, o in zip(eqn.outvars, outs):
+      subs[v] = Literal(o, v.aval)
+  return _substitute(subs, jaxpr, new_eqns)
+
+# Rules evaluating a primitive on NumPy arrays, with the primitive's params as
+# keyword arguments, matching the results of its lowering.
+literal_fold_rules: Dict[Primitive, Callable[..., Any]] = {}
+
+def _cse(jaxpr: ClosedJaxpr) -> ClosedJaxpr:
+  """Replaces equations that repeat an earlier equation by its outputs."""
+  subs: Dict[Var, Atom] = {}
+  new_eqns: List[JaxprEqn] = []
+  seen: Dict[Any, List[Var]] = {}
+
+  def atom_key(x: Atom) -> Any:
+    if type(x) is Literal:
+      val = np.asarray(x.val)
+      return (x.aval, val.dtype, val.tobytes())
+    return x
+
+  for eqn in jaxpr.jaxpr.eqns:
+    eqn = _subst_eqn(subs, eqn)
+    if (eqn.effects or eqn.primitive in cse_exempt_primitives or
+        core.primitive_uses_outfeed(eqn.primitive, eqn.params)):
+      new_eqns.append(eqn)
+      continue
+    key = (eqn.primitive, tuple(map(atom_key, eqn.invars)),
+           tuple(eqn.params.items()))
+    try:
+      prev_outvars = seen.get(key)
+    except TypeError:  # Unhashable params.
+      new_eqns.append(eqn)
+      continue
+    if prev_outvars is None or any(type(v) is DropVar for v in prev_outvars):
+      seen[key] = eqn.outvars
+      new_eqns.append(eqn)
+    else:
+      subs.update(zip(eqn.outvars, prev_outvars))
+  return _substitute(subs, jaxpr, new_eqns)
+
+# Primitives without effects whose equal applications may still produce
+# different results, e.g. because they read stateful random number generators.
+cse_exempt_primitives: Set[Primitive] = set()
+
+def _dce(jaxpr: ClosedJaxpr) -> ClosedJaxpr:
+  new_jaxpr, _ = dce_jaxpr(jaxpr.jaxpr, [True] * len(jaxpr.jaxpr.outvars),
+                           instantiate=True)
+  return ClosedJaxpr(new_jaxpr, jaxpr.consts)
+
+simplification_passes: Dict[str, SimplificationPass] = {
+    'inline': _inline_calls,
+    'forward': _forward_outputs,
+    'fold': _fold_literals,
+    'cse': _cse,
+    'dce': _dce,
+}
+
 def move_binders_to_front(closed_jaxpr: ClosedJaxpr, to_move: Sequence[bool]
                           ) -> ClosedJaxpr:
   """Reorder `invars` by moving those indicated in `to_move` to the front."""
@@ -2090,6 +2275,83 @@ def trace_to_subjaxpr_dynamic(fun: lu.WrappedFun, main: core.MainTrace,
   return jaxpr, [v.aval for v in jaxpr.outvars], consts
 
 
+# Maps a Python function to a dict from the structure of its arguments and
+# the trace context to (jaxpr, consts, out_tree), for
+# `call_with_traced_jaxpr`.
+_traced_jaxprs: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+_static_leaf_types = {bool, int, float, complex, str}
+
+class _Untraceable(Exception): pass
+
+def call_with_traced_jaxpr(fun: lu.WrappedFun, args, kwargs):
+  """Calls the function underlying `fun` by evaluating a cached jaxpr.
+
+  Used by `WrappedFun.call_wrapped` when the `jax_cache_traced_jaxprs` option
+  is enabled. When the function was flattened by a JAX transformation and is
+  called with abstract tracers, e.g. when it is staged out by `jit` or
+  differentiated or batched under `jit`, it is traced to a jaxpr once per
+  argument structure, abstract values and trace context, and that jaxpr is
+  evaluated on the tracers, which applies the transformations to the jaxpr
+  without running the Python function again. Other calls call the function.
+  """
+  f = fun.f
+  kwargs = dict(fun.params, **kwargs)
+  if flattened_fun_in_tree(fun) is None:
+    return f(*args, **kwargs)
+  leaves, in_tree = tree_flatten((args, kwargs))
+  static_leaves: List[Optional[Tuple[type, Any]]] = []
+  avals = []
+  for x in leaves:
+    if isinstance(x, Tracer):
+      aval = x.aval
+      if type(aval) is not ShapedArray:
+        return f(*args, **kwargs)
+      static_leaves.append(None)
+      avals.append(aval)
+    elif type(x) in _static_leaf_types:
+      static_leaves.append((type(x), x))
+    else:
+      return f(*args, **kwargs)
+  key = (in_tree, tuple(static_leaves), tuple(avals), config._trace_context())
+  try:
+    fun_jaxprs: Dict[Any, Any] = _traced_jaxprs.get(f, {})
+    cached = fun_jaxprs.get(key)
+  except TypeError:  # unhashable or not weakly referenceable
+    return f(*args, **kwargs)
+  if cached is None:
+    try:
+      cached = _trace_flat(f, in_tree, static_leaves, avals)
+    except _Untraceable:
+      return f(*args, **kwargs)
+    if not any(isinstance(c, Tracer) for c in cached[1]):
+      _traced_jaxprs.setdefault(f, {})[key] = cached
+  jaxpr, consts, out_tree = cached
+  out = core.eval_jaxpr(jaxpr, consts,
+                        *[x for x, s in zip(leaves, static_leaves) if s is None])
+  return tree_unflatten(out_tree, out)
+
+def _trace_flat(f, in_tree, static_leaves, avals):
+  out_tree = None
+
+  def flat_f(*tracers):
+    nonlocal out_tree
+    tracers_ = iter(tracers)
+    leaves = [next(tracers_) if s is None else s[1] for s in static_leaves]
+    args, kwargs = tree_unflatten(in_tree, leaves)
+    out_leaves, out_tree = tree_flatten(f(*args, **kwargs))
+    if not all(isinstance(x, Tracer) for x in out_leaves):
+      # Outputs that aren't traced, e.g. Python scalars, would be converted to
+      # arrays by the jaxpr.
+      raise _Untraceable
+    return out_leaves
+
+  jaxpr, _, consts = trace_to_jaxpr_dynamic(lu.wrap_init(flat_f), avals)
+  return jaxpr, consts, out_tree
+
+lu.call_with_traced_jaxpr = call_with_traced_jaxpr
+
+
 @profiler.annotate_function
 def trace_to_jaxpr_dynamic2(
     fun: lu.WrappedFun, debug_info: Optional[DebugInfo] = None
@@ -35,6 +35,7 @@ from contextlib import contextmanager, ContextDecorator
 from collections import defaultdict, OrderedDict
 import dataclasses
 from functools import partial
+import hashlib
 import itertools as it
 import operator as op
 import threading
@@ -42,6 +43,7 @@ from typing import (Any, Callable, Dict, List, NamedTuple, Optional, FrozenSet,
                     Sequence, Set, Tuple, Type, Union, Iterable, Mapping, cast,
                     TYPE_CHECKING)
 import sys
+import time
 
 from absl import logging
 import numpy as np
@@ -841,7 +843,7 @@ def xla_pmap_impl(fun: lu.WrappedFun, *args,
   return compiled_fun(*args)
 
 
-@lu.cache
+@lu.cache(executable_cache=True)
 def parallel_callable(fun: lu.WrappedFun,
                       backend_name: Optional[str],
                       axis_name: core.AxisName,
@@ -1095,20 +1097,64 @@ def lower_parallel_callable(
         name_stack, donated_invars, replicated_args=replicated_args,
         arg_shardings=_shardings_to_mlir_shardings(parts.arg_parts),
         result_shardings=_shardings_to_mlir_shardings(parts.out_parts))
-  return PmapComputation(module, pci=pci, replicas=replicas, parts=parts,
-                         shards=shards, tuple_args=tuple_args,
-                         unordered_effects=unordered_effects,
-                         keepalive=keepalive)
+  donated_outputs = _donated_outputs(module_name, backend.platform,
+                                     closed_jaxpr, parts, donated_invars)
+  computation = PmapComputation(module, pci=pci, replicas=replicas, parts=parts,
+                                shards=shards, tuple_args=tuple_args,
+                                unordered_effects=unordered_effects,
+                                keepalive=keepalive)
+  computation.donated_outputs = donated_outputs
+  return computation
+
+
+def _donated_outputs(name: str, platform: str, jaxpr: core.ClosedJaxpr,
+                     parts: PartitionInfo, donated_invars: Sequence[bool]
+                     ) -> Tuple[Optional[int], ...]:
+  """Returns, for each argument of a pmap computation, the index of the output
+  whose buffer the argument is donated to, or None, and logs the donations."""
+  if not any(donated_invars):
+    return (None,) * len(donated_invars)
+  in_avals, out_avals = jaxpr.in_avals, jaxpr.out_avals
+  if parts.arg_parts is not None:
+    in_avals = map(mlir.sharded_aval, in_avals,
+                   _shardings_to_mlir_shardings(parts.arg_parts))
+  if parts.out_parts is not None:
+    out_avals = map(mlir.sharded_aval, out_avals,
+                    _shardings_to_mlir_shardings(parts.out_parts))
+  platform = xb.canonicalize_platform(platform)
+  if platform in mlir.platforms_with_donation:
+    aliases, _ = mlir._set_up_aliases(in_avals, out_avals, donated_invars)
+    reason = "no output has the same shape and dtype"
+  else:
+    aliases = [None] * len(in_avals)
+    reason = f"donation is not implemented for {platform}"
+  report = []
+  for i, (aval, donated, alias) in enumerate(
+      safe_zip(in_avals, donated_invars, aliases)):
+    if alias is not None:
+      report.append(f"argument {i} ({aval.str_short()}) reuses the buffer of "
+                    f"output {alias}")
+    elif donated:
+      report.append(f"argument {i} ({aval.str_short()}) is not donated: "
+                    f"{reason}")
+  log_priority = logging.WARNING if config.jax_log_compiles else logging.DEBUG
+  logging.log(log_priority, "Buffer donation in %s: %s", name,
+              "; ".join(report))
+  return tuple(aliases)
 
 
 class PmapComputation(stages.XlaLowering):
   _hlo: Union[ir.Module, xc.XlaComputation]
   _executable: Optional[PmapExecutable]
+  # For each argument, the index of the output whose buffer the argument is
+  # donated to, or None if it isn't donated or its donation couldn't be used.
+  donated_outputs: Tuple[Optional[int], ...]
 
   def __init__(self, hlo: Union[ir.Module, xc.XlaComputation], **compile_args):
     self._executable = None
     self._hlo = hlo
     self.compile_args = compile_args
+    self.donated_outputs = ()
 
   # -- stages.XlaLowering overrides
 
@@ -1269,8 +1315,14 @@ class PmapExecutable(stages.XlaExecutable):
 
     with dispatch.log_elapsed_time(
         f"Finished XLA compilation of {pci.name} in {{elapsed_time}} sec"):
-      compiled = dispatch.compile_or_get_cached(
-          pci.backend, xla_computation, compile_options)
+      if (config.jax_pmap_executable_pool and pci.devices is not None and
+          shards.num_global_shards == shards.num_local_shards and
+          pci.backend.platform == 'tpu'):
+        compiled = _compile_pooled(pci.backend, xla_computation,
+                                   compile_options, device_assignment)
+      else:
+        compiled = dispatch.compile_or_get_cached(
+            pci.backend, xla_computation, compile_options)
     handle_args = InputsHandler(
         compiled.local_devices(), input_sharding_specs, input_indices)
     execute_fun = ExecuteReplicated(compiled, pci.backend, handle_args,
@@ -1292,6 +1344,51 @@ class PmapExecutable(stages.XlaExecutable):
     return self.unsafe_call(*args)
 
 
+# Serialized executables compiled by pmap for explicit device sets, keyed on
+# the computation, the compile options and the relative topology of the
+# devices. See `_compile_pooled`. Entries are sized by their serialized bytes.
+_pmap_executable_pool = util.ExecutableCache()
+
+def _device_topology(devices: Sequence[xla.Device]) -> Tuple[Any, ...]:
+  """Returns the kinds and relative positions of `devices`, in order."""
+  coords: List[Any] = [getattr(d, "coords", None) for d in devices]
+  if all(c is not None for c in coords):
+    origin = np.min(np.array(coords), axis=0)
+    coords = [tuple(int(x) for x in np.subtract(c, origin)) for c in coords]
+  return tuple((d.platform, d.device_kind, c, getattr(d, "core_on_chip", None))
+               for d, c in safe_zip(devices, coords))
+
+def _computation_fingerprint(computation) -> bytes:
+  if isinstance(computation, ir.Module):
+    text = mlir.module_to_string(computation).encode()
+  elif isinstance(computation, xc.XlaComputation):
+    text = computation.as_serialized_hlo_module_proto()
+  else:
+    text = str(computation).encode()
+  return hashlib.sha256(text).digest()
+
+def _compile_pooled(backend, computation, compile_options, device_assignment):
+  """Compiles `computation`, or relocates an executable compiled for devices
+  with the same topology by loading it with `device_assignment`."""
+  key = (backend.platform, _computation_fingerprint(computation),
+         compile_options.num_replicas, compile_options.num_partitions,
+         compile_options.parameter_is_tupled_arguments,
+         _device_topology(list(device_assignment.flat)))
+  serialized = _pmap_executable_pool.get(key)
+  if serialized is not None:
+    log_priority = logging.WARNING if config.jax_log_compiles else logging.DEBUG
+    logging.log(log_priority, "Reusing a pooled pmap executable for devices %s",
+                list(device_assignment.flat))
+    return backend.deserialize_executable(serialized, compile_options)
+  start_time = time.perf_counter()
+  compiled = dispatch.compile_or_get_cached(backend, computation,
+                                            compile_options)
+  serialized = backend.serialize_executable(compiled)
+  _pmap_executable_pool.put(key, serialized, time.perf_counter() - start_time,
+                            size=len(serialized))
+  return compiled
+
+
 def _get_pmap_sharding(devices, out_specs):
   from jax.experimental.sharding import PmapSharding
 
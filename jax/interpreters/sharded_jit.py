@@ -63,7 +63,7 @@ def _aval_to_result_handler(npart, parts, aval):
   return pxla.local_aval_to_result_handler(aval, spec, indices)
 
 
-@lu.cache
+@lu.cache(executable_cache=True)
 def _sharded_callable(
     fun: lu.WrappedFun, nparts: Optional[int],
     in_parts: Tuple[pxla.PartitionsOrReplicated, ...],
@@ -450,6 +450,14 @@ pe.partial_eval_jaxpr_custom_rules[xla_call_p] = \
             _xla_call_partial_eval_custom_params_updater)
 pe.dce_rules[xla_call_p] = pe.dce_jaxpr_call_rule
 
+def _xla_call_inline_rule(eqn: core.JaxprEqn) -> Optional[core.Jaxpr]:
+  params = eqn.params
+  if (params['device'] is not None or params['backend'] is not None or
+      any(params['donated_invars']) or eqn.effects):
+    return None
+  return params['call_jaxpr']
+pe.inline_rules[xla_call_p] = _xla_call_inline_rule
+
 pe.padding_rules[xla_call_p] = partial(pe.call_padding_rule, xla_call_p)
 
 
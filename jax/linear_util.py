@@ -64,12 +64,14 @@ data must be immutable, because it will be stored in function memoization tables
 from __future__ import annotations
 
 import threading
+import time
 from functools import partial
 from typing import Any, Tuple, Callable, Optional
 import weakref
 
 from jax import core
-from jax._src.util import curry
+from jax._src.util import (curry, CacheInfo, CacheStats, ExecutableCache,
+                           register_cache)
 from jax.tree_util import tree_map
 
 from jax._src import traceback_util
@@ -113,6 +115,12 @@ class Store:
   __bool__ = __nonzero__
 
 
+# Set by jax.interpreters.partial_eval, which imports this module. Called
+# instead of the underlying function when the jax_cache_traced_jaxprs option
+# is enabled.
+call_with_traced_jaxpr: Optional[Callable] = None
+
+
 class WrappedFun:
   """Represents a function `f` to which `transforms` are to be applied.
 
@@ -165,7 +173,10 @@ class WrappedFun:
     gen = gen_static_args = out_store = None
 
     try:
-      ans = self.f(*args, **dict(self.params, **kwargs))
+      if config.jax_cache_traced_jaxprs and call_with_traced_jaxpr is not None:
+        ans = call_with_traced_jaxpr(self, args, kwargs)
+      else:
+        ans = self.f(*args, **dict(self.params, **kwargs))
     except:
       # Some transformations yield from inside context managers, so we have to
       # interrupt them before reraising the exception. Otherwise they will only
@@ -264,22 +275,57 @@ class _CacheLocalContext(threading.local):
     self.most_recent_entry = None
 
 
-def cache(call: Callable):
+def cache(call: Optional[Callable] = None, *, executable_cache: bool = False):
   """Memoization decorator for functions taking a WrappedFun as first argument.
 
   Args:
     call: a Python callable that takes a WrappedFun as its first argument. The
       underlying transforms and params on the WrappedFun are used as part of the
       memoization cache key.
+    executable_cache: whether ``call`` returns compiled executables. If so, the
+      entries of all functions are kept in a single ``util.ExecutableCache``,
+      bounded by the ``jax_executable_cache_*`` options. Otherwise the cache is
+      unbounded, and the entries of a function are only dropped along with it.
 
   Returns:
      A memoized version of ``call``.
   """
+  if call is None:
+    return partial(cache, executable_cache=executable_cache)
   fun_caches: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
   thread_local: threading.local = _CacheLocalContext()
+  hits = misses = evictions = 0
+  miss_time = 0.
+  # With `executable_cache`, entries are keyed on a weak reference to the
+  # function, whose callback records that the function's entries are stale.
+  entries = ExecutableCache()
+  fun_refs: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+  dead_refs: list = []
+
+  def _get(f, key):
+    if not executable_cache:
+      return fun_caches.setdefault(f, {}).get(key, None)
+    fun_ref = fun_refs.get(f)
+    return None if fun_ref is None else entries.get((fun_ref, key))
+
+  def _put(f, key, result, elapsed_time):
+    if not executable_cache:
+      fun_caches.setdefault(f, {})[key] = result
+      return
+    _remove_dead_entries()
+    fun_ref = fun_refs.get(f)
+    if fun_ref is None:
+      fun_ref = fun_refs[f] = weakref.ref(f, dead_refs.append)
+    entries.put((fun_ref, key), result, elapsed_time)
+
+  def _remove_dead_entries():
+    if dead_refs:
+      ids = {id(r) for r in dead_refs}
+      del dead_refs[:]
+      entries.remove_if(lambda k: id(k[0]) in ids)
 
   def memoized_fun(fun: WrappedFun, *args):
-    cache = fun_caches.setdefault(fun.f, {})
+    nonlocal hits, misses, miss_time
     if config.jax_check_tracer_leaks:
       key = (_copy_main_traces(fun.transforms), fun.params, fun.in_type, args,
              config.x64_enabled, config.jax_default_device,
@@ -287,13 +333,22 @@ def cache(call: Callable):
     else:
       key = (fun.transforms, fun.params, fun.in_type, args, config.x64_enabled,
              config.jax_default_device, config._trace_context())
-    result = cache.get(key, None)
+    result = _get(fun.f, key)
     if result is not None:
+      hits += 1
       ans, stores = result
       fun.populate_stores(stores)
     else:
-      ans = call(fun, *args)
-      cache[key] = (ans, fun.stores)
+      misses += 1
+      assert call is not None
+      start_time = time.perf_counter()
+      try:
+        ans = call(fun, *args)
+      finally:
+        elapsed_time = time.perf_counter() - start_time
+        miss_time += elapsed_time
+      # Only the executables in `ans` count towards the size of the entry.
+      _put(fun.f, key, (ans, fun.stores), elapsed_time)
 
     thread_local.most_recent_entry = weakref.ref(ans)
     return ans
@@ -306,11 +361,45 @@ def cache(call: Callable):
       return result
 
   def _evict_function(f):
-    fun_caches.pop(f, None)
+    nonlocal evictions
+    if executable_cache:
+      fun_ref = fun_refs.pop(f, None)
+      if fun_ref is not None:
+        evictions += entries.remove_if(lambda k: k[0] is fun_ref)
+    else:
+      evictions += len(fun_caches.pop(f, ()))
+
+  def _cache_size():
+    if executable_cache:
+      _remove_dead_entries()
+      return len(entries)
+    return sum(len(c) for c in list(fun_caches.values()))
+
+  def _max_size():
+    return entries.max_entries() if executable_cache else None
+
+  def _cache_info():
+    return CacheInfo(hits, misses, _max_size(), _cache_size())
+
+  def _cache_stats():
+    return CacheStats(hits, misses, evictions + entries.evictions, _max_size(),
+                      _cache_size(), miss_time)
+
+  def _cache_clear():
+    nonlocal hits, misses, evictions, miss_time
+    fun_caches.clear()
+    fun_refs.clear()
+    entries.clear()
+    hits = misses = evictions = 0
+    miss_time = 0.
 
   memoized_fun.most_recent_entry = _most_recent_entry  # type: ignore
-  memoized_fun.cache_clear = fun_caches.clear  # type: ignore
+  memoized_fun.cache_clear = _cache_clear  # type: ignore
+  memoized_fun.cache_info = _cache_info  # type: ignore
+  memoized_fun.cache_stats = _cache_stats  # type: ignore
   memoized_fun.evict_function = _evict_function  # type: ignore
+  register_cache(memoized_fun, f"{getattr(call, '__module__', '?')}."
+                               f"{getattr(call, '__qualname__', call)}")
 
   return memoized_fun
 
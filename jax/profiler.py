@@ -25,5 +25,6 @@ from jax._src.profiler import (
   stop_trace as stop_trace,
   trace as trace,
   annotate_function as annotate_function,
+  cache_stats as cache_stats,
   trace_function as trace_function,
 )
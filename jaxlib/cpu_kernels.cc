@@ -18,6 +18,7 @@ limitations under the License.
 
 #include "jaxlib/lapack_kernels.h"
 #include "jaxlib/pocketfft_kernels.h"
+#include "jaxlib/sparse_kernels.h"
 #include "tensorflow/compiler/xla/service/custom_call_target_registry.h"
 
 namespace jax {
@@ -106,6 +107,30 @@ XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
 XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
     "lapack_zgees", ComplexGees<std::complex<double>>::Kernel, "Host");
 XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM("pocketfft", PocketFft, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
+    "sparse_scsr_matvec", CsrMatvec<float>::Kernel, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
+    "sparse_dcsr_matvec", CsrMatvec<double>::Kernel, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
+    "sparse_ccsr_matvec", CsrMatvec<std::complex<float>>::Kernel, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
+    "sparse_zcsr_matvec", CsrMatvec<std::complex<double>>::Kernel, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
+    "sparse_scsr_matmat", CsrMatmat<float>::Kernel, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
+    "sparse_dcsr_matmat", CsrMatmat<double>::Kernel, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
+    "sparse_ccsr_matmat", CsrMatmat<std::complex<float>>::Kernel, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
+    "sparse_zcsr_matmat", CsrMatmat<std::complex<double>>::Kernel, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
+    "sparse_scsr_todense", CsrTodense<float>::Kernel, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
+    "sparse_dcsr_todense", CsrTodense<double>::Kernel, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
+    "sparse_ccsr_todense", CsrTodense<std::complex<float>>::Kernel, "Host");
+XLA_REGISTER_CUSTOM_CALL_TARGET_WITH_SYM(
+    "sparse_zcsr_todense", CsrTodense<std::complex<double>>::Kernel, "Host");
 
 }  // namespace
 }  // namespace jax
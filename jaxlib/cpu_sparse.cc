@@ -0,0 +1,53 @@
+/* Copyright 2022 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+==============================================================================*/
+
+#include <complex>
+
+#include "jaxlib/kernel_pybind11_helpers.h"
+#include "jaxlib/sparse_kernels.h"
+#include "include/pybind11/pybind11.h"
+
+namespace jax {
+namespace {
+
+namespace py = pybind11;
+
+py::dict Registrations() {
+  py::dict dict;
+  dict["sparse_scsr_matvec"] = EncapsulateFunction(CsrMatvec<float>::Kernel);
+  dict["sparse_dcsr_matvec"] = EncapsulateFunction(CsrMatvec<double>::Kernel);
+  dict["sparse_ccsr_matvec"] =
+      EncapsulateFunction(CsrMatvec<std::complex<float>>::Kernel);
+  dict["sparse_zcsr_matvec"] =
+      EncapsulateFunction(CsrMatvec<std::complex<double>>::Kernel);
+  dict["sparse_scsr_matmat"] = EncapsulateFunction(CsrMatmat<float>::Kernel);
+  dict["sparse_dcsr_matmat"] = EncapsulateFunction(CsrMatmat<double>::Kernel);
+  dict["sparse_ccsr_matmat"] =
+      EncapsulateFunction(CsrMatmat<std::complex<float>>::Kernel);
+  dict["sparse_zcsr_matmat"] =
+      EncapsulateFunction(CsrMatmat<std::complex<double>>::Kernel);
+  dict["sparse_scsr_todense"] = EncapsulateFunction(CsrTodense<float>::Kernel);
+  dict["sparse_dcsr_todense"] = EncapsulateFunction(CsrTodense<double>::Kernel);
+  dict["sparse_ccsr_todense"] =
+      EncapsulateFunction(CsrTodense<std::complex<float>>::Kernel);
+  dict["sparse_zcsr_todense"] =
+      EncapsulateFunction(CsrTodense<std::complex<double>>::Kernel);
+  return dict;
+}
+
+PYBIND11_MODULE(_cpu_sparse, m) { m.def("registrations", &Registrations); }
+
+}  // namespace
+}  // namespace jax
@@ -0,0 +1,127 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+CPU kernels for products of CSR matrices with dense operands.
+"""
+
+import jax
+import jaxlib.mlir.ir as ir
+import jaxlib.mlir.dialects.mhlo as mhlo
+
+import numpy as np
+from jaxlib import xla_client
+
+from .mhlo_helpers import custom_call
+from . import _cpu_sparse
+
+for _name, _value in _cpu_sparse.registrations().items():
+  xla_client.register_custom_call_target(_name, _value, platform="cpu")
+
+
+if xla_client._version >= 64:
+  def _mhlo_s32(x):
+    if jax._src.lib.mlir_api_version < 21:
+      return mhlo.ConstOp(
+          ir.DenseElementsAttr.get(
+              np.array(x, dtype=np.int32),
+              type=ir.IntegerType.get_signless(32))).result
+    else:
+      return mhlo.ConstantOp(
+          ir.DenseElementsAttr.get(
+              np.array(x, dtype=np.int32),
+              type=ir.IntegerType.get_signless(32))).result
+else:
+  def _mhlo_s32(x):
+    typ = ir.RankedTensorType.get([], ir.IntegerType.get_signless(32))
+    if jax._src.lib.mlir_api_version < 21:
+      return mhlo.ConstOp(typ,
+                          ir.DenseElementsAttr.get(np.array(
+                              x, dtype=np.int32))).result
+    else:
+      return mhlo.ConstantOp(
+          typ, ir.DenseElementsAttr.get(np.array(x, dtype=np.int32))).result
+
+
+_prefixes = {
+    np.dtype(np.float32): "s",
+    np.dtype(np.float64): "d",
+    np.dtype(np.complex64): "c",
+    np.dtype(np.complex128): "z",
+}
+
+def is_supported(data_dtype, index_dtype) -> bool:
+  """Returns whether the kernels support CSR matrices of these dtypes."""
+  return (np.dtype(data_dtype) in _prefixes and
+          np.dtype(index_dtype) == np.int32)
+
+
+def _validate_csr_mhlo(data, indices, indptr, shape):
+  data_type = ir.RankedTensorType(data.type)
+  indices_type = ir.RankedTensorType(indices.type)
+  indptr_type = ir.RankedTensorType(indptr.type)
+
+  nnz, = data_type.shape
+  assert indices_type.shape == [nnz]
+  assert indptr_type.element_type == indices_type.element_type
+  assert indptr_type.shape == [shape[0] + 1]
+  return data_type.element_type, nnz
+
+
+def csr_todense_mhlo(data, indices, indptr, *, shape, data_dtype, index_dtype):
+  """CSR to dense matrix."""
+  assert is_supported(data_dtype, index_dtype)
+  data_type, nnz = _validate_csr_mhlo(data, indices, indptr, shape)
+  rows, cols = shape
+  return custom_call(
+      f"sparse_{_prefixes[np.dtype(data_dtype)]}csr_todense",
+      [ir.RankedTensorType.get(shape, data_type)],
+      [_mhlo_s32(rows), _mhlo_s32(cols), _mhlo_s32(nnz), data, indices, indptr],
+      operand_layouts=[[]] * 3 + [[0]] * 3,
+      result_layouts=[[1, 0]])
+
+
+def csr_matvec_mhlo(data, indices, indptr, x, *, shape, transpose=False,
+                    data_dtype, index_dtype, x_dtype):
+  """CSR matrix/vector multiply."""
+  assert is_supported(data_dtype, index_dtype)
+  assert np.dtype(x_dtype) == np.dtype(data_dtype)
+  data_type, nnz = _validate_csr_mhlo(data, indices, indptr, shape)
+  rows, cols = shape
+  out_size = cols if transpose else rows
+  return custom_call(
+      f"sparse_{_prefixes[np.dtype(data_dtype)]}csr_matvec",
+      [ir.RankedTensorType.get([out_size], data_type)],
+      [_mhlo_s32(rows), _mhlo_s32(cols), _mhlo_s32(nnz),
+       _mhlo_s32(int(transpose)), data, indices, indptr, x],
+      operand_layouts=[[]] * 4 + [[0]] * 4,
+      result_layouts=[[0]])
+
+
+def csr_matmat_mhlo(data, indices, indptr, B, *, shape, transpose=False,
+                    index_dtype, data_dtype, B_dtype):
+  """CSR matrix/matrix multiply."""
+  assert is_supported(data_dtype, index_dtype)
+  assert np.dtype(B_dtype) == np.dtype(data_dtype)
+  data_type, nnz = _validate_csr_mhlo(data, indices, indptr, shape)
+  rows, cols = shape
+  _, Ccols = ir.RankedTensorType(B.type).shape
+  out_size = cols if transpose else rows
+  return custom_call(
+      f"sparse_{_prefixes[np.dtype(data_dtype)]}csr_matmat",
+      [ir.RankedTensorType.get([out_size, Ccols], data_type)],
+      [_mhlo_s32(rows), _mhlo_s32(cols), _mhlo_s32(nnz), _mhlo_s32(Ccols),
+       _mhlo_s32(int(transpose)), data, indices, indptr, B],
+      operand_layouts=[[]] * 5 + [[0]] * 3 + [[1, 0]],
+      result_layouts=[[1, 0]])
@@ -0,0 +1,177 @@
+/* Copyright 2022 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+==============================================================================*/
+
+#include "jaxlib/sparse_kernels.h"
+
+#include <algorithm>
+#include <complex>
+#include <cstdint>
+#include <cstring>
+#include <thread>  // NOLINT
+#include <vector>
+
+namespace jax {
+namespace {
+
+// Rows are only split between threads if each thread gets at least this many
+// nonzeros, below which the cost of starting threads dominates.
+constexpr int64_t kMinNnzPerThread = 1 << 15;
+
+int NumThreads(int64_t nnz) {
+  int64_t max_threads = std::max<int64_t>(1, nnz / kMinNnzPerThread);
+  int64_t hardware_threads =
+      std::max<int64_t>(1, std::thread::hardware_concurrency());
+  return static_cast<int>(std::min(max_threads, hardware_threads));
+}
+
+// Calls fn(thread, row_begin, row_end) for `num_threads` consecutive ranges of
+// rows holding roughly equal numbers of nonzeros, each on its own thread.
+template <typename Fn>
+void ParallelForRows(const int32_t* indptr, int32_t rows, int num_threads,
+                     Fn fn) {
+  if (num_threads <= 1) {
+    fn(0, 0, rows);
+    return;
+  }
+  int64_t nnz = indptr[rows] - indptr[0];
+  std::vector<int32_t> bounds(num_threads + 1);
+  bounds[0] = 0;
+  bounds[num_threads] = rows;
+  for (int t = 1; t < num_threads; ++t) {
+    int64_t target = indptr[0] + nnz * t / num_threads;
+    bounds[t] = static_cast<int32_t>(
+        std::lower_bound(indptr, indptr + rows, target) - indptr);
+    bounds[t] = std::max(bounds[t], bounds[t - 1]);
+  }
+  std::vector<std::thread> threads;
+  threads.reserve(num_threads - 1);
+  for (int t = 1; t < num_threads; ++t) {
+    threads.emplace_back(fn, t, bounds[t], bounds[t + 1]);
+  }
+  fn(0, bounds[0], bounds[1]);
+  for (std::thread& thread : threads) {
+    thread.join();
+  }
+}
+
+// Computes out = A @ B, or A.T @ B if transpose, for a dense row-major B with
+// `b_cols` columns. Threads of the transposed product accumulate into private
+// outputs, which are summed at the end.
+template <typename T>
+void CsrTimesDense(const T* data, const int32_t* indices,
+                   const int32_t* indptr, const T* b, T* out, int32_t rows,
+                   int32_t cols, int32_t b_cols, bool transpose) {
+  int32_t out_rows = transpose ? cols : rows;
+  int64_t out_size = static_cast<int64_t>(out_rows) * b_cols;
+  std::fill(out, out + out_size, T(0));
+  if (rows == 0) return;
+  int num_threads = NumThreads(indptr[rows] - indptr[0]);
+  std::vector<std::vector<T>> partials(transpose ? num_threads - 1 : 0);
+  ParallelForRows(indptr, rows, num_threads, [&](int thread, int32_t begin,
+                                                 int32_t end) {
+    T* acc = out;
+    if (transpose && thread > 0) {
+      partials[thread - 1].assign(out_size, T(0));
+      acc = partials[thread - 1].data();
+    }
+    for (int32_t row = begin; row < end; ++row) {
+      for (int32_t k = indptr[row]; k < indptr[row + 1]; ++k) {
+        int32_t col = indices[k];
+        if (col < 0 || col >= cols) continue;
+        int32_t in_row = transpose ? row : col;
+        int32_t out_row = transpose ? col : row;
+        const T* b_row = b + static_cast<int64_t>(in_row) * b_cols;
+        T* out_row_ptr = acc + static_cast<int64_t>(out_row) * b_cols;
+        T value = data[k];
+        for (int32_t j = 0; j < b_cols; ++j) {
+          out_row_ptr[j] += value * b_row[j];
+        }
+      }
+    }
+  });
+  for (const std::vector<T>& partial : partials) {
+    if (partial.empty()) continue;
+    for (int64_t i = 0; i < out_size; ++i) {
+      out[i] += partial[i];
+    }
+  }
+}
+
+}  // namespace
+
+template <typename T>
+void CsrMatvec<T>::Kernel(void* out, void** data, XlaCustomCallStatus*) {
+  int32_t rows = *reinterpret_cast<int32_t*>(data[0]);
+  int32_t cols = *reinterpret_cast<int32_t*>(data[1]);
+  int32_t transpose = *reinterpret_cast<int32_t*>(data[3]);
+  CsrTimesDense(reinterpret_cast<const T*>(data[4]),
+                reinterpret_cast<const int32_t*>(data[5]),
+                reinterpret_cast<const int32_t*>(data[6]),
+                reinterpret_cast<const T*>(data[7]), reinterpret_cast<T*>(out),
+                rows, cols, /*b_cols=*/1, transpose != 0);
+}
+
+template <typename T>
+void CsrMatmat<T>::Kernel(void* out, void** data, XlaCustomCallStatus*) {
+  int32_t rows = *reinterpret_cast<int32_t*>(data[0]);
+  int32_t cols = *reinterpret_cast<int32_t*>(data[1]);
+  int32_t b_cols = *reinterpret_cast<int32_t*>(data[3]);
+  int32_t transpose = *reinterpret_cast<int32_t*>(data[4]);
+  CsrTimesDense(reinterpret_cast<const T*>(data[5]),
+                reinterpret_cast<const int32_t*>(data[6]),
+                reinterpret_cast<const int32_t*>(data[7]),
+                reinterpret_cast<const T*>(data[8]), reinterpret_cast<T*>(out),
+                rows, cols, b_cols, transpose != 0);
+}
+
+template <typename T>
+void CsrTodense<T>::Kernel(void* out, void** data, XlaCustomCallStatus*) {
+  int32_t rows = *reinterpret_cast<int32_t*>(data[0]);
+  int32_t cols = *reinterpret_cast<int32_t*>(data[1]);
+  const T* values = reinterpret_cast<const T*>(data[3]);
+  const int32_t* indices = reinterpret_cast<const int32_t*>(data[4]);
+  const int32_t* indptr = reinterpret_cast<const int32_t*>(data[5]);
+  T* dense = reinterpret_cast<T*>(out);
+  std::fill(dense, dense + static_cast<int64_t>(rows) * cols, T(0));
+  if (rows == 0) return;
+  ParallelForRows(indptr, rows, NumThreads(indptr[rows] - indptr[0]),
+                  [&](int, int32_t begin, int32_t end) {
+    for (int32_t row = begin; row < end; ++row) {
+      T* dense_row = dense + static_cast<int64_t>(row) * cols;
+      for (int32_t k = indptr[row]; k < indptr[row + 1]; ++k) {
+        int32_t col = indices[k];
+        if (col < 0 || col >= cols) continue;
+        dense_row[col] += values[k];
+      }
+    }
+  });
+}
+
+template struct CsrMatvec<float>;
+template struct CsrMatvec<double>;
+template struct CsrMatvec<std::complex<float>>;
+template struct CsrMatvec<std::complex<double>>;
+
+template struct CsrMatmat<float>;
+template struct CsrMatmat<double>;
+template struct CsrMatmat<std::complex<float>>;
+template struct CsrMatmat<std::complex<double>>;
+
+template struct CsrTodense<float>;
+template struct CsrTodense<double>;
+template struct CsrTodense<std::complex<float>>;
+template struct CsrTodense<std::complex<double>>;
+
+}  // namespace jax
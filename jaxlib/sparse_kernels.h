@@ -0,0 +1,55 @@
+/* Copyright 2022 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+==============================================================================*/
+
+#ifndef JAXLIB_SPARSE_KERNELS_H_
+#define JAXLIB_SPARSE_KERNELS_H_
+
+#include <complex>
+#include <cstdint>
+
+#include "tensorflow/compiler/xla/service/custom_call_status.h"
+
+// CPU kernels for products of CSR matrices with dense operands. Matrices have
+// int32 indices; entries past indptr[rows], and entries whose column is out of
+// range, are ignored. Rows are split between threads in chunks of roughly
+// equal numbers of nonzeros.
+
+namespace jax {
+
+// Operands: rows, cols, nnz, transpose (int32 scalars), data, indices, indptr,
+// x. Result: A @ x, or A.T @ x if transpose is nonzero.
+template <typename T>
+struct CsrMatvec {
+  static void Kernel(void* out, void** data, XlaCustomCallStatus*);
+};
+
+// Operands: rows, cols, nnz, B_cols, transpose (int32 scalars), data, indices,
+// indptr, B, with B in row-major order. Result: A @ B, or A.T @ B if transpose
+// is nonzero, in row-major order.
+template <typename T>
+struct CsrMatmat {
+  static void Kernel(void* out, void** data, XlaCustomCallStatus*);
+};
+
+// Operands: rows, cols, nnz (int32 scalars), data, indices, indptr. Result:
+// the dense matrix in row-major order.
+template <typename T>
+struct CsrTodense {
+  static void Kernel(void* out, void** data, XlaCustomCallStatus*);
+};
+
+}  // namespace jax
+
+#endif  // JAXLIB_SPARSE_KERNELS_H_
@@ -28,6 +28,7 @@ import sys
 import types
 from typing import Callable, List, Optional
 import unittest
+from unittest import mock
 import warnings
 import weakref
 import functools
@@ -518,6 +519,120 @@ class CPPJitTest(jtu.BufferDonationTestCase):
         def my_classmethod_jit(cls, x):
           return x+2
 
+  def test_demote_static_scalars(self):
+    traces = []
+    def f(x, scale, n, name):
+      traces.append(scale)
+      for _ in range(n):
+        x = x * scale
+      return x + len(name)
+
+    # `scale` only flows into arithmetic and is demoted, `n` is used in Python
+    # control flow and stays static, and `name` isn't a scalar.
+    f_jit = self.jit(f, static_argnums=(1, 2, 3))
+    x = jnp.ones(3)
+    with jax._src.config.demote_static_scalars(True):
+      self.assertAllClose(f_jit(x, 2., 2, "ab"), x * 4. + 2)
+      self.assertIsInstance(traces[-1], core.Tracer)
+      num_traces = len(traces)
+      self.assertAllClose(f_jit(x, 3., 2, "ab"), x * 9. + 2)
+      self.assertAllClose(f_jit(x, 4., 2, "ab"), x * 16. + 2)
+      self.assertLen(traces, num_traces)
+      self.assertAllClose(f_jit(x, 4., 3, "ab"), x * 64. + 2)
+      self.assertGreater(len(traces), num_traces)
+
+  def test_demote_static_scalars_depends_on_kept_values(self):
+    def f(x, mode, n):
+      return x * n if mode == 0 else x[:n]
+
+    f_jit = self.jit(f, static_argnums=(1, 2))
+    x = jnp.arange(4.)
+    with jax._src.config.demote_static_scalars(True):
+      self.assertAllClose(f_jit(x, 0, 2), x * 2)
+      self.assertAllClose(f_jit(x, 1, 2), x[:2])
+      self.assertAllClose(f_jit(x, 1, 3), x[:3])
+      self.assertAllClose(f_jit(x, 0, 3), x * 3)
+
+  def test_demote_static_scalars_keeps_specializations(self):
+    traces = []
+    def pow_fn(x, n):
+      traces.append(n)
+      return x ** n
+
+    def type_fn(x, n):
+      traces.append(n)
+      return x * n if isinstance(n, int) else x + n
+
+    x = jnp.arange(3.)
+    with jax._src.config.demote_static_scalars(True):
+      for fn, expected in [(pow_fn, x ** 2), (type_fn, x * 2)]:
+        f_jit = self.jit(fn, static_argnums=1)
+        self.assertAllClose(f_jit(x, 2), expected)
+        # `n` stays static, since demoting it would change the computation.
+        self.assertNotIsInstance(traces[-1], core.Tracer)
+
+  def test_jit_shape_buckets(self):
+    if not self.use_cpp_jit:
+      raise unittest.SkipTest("shape_buckets doesn't depend on the jit "
+                              "implementation")
+    traces = []
+    def f(x):
+      traces.append(None)
+      return jnp.sum(x, axis=1) * 2
+
+    f_jit = jax.jit(f, shape_buckets=jax.ShapeBuckets(['(b, _)'], 'b'))
+    for b in [3, 4, 2, 5, 7]:
+      x = np.arange(b * 3, dtype=np.float32).reshape(b, 3)
+      self.assertAllClose(f_jit(x), np.sum(x, axis=1) * 2)
+    # Batches of 3 and 4, of 2, and of 5 and 7 share a compiled computation.
+    self.assertLen(traces, 3)
+
+    g_jit = jax.jit(lambda x: x + 1, shape_buckets=jax.ShapeBuckets(
+        ['n'], 'n', bucket_size=[4, 8]))
+    for n in [3, 6, 9]:
+      self.assertAllClose(g_jit(jnp.arange(n)), np.arange(n) + 1)
+
+    with self.assertRaisesRegex(ValueError, "shape_buckets can't be combined"):
+      jax.jit(f, static_argnums=0, shape_buckets=jax.ShapeBuckets(['n'], 'n'))
+
+  def test_jit_shape_buckets_device_arguments(self):
+    if not self.use_cpp_jit:
+      raise unittest.SkipTest("shape_buckets doesn't depend on the jit "
+                              "implementation")
+    f_jit = jax.jit(lambda x: x * 2, shape_buckets=jax.ShapeBuckets(['n'], 'n'))
+    xs = [jax.device_put(np.arange(n, dtype=np.float32)) for n in range(5, 9)]
+    with jtu.count_jit_and_pmap_compiles() as count:
+      for x in xs:
+        self.assertAllClose(f_jit(x), np.asarray(x) * 2)
+    # Only the computation for the bucket of size 8 is compiled, and padding
+    # and slicing compile nothing per size.
+    self.assertEqual(count[0], 1)
+    with jtu.count_primitive_compiles() as count:
+      f_jit(xs[0])
+      f_jit(xs[1])
+    self.assertEqual(count[0], 0)
+
+  def test_jit_shape_buckets_lower_and_eval_shape(self):
+    f_jit = jax.jit(lambda x: jnp.sum(x, axis=1),
+                    shape_buckets=jax.ShapeBuckets(['(b, _)'], 'b'))
+    x = np.ones((3, 2), np.float32)
+    out = f_jit.eval_shape(x)
+    self.assertEqual(out.shape, (3,))
+    self.assertEqual(out.dtype, np.float32)
+    compiled = f_jit.lower(x).compile()
+    self.assertAllClose(compiled(x), np.full(3, 2.), check_dtypes=False)
+    # Arguments in the same bucket reuse the executable.
+    self.assertAllClose(compiled(np.ones((4, 2), np.float32)), np.full(4, 2.),
+                        check_dtypes=False)
+    with self.assertRaisesRegex(TypeError, "compiled for the bucket"):
+      compiled(np.ones((5, 2), np.float32))
+
+  def test_jit_shape_buckets_bucket_size_too_small(self):
+    f_jit = jax.jit(lambda x: x + 1, shape_buckets=jax.ShapeBuckets(
+        ['n'], 'n', bucket_size=lambda n: n - 1))
+    with self.assertRaisesRegex(ValueError, "got 2 for 3"):
+      f_jit(np.arange(3))
+
   def test_staticmethod_is_not_supported(self):
     with self.assertRaisesRegex(TypeError,
                                 "staticmethod arguments are not supported"):
@@ -1082,6 +1197,24 @@ class CPPJitTest(jtu.BufferDonationTestCase):
     self.assertIsNotNone(f.runtime_executable())
     self.assertIsNotNone(g.runtime_executable())
 
+  def test_jit_lower_compile_all(self):
+    fs = [self.jit(lambda x, i=i: jnp.sin(x) * i) for i in range(4)]
+    lowered = [f.lower(1.) for f in fs]
+    compiled = jax.stages.compile_all(lowered + lowered[:1], max_workers=2)
+    self.assertLen(compiled, 5)
+    self.assertIs(compiled[0], compiled[4])
+    for i, c in enumerate(compiled[:4]):
+      self.assertIsInstance(c, jax.stages.Compiled)
+      self.assertAllClose(c(1.), jnp.sin(1.) * i)
+
+  def test_jit_lower_compile_all_error(self):
+    class FailingLowered:
+      def compile(self):
+        raise ValueError("compile failed")
+
+    with self.assertRaisesRegex(ValueError, "compile failed"):
+      jax.stages.compile_all([self.jit(jnp.sin).lower(1.), FailingLowered()])
+
   def test_jit_enum_as_dict_keys_fails(self):
     class E(enum.Enum):
       A = 0
@@ -1438,6 +1571,35 @@ class APITest(jtu.JaxTestCase):
     self.assertIsInstance(y2[1], int)
     self.assertEqual(y2[1], 2)
 
+  @parameterized.parameters(0, 1024)
+  def test_device_get_async(self, coalesce_bytes):
+    x = np.arange(12.).reshape((3, 4)).astype("float32")
+    y = {'a': api.device_put(x), 'b': [api.device_put(2 * x), 3],
+         'c': api.device_put(np.arange(5, dtype=np.int32))}
+    future = api.device_get_async(y, coalesce_bytes=coalesce_bytes)
+    y2 = future.result()
+    self.assertEqual(tree_util.tree_structure(y2), tree_util.tree_structure(y))
+    self.assertIsInstance(y2['a'], np.ndarray)
+    self.assertArraysEqual(y2['a'], x)
+    self.assertIsInstance(y2['b'][0], np.ndarray)
+    self.assertArraysEqual(y2['b'][0], 2 * x)
+    self.assertEqual(y2['b'][1], 3)
+    self.assertArraysEqual(y2['c'], np.arange(5, dtype=np.int32))
+
+  def test_device_get_async_unflatten_error(self):
+    class Node:
+      def __init__(self, value):
+        self.value = value
+
+    def unflatten(aux, children):
+      raise ValueError("can't unflatten")
+
+    tree_util.register_pytree_node(Node, lambda x: ((x.value,), None),
+                                   unflatten)
+    future = api.device_get_async(Node(api.device_put(np.arange(3))))
+    with self.assertRaisesRegex(ValueError, "can't unflatten"):
+      future.result(timeout=60)
+
   @parameterized.parameters([(3,)], [(2, 0)])
   def test_device_put_across_devices(self, shape):
     if len(api.local_devices()) < 2:
@@ -2961,12 +3123,55 @@ class APITest(jtu.JaxTestCase):
     self.assertEqual(inner_jaxpr.eqns[-2].primitive.name, 'mul')
     self.assertEqual(inner_jaxpr.eqns[-1].primitive.name, 'add')
 
+  @jtu.skip_on_devices("cpu")
+  def test_donate_eagerly(self):
+    x = device_put(np.ones((512, 512), np.float32))
+    y = lax.exp(x)
+    with jax.donate_eagerly(y):
+      z = lax.neg(y)
+    self.assertAllClose(z, -np.exp(np.ones((512, 512), np.float32)))
+    self.assertTrue(y.device_buffer.is_deleted())
+    self.assertFalse(x.device_buffer.is_deleted())
+    self.assertEmpty(dispatch._eager_donations.arrays)
+
+  def test_donate_eagerly_only_given_arrays(self):
+    x = device_put(np.ones((4, 4), np.float32))
+    y = device_put(np.ones((4, 4), np.float32))
+    with jax.donate_eagerly({'y': y}):
+      self.assertIs(dispatch._eager_donations.arrays[id(y)], y)
+      self.assertNotIn(id(x), dispatch._eager_donations.arrays)
+      self.assertAllClose(lax.add(x, x), 2 * np.ones((4, 4), np.float32))
+    self.assertFalse(x.device_buffer.is_deleted())
+    self.assertEmpty(dispatch._eager_donations.arrays)
+
   def test_primitive_compilation_cache(self):
     with jtu.count_primitive_compiles() as count:
       lax.add(1, 2)
       lax.add(2, 3)
     self.assertEqual(count[0], 1)
 
+  def test_primitive_fast_path_cache(self):
+    x = device_put(np.ones(3, np.float32))
+    y = device_put(np.arange(3, dtype=np.float32))
+    with jtu.count_primitive_compiles() as count:
+      self.assertEmpty(dispatch._fast_path_cache)
+      self.assertAllClose(lax.add(x, y), np.arange(1, 4, dtype=np.float32))
+      self.assertAllClose(lax.add(y, x), np.arange(1, 4, dtype=np.float32))
+      self.assertLen(dispatch._fast_path_cache, 1)
+      with mock.patch.object(dispatch, "xla_primitive_callable",
+                             side_effect=AssertionError("not cached")):
+        self.assertAllClose(lax.add(x, x), 2 * np.ones(3, np.float32))
+      # A different shape, dtype, or trace context is a different entry.
+      z = device_put(np.ones(2, np.float32))
+      lax.add(z, z)
+      lax.convert_element_type(x, np.int32)
+      with jax.numpy_rank_promotion("raise"):
+        lax.add(x, y)
+      self.assertLen(dispatch._fast_path_cache, 4)
+    self.assertEqual(count[0], 4)
+    dispatch.xla_primitive_callable.cache_clear()
+    self.assertEmpty(dispatch._fast_path_cache)
+
   def test_arange_jit(self):
     # see https://github.com/google/jax/issues/553
     def fun(x):
@@ -5064,6 +5269,32 @@ class JaxprTest(jtu.JaxTestCase):
     jaxpr = api.make_jaxpr(lambda: cet(3.))()
     self.assertLen(jaxpr.eqns, 0)
 
+  def test_cache_traced_jaxprs(self):
+    traces = []
+    def f(x):
+      traces.append(x)
+      return jnp.sum(jnp.sin(x) * x)
+
+    x = np.arange(3, dtype=np.float32)
+    xs = np.stack([x, 2 * x])
+    with jax._src.config.cache_traced_jaxprs(True):
+      self.assertAllClose(jit(f)(x), np.sum(np.sin(x) * x))
+      self.assertAllClose(jit(grad(f))(x), np.sin(x) + x * np.cos(x))
+      self.assertAllClose(jit(api.vmap(f))(xs), np.sum(np.sin(xs) * xs, axis=1))
+      # Calls with concrete arguments always run the Python function.
+      self.assertAllClose(grad(f)(x), np.sin(x) + x * np.cos(x))
+    self.assertLen(traces, 2)
+    self.assertIsInstance(traces[-1], ad.JVPTracer)
+
+  def test_cache_traced_jaxprs_closed_over_tracer(self):
+    def f(y):
+      g = lambda x: x * y
+      return jit(g)(1.) + api.vmap(g)(jnp.ones(2))
+
+    with jax._src.config.cache_traced_jaxprs(True):
+      self.assertAllClose(jit(f)(2.), 4. * np.ones(2))
+      self.assertAllClose(jit(f)(np.float32(3.)), 6. * np.ones(2))
+
 
 @unittest.skipIf(not config.after_neurips, "skip until neurips deadline")
 class DCETest(jtu.JaxTestCase):
@@ -5309,6 +5540,54 @@ class DCETest(jtu.JaxTestCase):
     self.assertAllClose(result1, result2)
 
 
+class SimplifyJaxprTest(jtu.JaxTestCase):
+
+  @staticmethod
+  def f(x):
+    a = lax.sin(x)
+    b = lax.sin(x)                          # common subexpression
+    c = jit(lambda u, v: u * v)(2., 3.)     # inlined, then folded
+    d = jit(lambda u: u)(a)                 # forwarded
+    lax.cos(x)                              # dead
+    return a + b + c + d
+
+  def test_simplify_jaxpr(self):
+    jaxpr = jax.make_jaxpr(self.f)(1.)
+    passes = ["inline", "forward", "fold", "cse", "dce"]
+    simplified, eqns_removed = pe.simplify_jaxpr(jaxpr, passes)
+    core.check_jaxpr(simplified.jaxpr)
+    self.assertEqual(list(eqns_removed), passes)
+    self.assertEqual([eqn.primitive for eqn in simplified.jaxpr.eqns],
+                     [lax.sin_p, lax.add_p, lax.add_p, lax.add_p])
+    all_eqns = lambda j: len(j.eqns) + sum(map(all_eqns, core.subjaxprs(j)))
+    self.assertEqual(sum(eqns_removed.values()),
+                     all_eqns(jaxpr.jaxpr) - all_eqns(simplified.jaxpr))
+    self.assertAllClose(
+        core.eval_jaxpr(simplified.jaxpr, simplified.consts, 1.),
+        core.eval_jaxpr(jaxpr.jaxpr, jaxpr.consts, 1.))
+
+  def test_cse_keeps_stateful_rng(self):
+    def f(x):
+      return (lax.rng_uniform(x, np.float32(1), (2,)),
+              lax.rng_uniform(x, np.float32(1), (2,)))
+
+    jaxpr = jax.make_jaxpr(f)(np.float32(0))
+    simplified, eqns_removed = pe.simplify_jaxpr(jaxpr, ["cse"])
+    self.assertLen(simplified.jaxpr.eqns, 2)
+    self.assertEqual(eqns_removed, {"cse": 0})
+
+  def test_simplification_passes_option(self):
+    f = lambda x: self.f(x)
+    with jax._src.config.jaxpr_simplification_passes("inline,fold,cse,dce"):
+      self.assertAllClose(jit(f)(2.), self.f(2.))
+
+  def test_unknown_simplification_pass(self):
+    jaxpr = jax.make_jaxpr(self.f)(1.)
+    with self.assertRaisesRegex(ValueError,
+                                "Unknown jaxpr simplification pass 'foo'"):
+      pe.simplify_jaxpr(jaxpr, ["foo"])
+
+
 class CustomJVPTest(jtu.JaxTestCase):
 
   def test_basic(self):
@@ -22,6 +22,7 @@ import unittest
 from unittest import SkipTest
 
 from absl.testing import absltest
+from absl.testing import parameterized
 from jax.experimental import PartitionSpec as P
 from jax.experimental.compilation_cache import compilation_cache as cc
 from jax.experimental.maps import xmap
@@ -46,7 +47,9 @@ class CompilationCacheTest(jtu.JaxTestCase):
 
   def tearDown(self):
       super().tearDown()
+      cc._stop_writer()
       cc._cache = None
+      cc._compression = None
 
   @unittest.skipIf(jax._src.lib.version < (0, 1, 68), "fails with earlier jaxlibs")
   def test_compile_options(self):
@@ -222,6 +225,40 @@ class CompilationCacheTest(jtu.JaxTestCase):
       actual = jax._src.lib.xla_client.execute_with_python_values(deserialized_executable, inputs_to_executable, backend)
       self.assertEqual(expected, actual)
 
+  @parameterized.parameters("none", "zlib", "zstd")
+  def test_put_executable_compressed(self, compression):
+    if compression == "zstd" and cc.zstandard is None:
+      raise SkipTest("zstandard is not installed")
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cc.initialize_cache(tmpdir, compression=compression)
+      computation = jax.xla_computation(lambda x, y: x + y)(1, 1)
+      compile_options = jax._src.lib.xla_bridge.get_compile_options(
+          num_replicas=1, num_partitions=1)
+      backend = jax._src.lib.xla_bridge.get_backend()
+      executable = backend.compile(computation, compile_options)
+      cc.put_executable("alambda", computation, compile_options, executable,
+                        backend)
+      deserialized_executable = cc.get_executable(computation, compile_options, backend)
+      inputs_to_executable = (np.array(1, dtype=np.int32), np.array(2, dtype=np.int32))
+      expected = jax._src.lib.xla_client.execute_with_python_values(executable, inputs_to_executable, backend)
+      actual = jax._src.lib.xla_client.execute_with_python_values(deserialized_executable, inputs_to_executable, backend)
+      self.assertEqual(expected, actual)
+
+  def test_encode_decode_entry(self):
+    serialized = b"serialized executable" * 100
+    self.assertEqual(cc._encode_entry(serialized, None), serialized)
+    self.assertEqual(cc._decode_entry(serialized), serialized)
+    for compression in ["none", "zlib"]:
+      entry = cc._encode_entry(serialized, compression)
+      self.assertTrue(entry.startswith(cc._ENTRY_MAGIC))
+      self.assertEqual(cc._decode_entry(entry), serialized)
+    self.assertLess(len(cc._encode_entry(serialized, "zlib")), len(serialized))
+
+  def test_unknown_compression(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      with self.assertRaisesRegex(ValueError, "Unknown compilation cache compression"):
+        cc.initialize_cache(tmpdir, compression="lz4")
+
   def test_pmap(self):
     with tempfile.TemporaryDirectory() as tmpdir:
       cc.initialize_cache(tmpdir)
@@ -247,6 +284,66 @@ class CompilationCacheTest(jtu.JaxTestCase):
       files_in_directory = len(os.listdir(tmpdir))
       self.assertEqual(files_in_directory, 2)
 
+  def test_jit_async_writes(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cc.initialize_cache(tmpdir, async_writes=True)
+      f = jit(lambda x: x*x)
+      f(1)
+      cc.wait_for_cache_writes()
+      files_in_directory = len(os.listdir(tmpdir))
+      self.assertEqual(files_in_directory, 1)
+      f(1.0)
+      cc.wait_for_cache_writes()
+      files_in_directory = len(os.listdir(tmpdir))
+      self.assertEqual(files_in_directory, 2)
+
+  def test_reinitialize_reuses_writer(self):
+    with tempfile.TemporaryDirectory() as tmpdir1, \
+         tempfile.TemporaryDirectory() as tmpdir2:
+      cc.initialize_cache(tmpdir1, async_writes=True)
+      writer = cc._writer
+      cc.put_bytes("foo", b"bar")
+      cc._cache = None
+      cc.initialize_cache(tmpdir2, async_writes=True)
+      self.assertIs(cc._writer, writer)
+      cc.wait_for_cache_writes()
+      self.assertEqual(os.listdir(tmpdir1), ["foo"])
+      self.assertEqual(os.listdir(tmpdir2), [])
+      cc._cache = None
+      cc.initialize_cache(tmpdir2)
+      self.assertIsNone(cc._writer)
+      self.assertFalse(writer._thread.is_alive())
+
+  def test_jit_jaxpr_fingerprint(self):
+    with tempfile.TemporaryDirectory() as tmpdir, \
+         jax._src.config.persistent_cache_fingerprint('jaxpr'):
+      cc.initialize_cache(tmpdir)
+      f = jit(lambda x: x*x)
+      self.assertEqual(f(2), 4)
+      files_in_directory = len(os.listdir(tmpdir))
+      self.assertEqual(files_in_directory, 1)
+      self.assertEqual(f(2.0), 4.0)
+      files_in_directory = len(os.listdir(tmpdir))
+      self.assertEqual(files_in_directory, 2)
+      # A fresh function with the same jaxpr is a cache hit, without lowering.
+      lowered = jit(lambda x: x*x).lower(3)._lowering
+      self.assertEqual(lowered.compile().unsafe_call(3)[0], 9)
+      self.assertIsNotNone(lowered._lower_fn)
+      files_in_directory = len(os.listdir(tmpdir))
+      self.assertEqual(files_in_directory, 2)
+
+  def test_jaxpr_fingerprint(self):
+    def fingerprint(f, *args):
+      return cc.get_jaxpr_fingerprint("jit_f", jax.make_jaxpr(f)(*args),
+                                      [False] * len(args), "tpu")
+    f = lambda x: x * 2 + 1
+    self.assertEqual(fingerprint(f, 1.), fingerprint(f, 1.))
+    self.assertNotEqual(fingerprint(f, 1.), fingerprint(f, 1))
+    self.assertNotEqual(fingerprint(f, 1.), fingerprint(lambda x: x * 3, 1.))
+    c1, c2 = np.arange(3.), np.arange(3.) + 1
+    self.assertNotEqual(fingerprint(lambda x: x + c1, c1),
+                        fingerprint(lambda x: x + c2, c1))
+
   @jtu.with_mesh([('x', 2)])
   def test_pjit(self):
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -31,6 +31,17 @@ class FileSystemCacheTest(jtu.JaxTestCase):
      cache.put("foo", b"bar")
      self.assertEqual(cache.get("foo"), b"bar")
 
+  def test_get_buffer(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache = GFileCache(tmpdir)
+      self.assertEqual(cache.get_buffer("foo"), None)
+      cache.put("foo", b"bar")
+      buf = cache.get_buffer("foo")
+      self.assertEqual(buf[:], b"bar")
+      buf.close()
+      cache.put("empty", b"")
+      self.assertEqual(cache.get_buffer("empty"), b"")
+
   def test_existing_cache_path(self):
     with tempfile.TemporaryDirectory() as tmpdir:
       cache1 = GFileCache(tmpdir)
@@ -0,0 +1,172 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from functools import partial
+import os
+import tempfile
+import types
+from unittest import mock
+
+from absl.testing import absltest
+import numpy as np
+
+import jax
+from jax import jit
+import jax.numpy as jnp
+from jax._src import dispatch
+import jax._src.test_util as jtu
+from jax.experimental.compilation_cache import compilation_cache as cc
+from jax.experimental.compilation_cache import jaxpr_cache
+
+from jax.config import config
+config.parse_flags_with_absl()
+
+
+def _key(f, *args, static_args=()):
+  args_flat, in_tree = jax.tree_util.tree_flatten((args, {}))
+  arg_specs = [dispatch.arg_spec(x) for x in args_flat]
+  return jaxpr_cache.get_cache_key(f, static_args, in_tree, arg_specs,
+                                   [False] * len(args_flat), None, None, False)
+
+
+def _helper(x):
+  return x * 2
+
+
+class JaxprCacheKeyTest(jtu.JaxTestCase):
+
+  def test_same_function_same_key(self):
+    f = lambda x: x + 1
+    self.assertEqual(_key(f, 1.), _key(f, 1.))
+    g = lambda x: x + 1
+    self.assertEqual(_key(f, 1.), _key(g, 1.))
+
+  def test_different_code(self):
+    self.assertNotEqual(_key(lambda x: x + 1, 1.), _key(lambda x: x + 2, 1.))
+
+  def test_different_avals(self):
+    f = lambda x: x + 1
+    self.assertNotEqual(_key(f, 1.), _key(f, 1))
+    self.assertNotEqual(_key(f, np.ones(3)), _key(f, np.ones(4)))
+
+  def test_static_args(self):
+    f = lambda x: x + 1
+    self.assertNotEqual(_key(f, 1., static_args=(1,)),
+                        _key(f, 1., static_args=(2,)))
+
+  def test_closure(self):
+    def make(c):
+      return lambda x: x + c
+    self.assertEqual(_key(make(np.ones(3)), 1.), _key(make(np.ones(3)), 1.))
+    self.assertNotEqual(_key(make(np.ones(3)), 1.), _key(make(np.zeros(3)), 1.))
+
+  def test_same_module_helper(self):
+    f = lambda x: _helper(x) + 1
+    key = _key(f, 1.)
+    with mock.patch.object(_helper, "__code__", (lambda x: x * 3).__code__):
+      self.assertNotEqual(key, _key(f, 1.))
+
+  def test_other_module_helper(self):
+    other = types.ModuleType("other")
+    exec(compile("def helper(x):\n  return x * 2\n", "/home/user/other.py",
+                 "exec"), other.__dict__)
+    f = lambda x: other.helper(x) + 1
+    g = lambda x: helper(x) + 1
+    helper = other.helper
+    key_f, key_g = _key(f, 1.), _key(g, 1.)
+    with mock.patch.object(other.helper, "__code__", (lambda x: x * 3).__code__):
+      self.assertNotEqual(key_f, _key(f, 1.))
+      self.assertNotEqual(key_g, _key(g, 1.))
+
+  def test_library_function(self):
+    f = lambda x: jnp.sin(x) + np.cos(1.)
+    self.assertEqual(_key(f, 1.), _key(f, 1.))
+
+  def test_partial(self):
+    f = lambda x, y: x + y
+    self.assertNotEqual(_key(partial(f, y=1), 1.), _key(partial(f, y=2), 1.))
+
+  def test_uncacheable(self):
+    class Opaque:
+      pass
+    obj = Opaque()
+    f = lambda x: x + (obj is None)
+    with self.assertRaises(jaxpr_cache._Uncacheable):
+      _key(f, 1.)
+
+  def test_object_repr_is_not_trusted(self):
+    class Scale:
+      def __init__(self, c):
+        self.c = c
+      def __repr__(self):
+        return "Scale"
+    scale = Scale(2.)
+    f = lambda x: x * scale.c
+    with self.assertRaises(jaxpr_cache._Uncacheable):
+      _key(f, 1.)
+
+
+@jtu.with_config(jax_persistent_jaxpr_cache=True)
+class JaxprCacheTest(jtu.JaxTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.tmpdir = tempfile.TemporaryDirectory()
+    cc.initialize_cache(self.tmpdir.name)
+    jaxpr_cache.clear_cache()
+
+  def tearDown(self):
+    cc._cache = None
+    jaxpr_cache.clear_cache()
+    self.tmpdir.cleanup()
+    super().tearDown()
+
+  def test_warm_start_skips_tracing(self):
+    def f(x, y):
+      return {"sum": jnp.sin(x) + y, "prod": x * y}
+
+    x, y = np.arange(4.), np.ones(4)
+    expected = jit(f)(x, y)
+    entries = [n for n in os.listdir(self.tmpdir.name) if n.startswith("jaxpr-")]
+    self.assertLen(entries, 1)
+
+    # Simulate a new process: forget everything held in memory.
+    jaxpr_cache.clear_cache()
+    with mock.patch.object(dispatch, "lower_xla_callable",
+                           side_effect=AssertionError("retraced")):
+      actual = jit(f)(x, y)
+    self.assertAllClose(expected, actual)
+
+  def test_static_argnums(self):
+    f = jit(lambda x, n: x * n, static_argnums=1)
+    self.assertAllClose(f(np.ones(3), 2), 2 * np.ones(3))
+    self.assertAllClose(f(np.ones(3), 3), 3 * np.ones(3))
+    entries = [n for n in os.listdir(self.tmpdir.name) if n.startswith("jaxpr-")]
+    self.assertLen(entries, 2)
+
+  def test_traced_calls_are_not_cached(self):
+    f = jit(lambda x: x * 2)
+    self.assertAllClose(jax.grad(f)(1.), 2.)
+    entries = [n for n in os.listdir(self.tmpdir.name) if n.startswith("jaxpr-")]
+    self.assertEmpty(entries)
+
+  def test_disabled(self):
+    with jax._src.config.persistent_jaxpr_cache(False):
+      jit(lambda x: x * 2)(1.)
+    entries = [n for n in os.listdir(self.tmpdir.name) if n.startswith("jaxpr-")]
+    self.assertEmpty(entries)
+
+
+if __name__ == "__main__":
+  absltest.main(testLoader=jtu.JaxTestLoader())
@@ -0,0 +1,110 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from absl.testing import absltest
+import numpy as np
+
+import jax
+from jax import lax
+import jax.numpy as jnp
+from jax._src import config as jax_config
+from jax._src import lazy_dispatch
+import jax._src.test_util as jtu
+
+from jax.config import config
+config.parse_flags_with_absl()
+
+
+class LazyDispatchTest(jtu.JaxTestCase):
+
+  def test_primitives_are_recorded(self):
+    x = jnp.arange(4, dtype=np.float32)
+    with jtu.count_primitive_compiles() as count:
+      with jax_config.lazy_eager(True):
+        y = lax.add(lax.mul(lax.sin(x), np.float32(2)), np.float32(1))
+      self.assertIsInstance(y, lazy_dispatch._LazyDeviceArray)
+      self.assertIsInstance(y, jnp.ndarray)
+      self.assertEqual(y.shape, (4,))
+      self.assertEqual(y.dtype, np.float32)
+    self.assertEqual(count[0], 0)
+    self.assertAllClose(y, np.sin(np.arange(4, dtype=np.float32)) * 2 + 1)
+
+  def test_fused_computation_is_cached(self):
+    def f(x):
+      with jax_config.lazy_eager(True):
+        return lax.exp(lax.neg(x))
+    x = jnp.ones(3, np.float32)
+    np.asarray(f(x))
+    num_entries = len(lazy_dispatch._fused_cache)
+    self.assertAllClose(f(2 * x), np.exp(-2 * np.ones(3, np.float32)))
+    self.assertLen(lazy_dispatch._fused_cache, num_entries)
+
+  def test_live_intermediates_are_materialized(self):
+    x = jnp.ones(3, np.float32)
+    with jax_config.lazy_eager(True):
+      a = lax.add(x, x)
+      b = lax.mul(lax.add(x, x), a)
+    self.assertIsNone(a._array)
+    self.assertAllClose(b, 4 * np.ones(3, np.float32))
+    self.assertIsNotNone(a._array)
+    self.assertAllClose(a, 2 * np.ones(3, np.float32))
+
+  def test_observation(self):
+    x = jnp.arange(3, dtype=np.float32)
+    with jax_config.lazy_eager(True):
+      y = lax.add(x, np.float32(1))
+      self.assertTrue(bool(lax.reduce_max(y, (0,)) > 2))
+      self.assertEqual(int(lax.reduce_max(y, (0,))), 3)
+      self.assertIn("1., 2., 3.", repr(y))
+      self.assertEqual(lax.neg(y).block_until_ready().shape, (3,))
+      self.assertAllClose(jax.device_get(y), np.arange(1, 4, dtype=np.float32))
+      self.assertAllClose(jnp.sum(y), 6.)
+
+  def test_jit_calls_are_recorded(self):
+    f = jax.jit(lambda x, y: (x * y, x + 1))
+    x = jnp.arange(3, dtype=np.float32)
+    with jax_config.lazy_eager(True):
+      y, z = f(x, 2.)
+      w = lax.add(y, z)
+    self.assertIsInstance(w, lazy_dispatch._LazyDeviceArray)
+    self.assertAllClose(w, 3 * np.arange(3, dtype=np.float32) + 1)
+
+  def test_long_chain(self):
+    x = jnp.zeros((), np.float32)
+    with jax_config.lazy_eager(True):
+      for _ in range(2 * lazy_dispatch._MAX_PENDING_EQNS + 1):
+        x = lax.add(x, np.float32(1))
+    self.assertAllClose(x, 2. * lazy_dispatch._MAX_PENDING_EQNS + 1)
+
+  def test_device_put(self):
+    with jax_config.lazy_eager(True):
+      y = lax.add(jnp.ones(2, np.float32), np.float32(1))
+    z = jax.device_put(y, jax.devices()[0])
+    self.assertAllClose(z, 2 * np.ones(2, np.float32))
+
+  def test_grad(self):
+    # The cotangents of `x` are lazy arrays added by `add_jaxvals`.
+    x = jnp.arange(3, dtype=np.float32)
+    with jax_config.lazy_eager(True):
+      g = jax.grad(lambda x: jnp.sum(x * x))(x)
+      h = jax.grad(lambda x: jnp.sum(jnp.sin(x) * x))(x)
+    self.assertAllClose(g, 2 * np.arange(3, dtype=np.float32))
+    self.assertAllClose(h, np.sin(np.arange(3, dtype=np.float32)) +
+                        np.arange(3, dtype=np.float32) *
+                        np.cos(np.arange(3, dtype=np.float32)),
+                        rtol=1e-6)
+
+
+if __name__ == "__main__":
+  absltest.main(testLoader=jtu.JaxTestLoader())
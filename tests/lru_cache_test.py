@@ -0,0 +1,181 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+from unittest import mock
+
+from absl.testing import absltest
+from jax.experimental.compilation_cache.lru_cache import LRUCache
+import jax._src.test_util as jtu
+
+
+class LRUCacheTest(jtu.JaxTestCase):
+
+  def test_get_nonexistent_key(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache = LRUCache(tmpdir, max_size_bytes=100)
+      self.assertEqual(cache.get("nonExistentKey"), None)
+      self.assertFalse(cache.contains("nonExistentKey"))
+
+  def test_put_and_get_key(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache = LRUCache(tmpdir, max_size_bytes=100)
+      cache.put("foo", b"bar")
+      self.assertTrue(cache.contains("foo"))
+      self.assertEqual(cache.get("foo"), b"bar")
+      self.assertEqual(cache.total_size_bytes, 3)
+
+  def test_get_buffer(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache = LRUCache(tmpdir, max_size_bytes=100)
+      self.assertEqual(cache.get_buffer("foo"), None)
+      cache.put("foo", b"bar")
+      buf = cache.get_buffer("foo")
+      self.assertEqual(buf[:], b"bar")
+      buf.close()
+
+  def test_overwrite_key(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache = LRUCache(tmpdir, max_size_bytes=100)
+      cache.put("foo", b"bar")
+      cache.put("foo", b"bazz")
+      self.assertEqual(cache.get("foo"), b"bazz")
+      self.assertEqual(cache.total_size_bytes, 4)
+      self.assertLen(cache, 1)
+
+  def test_existing_cache_path(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache1 = LRUCache(tmpdir, max_size_bytes=100)
+      cache1.put("foo", b"bar")
+      del cache1
+      cache2 = LRUCache(tmpdir, max_size_bytes=100)
+      self.assertEqual(cache2.get("foo"), b"bar")
+      self.assertEqual(cache2.total_size_bytes, 3)
+
+  def test_entries_without_index(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      with open(os.path.join(tmpdir, "foo"), "wb") as f:
+        f.write(b"bar")
+      cache = LRUCache(tmpdir, max_size_bytes=100)
+      self.assertEqual(cache.get("foo"), b"bar")
+      self.assertEqual(cache.total_size_bytes, 3)
+
+  def test_entry_removed_while_loading_index(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      with open(os.path.join(tmpdir, "foo"), "wb") as f:
+        f.write(b"bar")
+      listdir = os.listdir
+      # "gone" is listed but evicted by another process before it is stat'ed.
+      with mock.patch.object(os, "listdir",
+                             side_effect=lambda path: listdir(path) + ["gone"]):
+        cache = LRUCache(tmpdir, max_size_bytes=100)
+      self.assertEqual(cache.get("foo"), b"bar")
+      self.assertFalse(cache.contains("gone"))
+      self.assertEqual(cache.total_size_bytes, 3)
+
+  def test_lru_eviction(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache = LRUCache(tmpdir, max_size_bytes=20)
+      cache.put("a", b"0" * 8)
+      cache.put("b", b"1" * 8)
+      cache.get("a")
+      cache.put("c", b"2" * 8)
+      self.assertEqual(cache.get("a"), b"0" * 8)
+      self.assertEqual(cache.get("b"), None)
+      self.assertEqual(cache.get("c"), b"2" * 8)
+      self.assertFalse(os.path.exists(os.path.join(tmpdir, "b")))
+      self.assertEqual(cache.total_size_bytes, 16)
+
+  def test_cost_eviction(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache = LRUCache(tmpdir, max_size_bytes=20, eviction_policy="cost")
+      cache.put("a", b"0" * 8, compile_time_secs=1.)
+      cache.put("b", b"1" * 8, compile_time_secs=10.)
+      cache.put("c", b"2" * 8, compile_time_secs=5.)
+      self.assertEqual(cache.get("a"), None)
+      self.assertEqual(cache.get("b"), b"1" * 8)
+      self.assertEqual(cache.get("c"), b"2" * 8)
+
+  def test_entry_larger_than_cache(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache = LRUCache(tmpdir, max_size_bytes=4)
+      cache.put("foo", b"barbaz")
+      self.assertEqual(cache.get("foo"), None)
+      self.assertEqual(cache.total_size_bytes, 0)
+
+  def test_shared_directory(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache1 = LRUCache(tmpdir, max_size_bytes=100)
+      cache2 = LRUCache(tmpdir, max_size_bytes=100)
+      cache1.put("foo", b"bar")
+      self.assertEqual(cache2.get("foo"), b"bar")
+
+  def test_access_times_shared_between_processes(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache1 = LRUCache(tmpdir, max_size_bytes=20)
+      cache1.put("a", b"0" * 8)
+      cache1.put("b", b"1" * 8)
+      cache1.get("a")
+      cache1.flush_index()
+      cache2 = LRUCache(tmpdir, max_size_bytes=20)
+      cache2.put("c", b"2" * 8)
+      self.assertEqual(cache2.get("a"), b"0" * 8)
+      self.assertEqual(cache2.get("b"), None)
+
+  def test_put_appends_to_journal(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache = LRUCache(tmpdir, max_size_bytes=1000)
+      cache.put("a", b"0")
+      cache.put("b", b"1")
+      self.assertFalse(os.path.exists(os.path.join(tmpdir, "_index.json")))
+      with open(os.path.join(tmpdir, "_index.journal")) as f:
+        self.assertLen(f.readlines(), 2)
+      cache2 = LRUCache(tmpdir, max_size_bytes=1000)
+      self.assertLen(cache2, 2)
+      self.assertEqual(cache2.total_size_bytes, 2)
+
+  def test_journal_compaction(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache = LRUCache(tmpdir, max_size_bytes=10)
+      for i in range(300):
+        cache.put(f"key{i}", b"0")
+      self.assertTrue(os.path.exists(os.path.join(tmpdir, "_index.json")))
+      with open(os.path.join(tmpdir, "_index.journal")) as f:
+        self.assertLess(len(f.readlines()), 300)
+      cache2 = LRUCache(tmpdir, max_size_bytes=10)
+      self.assertLen(cache2, 10)
+      self.assertEqual(cache2.get("key299"), b"0")
+      self.assertEqual(cache2.get("key289"), None)
+
+  def test_empty_key(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      cache = LRUCache(tmpdir, max_size_bytes=100)
+      with self.assertRaisesRegex(ValueError, r"key cannot be empty"):
+        cache.put("", b"bar")
+      with self.assertRaisesRegex(ValueError, r"key cannot be empty"):
+        cache.get("")
+
+  def test_invalid_arguments(self):
+    with tempfile.TemporaryDirectory() as tmpdir:
+      with self.assertRaisesRegex(ValueError, r"max_size_bytes"):
+        LRUCache(tmpdir, max_size_bytes=0)
+      with self.assertRaisesRegex(ValueError, r"eviction_policy"):
+        LRUCache(tmpdir, max_size_bytes=100, eviction_policy="fifo")
+    with self.assertRaisesRegex(ValueError, r"local file systems"):
+      LRUCache("gs://bucket/cache", max_size_bytes=100)
+
+
+if __name__ == "__main__":
+  absltest.main(testLoader=jtu.JaxTestLoader())
@@ -236,6 +236,21 @@ class PythonPmapTest(jtu.JaxTestCase):
         "called with:\n.*int32.*",
         lambda: f_exe(x_i32))
 
+  def testLowerDonatedOutputs(self):
+    f = self.pmap(lambda x, y: (x + 1, lax.psum(y, 'i').sum()), axis_name='i',
+                  donate_argnums=(0, 1))
+    shape = (jax.device_count(), 4)
+    x = np.arange(prod(shape), dtype=np.float32).reshape(shape)
+    y = np.ones((jax.device_count(), 2), dtype=np.int32)
+    with warnings.catch_warnings():
+      # Unusable donations are warned about.
+      warnings.simplefilter("ignore")
+      lowering = f.lower(x, y)._lowering
+    if jtu.device_under_test() == "cpu":
+      self.assertEqual(lowering.donated_outputs, (None, None))
+    else:
+      self.assertEqual(lowering.donated_outputs, (0, None))
+
   def testLowerCompileMultiArg(self):
     f = self.pmap(lambda x, y: x - lax.pmean(y, 'i'), axis_name='i')
     shape = (jax.device_count(), 4)
@@ -2305,6 +2320,33 @@ class PmapWithDevicesTest(jtu.JaxTestCase):
     self.assertAllClose(r0, expected, atol=1e-6, rtol=1e-3)
     self.assertAllClose(r1, expected, atol=1e-6, rtol=1e-3)
 
+  def testExecutablePool(self):
+    core_on_chip = getattr(jax.devices()[0], "core_on_chip", None)
+    devices = [d for d in jax.devices()
+               if getattr(d, "core_on_chip", None) == core_on_chip]
+    if len(devices) == 1:
+      raise SkipTest("this test requires multiple devices")
+    old_value = config.jax_pmap_executable_pool
+    config.update('jax_pmap_executable_pool', True)
+    self.addCleanup(config.update, 'jax_pmap_executable_pool', old_value)
+    pxla._pmap_executable_pool.clear()
+
+    f = lambda x: x * 2 + 1
+    x = np.arange(4, dtype=np.float32).reshape(1, 4)
+    for d in devices[:2]:
+      out = pmap(f, devices=[d])(x)
+      self.assertAllClose(out, f(x))
+      # The pooled executable runs on the devices it was loaded for.
+      self.assertEqual(out.device_buffers[0].device(), d)
+    # Both device sets share one executable on backends that can relocate it.
+    if jtu.device_under_test() == "tpu":
+      self.assertLen(pxla._pmap_executable_pool, 1)
+      (_, size, _), = pxla._pmap_executable_pool.entries.values()
+      self.assertGreater(size, 0)
+      self.assertEqual(pxla._pmap_executable_pool.total_bytes, size)
+    else:
+      self.assertEmpty(pxla._pmap_executable_pool)
+
   def testNoDevicesError(self):
     f = pmap(lambda x: x - lax.psum(x, 'i'), axis_name='i', devices=[])
     shape = (jax.device_count(), 4)
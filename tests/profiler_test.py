@@ -14,6 +14,8 @@
 
 from functools import partial
 import glob
+import gzip
+import json
 import os
 import shutil
 import tempfile
@@ -134,6 +136,34 @@ class ProfilerTest(unittest.TestCase):
       if jtu.device_under_test() == "tpu":
         self.assertIn(b"/device:TPU", proto)
 
+  def testCompileTrace(self):
+    def compile_traced_fn(x):
+      return jnp.sin(x) * 2
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+      with jax.profiler.trace(tmpdir):
+        jax.jit(compile_traced_fn)(jnp.ones(3)).block_until_ready()
+
+      trace_path = glob.glob(
+          os.path.join(tmpdir, "**/jax_compile_trace.json.gz"), recursive=True)
+      self.assertEqual(len(trace_path), 1)
+      with gzip.open(trace_path[0], "rb") as f:
+        events = json.load(f)["traceEvents"]
+
+    events = [e for e in events if e["ph"] == "X"]
+    phases = {e["cat"] for e in events}
+    for phase in ["jit_cache_miss", "trace", "simplify", "lower", "compile"]:
+      self.assertIn(phase, phases)
+    trace_event, = [e for e in events if e["cat"] == "trace"]
+    self.assertEqual(trace_event["args"]["function"], "compile_traced_fn")
+    eqn_counts = trace_event["args"]["eqns_by_source"]
+    self.assertGreaterEqual(sum(eqn_counts.values()), 2)
+    self.assertTrue(all("profiler_test.py" in line for line in eqn_counts))
+
+    # Nothing is recorded once the trace has stopped.
+    with jax._src.profiler.compile_event("trace", "f") as event:
+      self.assertIsNone(event)
+
   def testTraceAnnotation(self):
     x = 3
     with jax.profiler.TraceAnnotation("mycontext"):
@@ -160,6 +190,16 @@ class ProfilerTest(unittest.TestCase):
       return x + 2
     self.assertEqual(h(7), 9)
 
+  def testCacheStats(self):
+    f = jax.jit(lambda x: x + 1)
+    f(1.)
+    stats = jax.profiler.cache_stats()
+    name = "jax._src.dispatch._xla_callable_uncached"
+    self.assertIn(name, stats)
+    misses = stats[name].misses
+    f(jnp.ones(3))
+    self.assertEqual(jax.profiler.cache_stats()[name].misses, misses + 1)
+
   def testDeviceMemoryProfile(self):
     x = jnp.ones((20,)) + 7.
     self.assertIsInstance(jax.profiler.device_memory_profile(), bytes)
@@ -334,6 +334,27 @@ class cuSparseTest(jtu.JaxTestCase):
     with self.gpu_matmul_warning_context(dtype):
       self.assertAllClose(op(M) @ B, jit(matmat)(*args), rtol=MATMUL_TOL)
 
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": f"_T={transpose}", "transpose": transpose}
+      for transpose in [True, False]))
+  def test_csr_matvec_matmat_many_nonzeros(self, transpose):
+    # Large enough for the CPU kernels to split rows between threads.
+    M = scipy.sparse.random(600, 500, density=0.5, format='csr',
+                            dtype=np.float32, random_state=self.rng())
+    M.indices = M.indices.astype(np.int32)
+    M.indptr = M.indptr.astype(np.int32)
+    op = lambda M: M.T if transpose else M
+    v = self.rng().randn(op(M).shape[1]).astype(np.float32)
+    B = self.rng().randn(op(M).shape[1], 3).astype(np.float32)
+    args = (M.data, M.indices, M.indptr)
+
+    matvec = jit(partial(sparse.csr_matvec, shape=M.shape, transpose=transpose))
+    matmat = jit(partial(sparse.csr_matmat, shape=M.shape, transpose=transpose))
+    todense = jit(partial(sparse.csr_todense, shape=M.shape))
+    self.assertAllClose(op(M) @ v, matvec(*args, v), rtol=MATMUL_TOL)
+    self.assertAllClose(op(M) @ B, matmat(*args, B), rtol=MATMUL_TOL)
+    self.assertArraysEqual(M.toarray(), todense(*args))
+
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": f"_{jtu.format_shape_dtype_string(shape, dtype)}",
        "shape": shape, "dtype": dtype}
@@ -1485,6 +1506,66 @@ class BCOOTest(jtu.JaxTestCase):
     # matrix-matrix product -> product of nse
     N = sparse.BCOO.fromdense(jnp.arange(12).reshape(3, 4))
     self.assertEqual((M @ N).nse, M.nse * N.nse)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name":
+       "_lhs_shape={}[n_batch={}]_rhs_shape={}[n_batch={}]_dimension_numbers={}"
+       .format(jtu.format_shape_dtype_string(lhs_shape, dtype), lhs_n_batch,
+               jtu.format_shape_dtype_string(rhs_shape, dtype), rhs_n_batch,
+               dimension_numbers),
+       "lhs_shape": lhs_shape, "rhs_shape": rhs_shape, "dtype": dtype,
+       "dimension_numbers": dimension_numbers,
+       "lhs_n_batch": lhs_n_batch, "rhs_n_batch": rhs_n_batch}
+      for lhs_shape, lhs_n_batch, rhs_shape, rhs_n_batch, dimension_numbers in [
+          ((3, 5), 0, (2, 4), 0, (([], []), ([], []))),
+          ((5,), 0, (5,), 0, (([0], [0]), ([], []))),
+          ((5, 7), 0, (7,), 0, (([1], [0]), ([], []))),
+          ((5, 7), 0, (7, 3), 0, (([1], [0]), ([], []))),
+          ((7, 5), 0, (7, 3), 0, (([0], [0]), ([], []))),
+          ((2, 3, 4), 1, (2, 4, 3), 1, (([2], [1]), ([0], [0]))),
+          ((2, 3, 4, 3), 1, (2, 4, 3, 4), 1, (([2, 3], [1, 2]), ([0], [0]))),
+      ]
+      for dtype in jtu.dtypes.floating + jtu.dtypes.complex))
+  def test_bcoo_spdot_general_sorted(self, lhs_shape, lhs_n_batch, rhs_shape,
+                                     rhs_n_batch, dtype, dimension_numbers):
+    sprng = rand_sparse(self.rng())
+    def args_maker():
+      x = sprng(lhs_shape, dtype)
+      y = sprng(rhs_shape, dtype)
+      xsp = sparse.BCOO.fromdense(x, n_batch=lhs_n_batch)
+      ysp = sparse.BCOO.fromdense(y, n_batch=rhs_n_batch)
+      return x, y, xsp, ysp
+
+    def f_dense(x, y, xsp, ysp):
+      return lax.dot_general(x, y, dimension_numbers=dimension_numbers)
+
+    def f_sparse(x, y, xsp, ysp):
+      # An upper bound on the number of nonzero products.
+      nse = xsp.nse * ysp.nse
+      out = sparse.bcoo_dot_general(xsp, ysp, dimension_numbers=dimension_numbers,
+                                    nse=nse)
+      self.assertEqual(out.nse, nse)
+      return out.todense()
+
+    tol = {"complex128": 1E-14}
+    self._CheckAgainstNumpy(f_dense, f_sparse, args_maker, tol=tol)
+    self._CheckAgainstNumpy(jit(f_dense), jit(f_sparse), args_maker, tol=tol)
+
+  def test_bcoo_spdot_general_sorted_nse(self):
+    # M has 8 nonzeros and each row of N has 2 nonzeros, so there are 16
+    # nonzero products, fewer than M.nse * N.nse.
+    M = jnp.zeros((4, 4)).at[jnp.arange(4), jnp.arange(4)].set(1.0)
+    M = M.at[jnp.arange(4), (jnp.arange(4) + 1) % 4].set(2.0)
+    N = M.T
+    Msp, Nsp = sparse.BCOO.fromdense(M), sparse.BCOO.fromdense(N)
+    out = sparse.bcoo_dot_general(Msp, Nsp, dimension_numbers=(([1], [0]), ([], [])),
+                                  nse=16)
+    self.assertEqual(out.nse, 16)
+    self.assertArraysEqual(out.todense(), M @ N)
+
+    out = sparse.sparsify(jnp.matmul, spdot_nse=16)(Msp, Nsp)
+    self.assertEqual(out.nse, 16)
+    self.assertArraysEqual(out.todense(), M @ N)
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name":
        "_lhs_shape={}[n_batch={}]_rhs_shape={}[n_batch={}]_dimension_numbers={}"
@@ -1694,6 +1775,7 @@ class BCOOTest(jtu.JaxTestCase):
     rng_sparse = rand_sparse(self.rng(), rand_method=jtu.rand_some_zero)
     M = sparse.BCOO.fromdense(rng_sparse(shape, dtype), n_batch=n_batch, n_dense=n_dense)
     M.indices = M.indices[..., ::-1, :]
+    M.indices_sorted = False
 
     M_sorted = M.sort_indices()
     self.assertArraysEqual(M.todense(), M_sorted.todense())
@@ -1784,6 +1866,163 @@ class BCOOTest(jtu.JaxTestCase):
     self.assertArraysEqual(x.indices, y.indices)
     self.assertArraysEqual(x.data, y.data)
 
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_nbatch={}_nse={}".format(n_batch, nse),
+       "n_batch": n_batch, "nse": nse}
+      for n_batch in [0, 1]
+      for nse in [None, 8, 20]))
+  def test_bcoo_sum_duplicates_sorted(self, n_batch, nse):
+    rng_sparse = rand_sparse(self.rng())
+    M = sparse.BCOO.fromdense(rng_sparse((3, 4, 5), np.float32), n_batch=n_batch)
+    # Repeating each entry in place keeps the indices sorted.
+    data = jnp.repeat(M.data, 2, axis=n_batch)
+    indices = jnp.repeat(M.indices, 2, axis=n_batch)
+    M_sorted = sparse.BCOO((data, indices), shape=M.shape, indices_sorted=True)
+    M_unsorted = sparse.BCOO((data, indices), shape=M.shape)
+
+    expected = sparse.bcoo_sum_duplicates(M_unsorted, nse=nse)
+    actual = sparse.bcoo_sum_duplicates(M_sorted, nse=nse)
+    self.assertArraysEqual(expected.indices, actual.indices)
+    self.assertAllClose(expected.data, actual.data)
+    self.assertAllClose(M.todense(), actual.todense())
+
+    if nse is not None:
+      actual_jit = jit(partial(sparse.bcoo_sum_duplicates, nse=nse))(M_sorted)
+      self.assertArraysEqual(expected.indices, actual_jit.indices)
+      self.assertAllClose(expected.data, actual_jit.data)
+
+  def test_bcoo_sum_duplicates_sorted_padding(self):
+    # Out-of-bound entries need not come last for the sorted path.
+    size = 4
+    data = jnp.array([1., 2., 3., 4., 5.])
+    indices = jnp.array([0, 0, size, 2, 2])[:, None]
+    x_sorted = sparse.BCOO((data, indices), shape=(size,), indices_sorted=True)
+    x_unsorted = sparse.BCOO((data, indices), shape=(size,))
+    self.assertArraysEqual(x_unsorted.todense(), x_sorted.sum_duplicates(nse=5).todense())
+    y = sparse.bcoo_sum_duplicates(x_sorted)
+    self.assertEqual(y.nse, 2)
+    self.assertArraysEqual(y.indices, jnp.array([[0], [2]]))
+    self.assertArraysEqual(y.data, jnp.array([3., 9.]))
+
+  def test_bcoo_sorted_unique_skips_work(self):
+    rng_sparse = rand_sparse(self.rng())
+    M = sparse.BCOO.fromdense(rng_sparse((5, 6), np.float32))
+    self.assertTrue(M.indices_sorted)
+    self.assertTrue(M.unique_indices)
+    self.assertIs(sparse.bcoo_sort_indices(M), M)
+    self.assertIs(sparse.bcoo_sum_duplicates(M, nse=M.nse), M)
+    self.assertIsNot(sparse.bcoo_sum_duplicates(M, nse=M.nse + 1), M)
+
+  def test_bcoo_indices_sorted_propagation(self):
+    rng_sparse = rand_sparse(self.rng())
+    M = sparse.BCOO.fromdense(rng_sparse((2, 3, 4, 5), np.float32), n_batch=1)
+
+    self.assertTrue(sparse.bcoo_transpose(M, permutation=(0, 1, 2, 3)).indices_sorted)
+    M_T = sparse.bcoo_transpose(M, permutation=(0, 2, 1, 3))
+    self.assertFalse(M_T.indices_sorted)
+    self.assertTrue(M_T.unique_indices)
+    self.assertEqual(M_T.shape, (2, 4, 3, 5))
+
+    # Dropping the trailing sparse dimension keeps the order but not uniqueness.
+    M_sum = sparse.bcoo_reduce_sum(M, axes=(3,))
+    self.assertTrue(M_sum.indices_sorted)
+    self.assertFalse(M_sum.unique_indices)
+    M_sum = sparse.bcoo_reduce_sum(M, axes=(1,))
+    self.assertFalse(M_sum.indices_sorted)
+    M_sum = sparse.bcoo_reduce_sum(M, axes=(0,))
+    self.assertFalse(M_sum.indices_sorted)
+    self.assertFalse(M_sum.unique_indices)
+
+    M_mul = sparse.bcoo_multiply_sparse(M, M)
+    self.assertTrue(M_mul.indices_sorted)
+    self.assertTrue(M_mul.unique_indices)
+    self.assertAllClose(M_mul.todense(), M.todense() ** 2)
+
+    M_dot = sparse.bcoo_dot_general(
+        M, M, dimension_numbers=(([3], [3]), ([0], [0])))
+    self.assertTrue(M_dot.indices_sorted)
+    self.assertTrue(M_dot.unique_indices)
+
+  def test_bcoo_dot_general_sorted_gather_scatter(self):
+    rng = self.rng()
+    rng_sparse = rand_sparse(rng)
+    M_dense = rng_sparse((5, 6), np.float32)
+    M = sparse.BCOO.fromdense(M_dense)
+    x = rng.randn(6).astype(np.float32)
+    y = rng.randn(5).astype(np.float32)
+
+    def sorted_flags(f, *args):
+      jaxpr = jax.make_jaxpr(f)(*args).jaxpr
+      return {eqn.primitive.name: eqn.params['indices_are_sorted']
+              for eqn in jaxpr.eqns if 'indices_are_sorted' in eqn.params}
+
+    # M @ x contracts the trailing sparse dimension: the scatter is sorted.
+    matvec = partial(sparse_bcoo._bcoo_dot_general_impl,
+                     dimension_numbers=(([1], [0]), ([], [])), lhs_spinfo=M._info)
+    flags = sorted_flags(matvec, M.data, M.indices, x)
+    self.assertFalse(flags['gather'])
+    self.assertTrue(flags['scatter-add'])
+    self.assertAllClose(matvec(M.data, M.indices, x), M_dense @ x, rtol=1E-5)
+
+    # y @ M contracts the leading sparse dimension: the gather is sorted.
+    rmatvec = partial(sparse_bcoo._bcoo_dot_general_impl,
+                      dimension_numbers=(([0], [0]), ([], [])), lhs_spinfo=M._info)
+    flags = sorted_flags(rmatvec, M.data, M.indices, y)
+    self.assertTrue(flags['gather'])
+    self.assertFalse(flags['scatter-add'])
+    self.assertAllClose(rmatvec(M.data, M.indices, y), y @ M_dense, rtol=1E-5)
+
+    # Without the flag, neither operation assumes sorted indices.
+    unsorted_info = M._info._replace(indices_sorted=False)
+    flags = sorted_flags(partial(matvec, lhs_spinfo=unsorted_info), M.data, M.indices, x)
+    self.assertFalse(any(flags.values()))
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_nbatch={}_ndense={}_rhs={}".format(
+        jtu.format_shape_dtype_string(shape, dtype), n_batch, n_dense, rhs_shape),
+       "shape": shape, "dtype": dtype, "n_batch": n_batch, "n_dense": n_dense,
+       "rhs_shape": rhs_shape}
+      for shape, rhs_shape in [((5, 6), (6,)), ((5, 6), (6, 3)),
+                               ((2, 5, 6), (6,)), ((3, 4, 5), (5, 2))]
+      for dtype in jtu.dtypes.floating + jtu.dtypes.complex
+      for n_batch in range(len(shape) - 1)
+      for n_dense in range(len(shape) - 1 - n_batch)))
+  def test_bcoo_dot_general_segment_sum(self, shape, dtype, n_batch, n_dense, rhs_shape):
+    rng = jtu.rand_default(self.rng())
+    rng_sparse = rand_sparse(self.rng())
+    M_dense = rng_sparse(shape, dtype)
+    # Padding the nse gives out-of-bound entries that the segment sum must drop.
+    nse = int(sparse_bcoo._bcoo_nse(M_dense, n_batch=n_batch, n_dense=n_dense)) + 2
+    M = sparse.BCOO.fromdense(M_dense, nse=nse, n_batch=n_batch, n_dense=n_dense)
+    M_unsorted = sparse.BCOO(M._bufs, shape=M.shape)
+    rhs = rng(rhs_shape, dtype)
+    dimension_numbers = (([len(shape) - 1], [0]), ([], []))
+
+    f = partial(sparse.bcoo_dot_general, dimension_numbers=dimension_numbers)
+    expected = lax.dot_general(M_dense, rhs, dimension_numbers)
+    tol = {np.float32: 1E-5, np.complex64: 1E-5}
+    self.assertAllClose(f(M, rhs), expected, rtol=tol)
+    self.assertAllClose(jit(f)(M, rhs), expected, rtol=tol)
+    self.assertAllClose(f(M, rhs), f(M_unsorted, rhs), rtol=tol)
+
+  def test_bcoo_dot_general_segment_sum_out_of_bound_middle(self):
+    # (0, 5, 2) is out of bounds in shape (3, 5, 6) but sorts between in-bound
+    # entries, so the segment ids must not jump to the end there.
+    indices = np.array([[0, 1, 0], [0, 4, 1], [0, 5, 2], [1, 0, 3], [2, 3, 5]],
+                       dtype=np.int32)
+    data = np.arange(1, 6, dtype=np.float32)
+    M = sparse.BCOO((data, indices), shape=(3, 5, 6), indices_sorted=True)
+    rhs = np.arange(6, dtype=np.float32) + 1
+    expected = np.zeros((3, 5, 6), np.float32)
+    for d, (i, j, k) in zip(data, indices):
+      if j < 5:
+        expected[i, j, k] = d
+    expected = expected @ rhs
+
+    f = partial(sparse.bcoo_dot_general, dimension_numbers=(([2], [0]), ([], [])))
+    self.assertAllClose(f(M, rhs), expected)
+    self.assertAllClose(jit(f)(M, rhs), expected)
+
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": "_{}_nbatch={}_ndense={}_axes={}".format(
         jtu.format_shape_dtype_string(shape, dtype), n_batch, n_dense, axes),
@@ -2082,6 +2321,156 @@ class BCOOTest(jtu.JaxTestCase):
     self.assertArraysEqual((y_sp @ x_sp).todense(), y_de @ x_de)
 
 
+class BSRTest(jtu.JaxTestCase):
+
+  def _random_bsr_dense(self, shape, blocksize, dtype):
+    # A dense matrix in which about half of the tiles are zero.
+    rng = jtu.rand_default(self.rng())
+    M = rng(shape, dtype)
+    mb, nb = shape[0] // blocksize[0], shape[1] // blocksize[1]
+    mask = self.rng().rand(mb, nb) < 0.5
+    return M * np.kron(mask, np.ones(blocksize, dtype=bool))
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_blocksize={}".format(
+        jtu.format_shape_dtype_string(shape, dtype), blocksize),
+       "shape": shape, "dtype": dtype, "blocksize": blocksize}
+      for shape in [(4, 6), (8, 4), (6, 6)]
+      for blocksize in [(1, 1), (2, 2), (2, 1)]
+      for dtype in all_dtypes))
+  def test_bsr_fromdense_todense(self, shape, dtype, blocksize):
+    M = self._random_bsr_dense(shape, blocksize, dtype)
+    M_bsr = sparse.BSR.fromdense(M, blocksize=blocksize)
+    self.assertEqual(M_bsr.blocksize, blocksize)
+    self.assertArraysEqual(M_bsr.todense(), M)
+
+    nblocks = M_bsr.nblocks + 2
+    fromdense = jit(partial(sparse.bsr_fromdense, nblocks=nblocks, blocksize=blocksize))
+    todense = jit(partial(sparse.bsr_todense, shape=shape))
+    data, indices, indptr = fromdense(M)
+    self.assertEqual(data.shape, (nblocks, *blocksize))
+    self.assertArraysEqual(todense(data, indices, indptr), M)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_blocksize={}_T={}".format(
+        jtu.format_shape_dtype_string(shape, dtype), blocksize, transpose),
+       "shape": shape, "dtype": dtype, "blocksize": blocksize, "transpose": transpose}
+      for shape in [(4, 6), (8, 4), (6, 6)]
+      for blocksize in [(1, 1), (2, 2), (2, 1)]
+      for dtype in jtu.dtypes.floating + jtu.dtypes.complex
+      for transpose in [True, False]))
+  def test_bsr_matvec_matmat(self, shape, dtype, blocksize, transpose):
+    op = lambda M: M.T if transpose else M
+    rng = jtu.rand_default(self.rng())
+    M = self._random_bsr_dense(shape, blocksize, dtype)
+    M_bsr = sparse.BSR.fromdense(M, blocksize=blocksize, nblocks=M.size // np.prod(blocksize))
+    v = rng(op(M).shape[1], dtype)
+    B = rng((op(M).shape[1], 3), dtype)
+
+    args = (M_bsr.data, M_bsr.indices, M_bsr.indptr)
+    matvec = partial(sparse.bsr_matvec, shape=shape, transpose=transpose)
+    matmat = partial(sparse.bsr_matmat, shape=shape, transpose=transpose)
+    self.assertAllClose(matvec(*args, v), op(M) @ v, rtol=MATMUL_TOL)
+    self.assertAllClose(jit(matvec)(*args, v), op(M) @ v, rtol=MATMUL_TOL)
+    self.assertAllClose(matmat(*args, B), op(M) @ B, rtol=MATMUL_TOL)
+    self.assertAllClose(jit(matmat)(*args, B), op(M) @ B, rtol=MATMUL_TOL)
+
+    if transpose:
+      self.assertAllClose(v @ M, v @ M_bsr, rtol=MATMUL_TOL)
+      self.assertAllClose(B.T @ M, B.T @ M_bsr, rtol=MATMUL_TOL)
+    else:
+      self.assertAllClose(M @ v, M_bsr @ v, rtol=MATMUL_TOL)
+      self.assertAllClose(M @ B, M_bsr @ B, rtol=MATMUL_TOL)
+
+  def test_bsr_matmat_uses_tile_products(self):
+    M = self._random_bsr_dense((32, 48), (16, 16), np.float32)
+    M_bsr = sparse.BSR.fromdense(M, blocksize=(16, 16))
+    B = jnp.ones((48, 8), np.float32)
+    jaxpr = jax.make_jaxpr(partial(sparse.bsr.bsr_matmat_p.impl, shape=M.shape,
+                                   transpose=False))(*M_bsr.tree_flatten()[0], B)
+    dots = [eqn for eqn in jaxpr.jaxpr.eqns if eqn.primitive is lax.dot_general_p]
+    self.assertLen(dots, 1)
+    self.assertEqual(dots[0].outvars[0].aval.shape, (M_bsr.nblocks, 16, 8))
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": f"_blocksize={blocksize}_T={transpose}",
+       "blocksize": blocksize, "transpose": transpose}
+      for blocksize in [(1, 1), (2, 3)]
+      for transpose in [True, False]))
+  def test_bsr_matmat_ad(self, blocksize, transpose):
+    rng = jtu.rand_default(self.rng())
+    shape = (4, 6)
+    op = lambda M: M.T if transpose else M
+    M = self._random_bsr_dense(shape, blocksize, np.float32)
+    M_bsr = sparse.BSR.fromdense(M, blocksize=blocksize)
+    B = rng((op(M).shape[1], 2), np.float32)
+    matmat = partial(sparse.bsr_matmat, M_bsr.data, M_bsr.indices, M_bsr.indptr,
+                     shape=shape, transpose=transpose)
+    matvec = partial(sparse.bsr_matvec, M_bsr.data, M_bsr.indices, M_bsr.indptr,
+                     shape=shape, transpose=transpose)
+    jtu.check_grads(matmat, (B,), order=2, modes=["fwd", "rev"])
+    jtu.check_grads(matvec, (B[:, 0],), order=2, modes=["fwd", "rev"])
+
+    def f(data, B):
+      return sparse.bsr_matmat(data, M_bsr.indices, M_bsr.indptr, B, shape=shape,
+                               transpose=transpose)
+    jtu.check_grads(f, (M_bsr.data, B), order=1, modes=["fwd", "rev"], atol=1E-2, rtol=1E-2)
+
+    # The gradient with respect to the tiles matches the dense gradient.
+    grad_data = jax.grad(lambda d: f(d, B).sum())(M_bsr.data)
+    grad_dense = jax.grad(lambda M: (op(M) @ B).sum())(M)
+    grad_expected = sparse.bsr_todense(grad_data, M_bsr.indices, M_bsr.indptr, shape=shape)
+    mask = M_bsr.todense() != 0
+    self.assertAllClose(jnp.where(mask, grad_expected, 0), jnp.where(mask, grad_dense, 0))
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": f"_blocksize={blocksize}", "blocksize": blocksize}
+      for blocksize in [(1, 1), (2, 3), (4, 1)]))
+  def test_bsr_transpose(self, blocksize):
+    shape = (8, 6)
+    M = self._random_bsr_dense(shape, blocksize, np.float32)
+    M_bsr = sparse.BSR.fromdense(M, blocksize=blocksize,
+                                 nblocks=M.size // np.prod(blocksize) + 2)
+    M_T = M_bsr.T
+    self.assertIsInstance(M_T, sparse.BSR)
+    self.assertEqual(M_T.shape, shape[::-1])
+    self.assertEqual(M_T.blocksize, blocksize[::-1])
+    self.assertArraysEqual(M_T.todense(), M.T)
+    self.assertArraysEqual(M_T.T.todense(), M)
+    self.assertArraysEqual(jit(lambda M: M.T)(M_bsr).todense(), M.T)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": f"_blocksize={blocksize}", "blocksize": blocksize}
+      for blocksize in [(1, 1), (2, 3), (4, 1)]))
+  def test_bsr_to_bcoo(self, blocksize):
+    shape = (8, 6)
+    M = self._random_bsr_dense(shape, blocksize, np.float32)
+    M_bsr = sparse.BSR.fromdense(M, blocksize=blocksize,
+                                 nblocks=M.size // np.prod(blocksize) + 2)
+    M_bcoo = M_bsr.to_bcoo()
+    self.assertIsInstance(M_bcoo, sparse.BCOO)
+    self.assertEqual(M_bcoo.nse, M_bsr.nse)
+    self.assertArraysEqual(M_bcoo.todense(), M)
+    self.assertTrue(M_bcoo.indices_sorted)
+    self.assertArraysEqual(M_bcoo.indices, sparse.bcoo_sort_indices(
+        sparse.BCOO(M_bcoo._bufs, shape=shape)).indices)
+
+  def test_bsr_todense_ad(self):
+    M = self._random_bsr_dense((4, 6), (2, 3), np.float32)
+    M_bsr = sparse.BSR.fromdense(M, blocksize=(2, 3))
+    todense = partial(sparse.bsr_todense, indices=M_bsr.indices,
+                      indptr=M_bsr.indptr, shape=M.shape)
+    jtu.check_grads(todense, (M_bsr.data,), order=2, modes=["fwd", "rev"])
+
+    def dense_sum(data):
+      return sparse.todense(sparse.BSR((data, M_bsr.indices, M_bsr.indptr), shape=M.shape)).sum()
+    self.assertArraysEqual(jax.grad(dense_sum)(M_bsr.data), jnp.ones_like(M_bsr.data))
+
+    fromdense = lambda M: sparse.bsr_fromdense(M, nblocks=M_bsr.nblocks,
+                                               blocksize=(2, 3))[0]
+    jtu.check_grads(fromdense, (M,), order=2, modes=["fwd", "rev"])
+
+
 class SparseGradTest(jtu.JaxTestCase):
   def test_sparse_grad(self):
     rng_sparse = rand_sparse(self.rng())
@@ -2108,7 +2497,7 @@ class SparseObjectTest(jtu.JaxTestCase):
 
   @parameterized.named_parameters(
     {"testcase_name": f"_{cls.__name__}{shape}", "cls": cls, "shape": shape}
-    for cls in [sparse.CSR, sparse.CSC, sparse.COO, sparse.BCOO]
+    for cls in [sparse.CSR, sparse.CSC, sparse.COO, sparse.BCOO, sparse.BSR]
     for shape in ([2, 5], [5, 3]))
   def test_empty(self, cls, shape):
     sparse_format = cls.__name__.lower()
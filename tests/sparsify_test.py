@@ -24,7 +24,7 @@ import jax
 from jax import config, jit, lax
 import jax.numpy as jnp
 import jax._src.test_util as jtu
-from jax.experimental.sparse import BCOO, sparsify, todense, SparseTracer
+from jax.experimental.sparse import BCOO, BSR, sparsify, todense, SparseTracer
 from jax.experimental.sparse.transform import (
   arrays_to_spvalues, spvalues_to_arrays, sparsify_raw, SparsifyValue, SparsifyEnv)
 from jax.experimental.sparse.util import CuSparseEfficiencyWarning
@@ -183,6 +183,39 @@ class SparsifyTest(jtu.JaxTestCase):
     result_dense = operator.matmul(X, Y)
     self.assertAllClose(result_sparse.todense(), result_dense)
 
+  def testSparseMatmulBSR(self):
+    X = jnp.zeros((6, 8)).at[:2, 4:].set(1.0).at[4:, :4].set(2.0)
+    Xsp = BSR.fromdense(X, blocksize=(2, 4))
+    Y = jnp.arange(8.0)
+
+    func = self.sparsify(lambda X, Y: 2 * (X @ Y))
+    self.assertAllClose(func(Xsp, Y), 2 * (X @ Y))
+
+    # Products with dense arrays are computed from the tiles.
+    V = jnp.arange(6.0)
+    B = jnp.arange(24.0).reshape(8, 3)
+    C = jnp.arange(18.0).reshape(3, 6)
+    for f, args in [(operator.matmul, (Xsp, Y)), (operator.matmul, (V, Xsp)),
+                    (operator.matmul, (Xsp, B)), (operator.matmul, (C, Xsp)),
+                    (lambda X, V: X.T @ V, (Xsp, V)),
+                    (lambda X, Y: jit(jnp.matmul)(jnp.sin(X), Y), (Xsp, Y))]:
+      dense_args = [X if arg is Xsp else arg for arg in args]
+      self.assertAllClose(self.sparsify(f)(*args), f(*dense_args))
+      jaxpr = jax.make_jaxpr(self.sparsify(f))(*args)
+      self.assertIn("bsr_mat", str(jaxpr))
+      self.assertNotIn("bcoo", str(jaxpr))
+
+    # Zero-preserving unary operations keep the block structure.
+    result_sparse = self.sparsify(jnp.sin)(Xsp)
+    self.assertIsInstance(result_sparse, BSR)
+    self.assertAllClose(result_sparse.todense(), jnp.sin(X))
+
+    # Other operations convert BSR arrays to BCOO.
+    result_sparse = self.sparsify(lambda X: 2 * X)(Xsp)
+    self.assertIsInstance(result_sparse, BCOO)
+    self.assertTrue(result_sparse.indices_sorted)
+    self.assertAllClose(result_sparse.todense(), 2 * X)
+
   def testSparseAdd(self):
     x = BCOO.fromdense(jnp.arange(5))
     y = BCOO.fromdense(2 * jnp.arange(5))
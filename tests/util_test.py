@@ -12,12 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import gc
+import threading
+
 from absl.testing import absltest
 
 from jax import linear_util as lu
 from jax._src import test_util as jtu
 
 from jax.config import config
+from jax._src import util
 from jax._src.util import weakref_lru_cache
 config.parse_flags_with_absl()
 FLAGS = config.FLAGS
@@ -79,6 +83,208 @@ class UtilTest(jtu.JaxTestCase):
       example_cached_fn(stable_keys[i % len(stable_keys)])
       example_cached_fn(Key())
 
+  def test_cache_stats(self):
+    @util.cache(max_size=2)
+    def f(x):
+      return x
+
+    f(1); f(1); f(2); f(3)
+    stats = f.cache_stats()
+    self.assertEqual(stats.hits, 1)
+    self.assertEqual(stats.misses, 3)
+    self.assertEqual(stats.evictions, 1)
+    self.assertEqual(stats.maxsize, 2)
+    self.assertEqual(stats.currsize, 2)
+    self.assertGreaterEqual(stats.miss_time, 0.)
+    self.assertIn(f"{f.__module__}.{f.__qualname__}", util.cache_stats())
+
+    f.cache_clear()
+    self.assertEqual(f.cache_stats(), util.CacheStats(0, 0, 0, 2, 0, 0.))
+
+  def test_weakref_lru_cache_stats(self):
+    @weakref_lru_cache
+    def f(key):
+      return object()
+
+    class Key:
+      pass
+
+    keys = [Key() for _ in range(4100)]
+    f(keys[0]); f(keys[0])
+    stats = f.cache_stats()
+    self.assertEqual((stats.hits, stats.misses, stats.evictions), (1, 1, 0))
+    for key in keys:
+      f(key)
+    stats = f.cache_stats()
+    self.assertEqual(stats.misses, len(keys))
+    self.assertEqual(stats.evictions, len(keys) - stats.currsize)
+
+  def test_weakref_lru_cache_hits_keep_weakref_callback(self):
+    @weakref_lru_cache
+    def f(key):
+      return object()
+
+    class Key:
+      pass
+
+    key = Key()
+    value = f(key)
+    self.assertIs(f(key), value)
+    self.assertEqual(f.cache_stats().currsize, 1)
+    del key
+    gc.collect()
+    self.assertEqual(f.cache_stats().currsize, 0)
+
+  def test_weakref_lru_cache_concurrent_hits(self):
+    @weakref_lru_cache
+    def f(key):
+      return object()
+
+    class Key:
+      pass
+
+    keys = [Key() for _ in range(8)]
+    values = [f(key) for key in keys]
+    results = []
+
+    def worker():
+      results.append([f(key) for _ in range(100) for key in keys])
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+      t.start()
+    for t in threads:
+      t.join()
+    for result in results:
+      self.assertEqual(result, values * 100)
+    stats = f.cache_stats()
+    self.assertEqual((stats.misses, stats.currsize), (len(keys), len(keys)))
+
+  def _set_executable_cache_options(self, **options):
+    for name, value in options.items():
+      name = f"jax_executable_cache_{name}"
+      old_value = getattr(FLAGS, name)
+      config.update(name, value)
+      self.addCleanup(config.update, name, old_value)
+
+  def test_executable_cache_max_entries(self):
+    self._set_executable_cache_options(max_entries=2)
+    calls = []
+
+    @util.cache(executable_cache=True)
+    def f(x):
+      calls.append(x)
+      return x
+
+    for x in [1, 2, 1, 3, 2]:
+      self.assertEqual(f(x), x)
+    self.assertEqual(calls, [1, 2, 3, 2])
+    stats = f.cache_stats()
+    self.assertEqual((stats.evictions, stats.maxsize, stats.currsize),
+                     (2, 2, 2))
+
+  def test_executable_cache_max_bytes(self):
+    class Executable:
+      def __init__(self, size):
+        self.size = size
+
+      def size_of_generated_code_in_bytes(self):
+        return self.size
+
+    class Value:
+      def __init__(self, size):
+        self.xla_executable = Executable(size)
+
+    self._set_executable_cache_options(max_entries=0, max_bytes=100)
+    cache = util.ExecutableCache()
+    cache.put("a", Value(60), 1.)
+    cache.put("b", Value(30), 10.)
+    cache.put("c", Value(30), 0.1)
+    self.assertEqual(list(cache.entries), ["b", "c"])
+    self.assertEqual(cache.total_bytes, 60)
+
+    # The last entry is kept even if it alone exceeds the budget.
+    cache.put("d", Value(200), 0.)
+    self.assertEqual(list(cache.entries), ["d"])
+
+  def test_executable_cache_size_override(self):
+    self._set_executable_cache_options(max_entries=0, max_bytes=100)
+    cache = util.ExecutableCache()
+    cache.put("a", b"x" * 60, 1., size=60)
+    cache.put("b", b"x" * 60, 1., size=60)
+    self.assertEqual(list(cache.entries), ["b"])
+    self.assertEqual(cache.total_bytes, 60)
+
+  def test_executable_cache_cost_policy(self):
+    self._set_executable_cache_options(
+        max_entries=2, eviction_policy="cost")
+    cache = util.ExecutableCache()
+    cache.put("a", None, 1.)
+    cache.put("b", None, 10.)
+    cache.put("c", None, 5.)
+    self.assertEqual(list(cache.entries), ["b", "c"])
+
+  def test_executable_cache_concurrent_puts(self):
+    self._set_executable_cache_options(max_entries=4)
+    cache = util.ExecutableCache()
+    errors = []
+
+    def worker(i):
+      try:
+        for j in range(200):
+          cache.put((i, j), None, 0.)
+          cache.get((i, j - 1))
+      except Exception as e:  # pylint: disable=broad-except
+        errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+      t.start()
+    for t in threads:
+      t.join()
+    self.assertEmpty(errors)
+    self.assertLen(cache, 4)
+
+  def test_executable_cache_unbounded_by_default(self):
+    self.assertEqual(FLAGS.jax_executable_cache_max_entries, 0)
+    self.assertIsNone(util.ExecutableCache.max_entries())
+
+  def test_linear_util_executable_cache(self):
+    self._set_executable_cache_options(max_entries=2)
+
+    @lu.cache(executable_cache=True)
+    def f(fun, x):
+      return object()
+
+    def g():
+      pass
+
+    wf = lu.wrap_init(g)
+    first = f(wf, 1)
+    f(wf, 2)
+    f(wf, 3)
+    stats = f.cache_stats()
+    self.assertEqual((stats.misses, stats.evictions, stats.currsize), (3, 1, 2))
+    self.assertIsNot(f(wf, 1), first)
+    f.evict_function(g)
+    self.assertEqual(f.cache_stats().currsize, 0)
+
+  def test_linear_util_cache_stats(self):
+    @lu.cache
+    def f(fun, x):
+      return object()
+
+    def g():
+      pass
+
+    wf = lu.wrap_init(g)
+    f(wf, 1); f(wf, 1); f(wf, 2)
+    stats = f.cache_stats()
+    self.assertEqual((stats.hits, stats.misses, stats.currsize), (1, 2, 2))
+    f.evict_function(g)
+    stats = f.cache_stats()
+    self.assertEqual((stats.evictions, stats.currsize), (2, 0))
+
 
 if __name__ == "__main__":
     absltest.main(testLoader=jtu.JaxTestLoader())
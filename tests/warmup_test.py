@@ -0,0 +1,101 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from functools import partial
+import os
+import tempfile
+from unittest import mock
+
+from absl.testing import absltest
+import numpy as np
+
+import jax
+from jax._src import dispatch
+import jax._src.test_util as jtu
+from jax.experimental.compilation_cache import warmup
+
+from jax.config import config
+config.parse_flags_with_absl()
+
+
+@partial(jax.jit, static_argnums=1)
+def _scale(x, n):
+  return x * n
+
+
+class WarmupTest(jtu.JaxTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.tmpdir = tempfile.TemporaryDirectory()
+    self.path = os.path.join(self.tmpdir.name, "manifest.jsonl")
+
+  def tearDown(self):
+    warmup.stop_recording()
+    self.tmpdir.cleanup()
+    super().tearDown()
+
+  def test_record_and_warmup_jit(self):
+    x = np.ones(3, np.float32)
+    with warmup.record(self.path):
+      _scale(x, 2)
+      _scale(x, 2)
+      _scale(1., 3)
+      # Traced calls aren't recorded.
+      jax.grad(lambda y: _scale(y, 4))(1.)
+    manifest = warmup.load_manifest(self.path)
+    self.assertLen(manifest, 2)
+    self.assertEqual(manifest[0]["function"], f"{__name__}:_scale")
+
+    _scale.clear_cache()
+    self.assertEqual(warmup.warmup(manifest), 2)
+    with mock.patch.object(dispatch, "lower_xla_callable",
+                           side_effect=AssertionError("compiled")):
+      self.assertAllClose(_scale(x, 2), 2 * x)
+      self.assertAllClose(_scale(1., 3), 3.)
+
+  def test_warmup_local_function(self):
+    f = jax.jit(lambda x: {"y": x + 1})
+    with warmup.record(self.path):
+      f(np.ones(2))
+    manifest = warmup.load_manifest(self.path)
+    self.assertLen(manifest, 1)
+    # Functions that can't be imported are skipped unless they are passed in.
+    self.assertEqual(warmup.warmup(manifest), 0)
+    self.assertEqual(
+        warmup.warmup(manifest, functions={manifest[0]["function"]: f}), 1)
+
+  def test_nested_arguments(self):
+    f = jax.jit(lambda d: d["a"] + d["b"][0])
+    with warmup.record(self.path):
+      f({"a": np.ones(2), "b": (np.zeros(2), None)})
+    manifest = warmup.load_manifest(self.path)
+    self.assertEqual(manifest[0]["args"][0]["dict"]["b"]["tuple"][1],
+                     {"none": None})
+    self.assertEqual(
+        warmup.warmup(manifest, functions={manifest[0]["function"]: f}), 1)
+
+  def test_unserializable_static_argument(self):
+    with warmup.record(self.path):
+      _scale(np.ones(2), np.float32(2))
+    self.assertEmpty(warmup.load_manifest(self.path))
+
+  def test_record_twice(self):
+    with warmup.record(self.path):
+      with self.assertRaisesRegex(RuntimeError, "already being recorded"):
+        warmup.start_recording(self.path)
+
+
+if __name__ == "__main__":
+  absltest.main(testLoader=jtu.JaxTestLoader())